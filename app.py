@@ -1,32 +1,74 @@
 # Flask UI
+import time
+_import_started = time.perf_counter()
+
+import hmac
 import os
 import shutil
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import threading
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response
 from werkzeug.utils import secure_filename
 from flask import get_flashed_messages
 
 # Import RAG code
-from main import run_ingestion_pipeline, run_rag_pipeline, UPLOAD_FOLDER
+from utils.pipeline import ingest_files, run_rag_pipeline, UPLOAD_FOLDER
+from utils.text_extract import is_supported
+from utils.jobs import IngestionJobQueue
+from utils.metrics import REGISTRY, CONTENT_TYPE, STARTUP_SECONDS
+from utils.warmup import warm_up
+from utils.prewarm import schedule_prewarm
+from utils.profiling import profiled
 
 app = Flask(__name__)
 app.secret_key = "mysecretkey"
 
+# Uploads are ingested in the background so requests return immediately
+ingestion_jobs = IngestionJobQueue(ingest_files, workers=int(os.getenv("INGEST_WORKERS", "2")))
+
+# With PROFILE_REQUESTS=1, requests sent with an X-Profile: <PROFILE_TOKEN> header
+# are profiled (see utils/profiling.py); clients only ever see the profile's id
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+if PROFILE_REQUESTS and not PROFILE_TOKEN:
+    print("PROFILE_REQUESTS=1 but PROFILE_TOKEN is not set; request profiling stays off")
+
 # Ensure upload folder exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+STARTUP_SECONDS.set(time.perf_counter() - _import_started, phase="import")
+
+def _warm_up_in_background():
+    started = time.perf_counter()
+    warm_up()
+    STARTUP_SECONDS.set(time.perf_counter() - started, phase="warmup")
+
+# Open connection pools and wake the embedding model before the first question arrives
+if os.getenv("WARMUP_ON_START", "1") == "1":
+    threading.Thread(target=_warm_up_in_background, daemon=True).start()
+
+# Re-ask the most frequent logged questions so the first users after a deploy hit warm caches
+schedule_prewarm("startup")
+
+def _profile_requested():
+    """Whether an operator asked to profile this request: PROFILE_REQUESTS=1 and an `X-Profile: <PROFILE_TOKEN>` header"""
+    if not (PROFILE_REQUESTS and PROFILE_TOKEN):
+        return False
+    return hmac.compare_digest(request.headers.get('X-Profile', '').encode(), PROFILE_TOKEN.encode())
+
 @app.route('/')
 def index():
     # List of uploaded files
     files = []
     if os.path.exists(UPLOAD_FOLDER):
-        files = [f for f in os.listdir(UPLOAD_FOLDER) 
-                if f.lower().endswith(('.pdf', '.docx', '.txt', '.json'))]  # Added .json support
+        files = [f for f in os.listdir(UPLOAD_FOLDER) if is_supported(f)]
     
     # Get any stored question/answer from session
     question = session.get('question', '')
     answer = session.get('answer', '')
     
-    return render_template('index.html', files=files, question=question, answer=answer)
+    jobs = [job.to_dict() for job in ingestion_jobs.recent(limit=5)]
+    
+    return render_template('index.html', files=files, question=question, answer=answer, jobs=jobs)
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -42,7 +84,7 @@ def upload_file():
     
     uploaded_files = []
     for file in files:
-        if file and file.filename.lower().endswith(('.pdf', '.docx', '.txt', '.json')):  # Added .json support
+        if file and is_supported(file.filename):
             filename = secure_filename(file.filename)
             file_path = os.path.join(UPLOAD_FOLDER, filename)
             file.save(file_path)
@@ -51,16 +93,27 @@ def upload_file():
             flash(f'Unsupported file type: {file.filename}. Supported types: PDF, DOCX, TXT, JSON')
     
     if uploaded_files:
-        try:
-            # Processing uploaded files
-            run_ingestion_pipeline()
-            flash(f'Files uploaded and processed successfully: {", ".join(uploaded_files)}')
-        except Exception as e:
-            flash(f'Error processing files: {str(e)}')
-            print(f"Ingestion error: {e}")
+        # Queue only the newly saved files; a background worker embeds and upserts them
+        job = ingestion_jobs.submit(uploaded_files, profile=_profile_requested())
+        flash(f'Files uploaded: {", ".join(uploaded_files)}. Processing in background (job {job.id}).')
+        if job.profile:
+            flash(f'Job {job.id} is being profiled; /jobs/{job.id} shows the profile id.')
     
     return redirect(url_for('index'))
 
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Status of the most recent ingestion jobs"""
+    return jsonify([job.to_dict() for job in ingestion_jobs.recent()])
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress of a single ingestion job"""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/ask', methods=['POST'])
 def ask_question():
     question = request.form.get('question', '').strip()
@@ -68,8 +121,10 @@ def ask_question():
         flash('Please enter a question')
         return redirect(url_for('index'))
     
+    profile = None
     try:
-        answer = run_rag_pipeline(question)
+        with profiled("ask", _profile_requested()) as profile:
+            answer = run_rag_pipeline(question)
         
         # Store question and answer in session
         session['question'] = question
@@ -83,7 +138,19 @@ def ask_question():
         session['question'] = question
         session['answer'] = 'Sorry, I encountered an error while processing your question.'
     
-    return redirect(url_for('index'))
+    # A profile that failed to write was logged by profiled(); the answer goes out without it
+    profile_id = profile.id if profile is not None and profile.written else None
+    if profile_id:
+        flash(f'Profiled as {profile_id}')
+    response = redirect(url_for('index'))
+    if profile_id:
+        response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 @app.route('/clear_uploads', methods=['POST'])
 def clear_uploads():
@@ -0,0 +1,125 @@
+# benchmarks/bench_hierarchical.py
+# Recall and latency of two-stage (document, then chunk) search vs flat chunk search
+#
+# Builds a synthetic clustered corpus (each document's chunks scattered around
+# its own topic vector), loads it into a chunk collection plus a centroid
+# collection, and compares both strategies against exact brute-force top-k.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_hierarchical --docs 500 --chunks-per-doc 40
+#   QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_hierarchical --real --docs 20000
+import argparse
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+
+from benchmarks.fake_servers import FakeServers
+from benchmarks.run_benchmarks import percentile
+
+def make_corpus(docs, chunks_per_doc, dim, spread, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(docs, dim))
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    vectors = np.repeat(topics, chunks_per_doc, axis=0) + rng.normal(scale=spread / np.sqrt(dim), size=(docs * chunks_per_doc, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    sources = [f"doc_{i:06d}" for i in range(docs) for _ in range(chunks_per_doc)]
+    return vectors.astype(np.float32), sources
+
+def make_queries(vectors, count, noise, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), size=count)
+    queries = vectors[picks] + rng.normal(scale=noise / np.sqrt(vectors.shape[1]), size=(count, vectors.shape[1]))
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+def load(vectors, sources, batch_size):
+    from utils.bulk_writer import BulkWriter, get_client
+    from utils.doc_index import CentroidAccumulator, DOC_COLLECTION_NAME, prepare_doc_collection
+    from utils.point_batch import ChunkRecord, PointBatch
+    from utils.qdrant_utils import create_collection, create_source_index
+    from utils.config import COLLECTION_NAME
+
+    client = get_client(False)
+    for name in (COLLECTION_NAME, DOC_COLLECTION_NAME):
+        client.delete_collection(name)
+    create_collection(COLLECTION_NAME, vectors.shape[1])
+    create_source_index(COLLECTION_NAME)
+    prepare_doc_collection(vectors.shape[1])
+
+    ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
+    accumulator = CentroidAccumulator("source")
+    with BulkWriter(COLLECTION_NAME, batch_size=batch_size) as writer:
+        for start in range(0, len(vectors), batch_size):
+            end = start + batch_size
+            records = [ChunkRecord(pid, "", source, source, 0, i)
+                       for i, (pid, source) in enumerate(zip(ids[start:end], sources[start:end]), start=start)]
+            batch = PointBatch(records, vectors[start:end])
+            accumulator.add(batch)
+            writer.write(batch)
+    with BulkWriter(DOC_COLLECTION_NAME, batch_size=batch_size) as writer:
+        writer.write(accumulator.pop())
+    return ids
+
+def run_queries(search, queries, truth, ids, top_k):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = search(query.tolist())
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {str(hit["id"]) for hit in hits}
+        recalls.append(len(found & {ids[i] for i in expected}) / top_k)
+    return {
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hierarchical vs flat retrieval")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--chunks-per-doc", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--spread", type=float, default=1.0, help="Chunk scatter around each document topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-noise", type=float, default=0.5)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--top-docs", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--real", action="store_true", help="Use QDRANT_URL from the environment instead of the fake server")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    servers = None
+    if not args.real:
+        servers = FakeServers(llm_latency=0)
+        os.environ.update(servers.env("bench_hierarchical"))
+
+    try:
+        from utils.retriever import search_qdrant, search_hierarchical
+
+        vectors, sources = make_corpus(args.docs, args.chunks_per_doc, args.dim, args.spread)
+        queries = make_queries(vectors, args.queries, args.query_noise)
+        truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.top_k]
+
+        start = time.perf_counter()
+        ids = load(vectors, sources, args.batch_size)
+        results = {
+            "chunks": len(vectors), "docs": args.docs, "top_k": args.top_k,
+            "target": "real" if args.real else "fake",
+            "load_seconds": round(time.perf_counter() - start, 2),
+            "flat": run_queries(lambda v: search_qdrant(v, top_k=args.top_k), queries, truth, ids, args.top_k),
+        }
+        for top_docs in args.top_docs:
+            results[f"hierarchical_top{top_docs}"] = run_queries(
+                lambda v: search_hierarchical(v, top_k=args.top_k, top_docs=top_docs), queries, truth, ids, args.top_k
+            )
+    finally:
+        if servers:
+            servers.stop()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
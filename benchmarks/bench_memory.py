@@ -0,0 +1,81 @@
+# benchmarks/bench_memory.py
+# Memory held per chunk: the old dict-of-lists points vs ChunkRecord + float32 PointBatch
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_memory --chunks 20000
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+import uuid
+
+import numpy as np
+
+from utils.point_batch import ChunkRecord, PointBatch
+
+VECTOR_SIZE = 384
+
+def fake_chunks(count, seed=0):
+    rng = random.Random(seed)
+    text = " ".join(["word"] * 300)
+    for i in range(count):
+        # Vectors are kept as the JSON the embedding API returns, so both layouts pay for decoding them
+        vector = json.dumps([rng.uniform(-1, 1) for _ in range(VECTOR_SIZE)])
+        yield str(uuid.UUID(int=rng.getrandbits(128))), text, vector, i
+
+def dict_points(chunks):
+    """How embed_chunks held points before: a dict per point with a list of Python floats"""
+    return [{
+        "id": point_id,
+        "vector": json.loads(vector),
+        "payload": {"text": text, "source": "bench.json", "content_id": f"bench.json_content_{i+1}",
+                    "chunk_index": 0, "absolute_index": i}
+    } for point_id, text, vector, i in chunks]
+
+def compact_points(chunks, batch_size):
+    batches = []
+    for start in range(0, len(chunks), batch_size):
+        part = chunks[start:start + batch_size]
+        records = []
+        vectors = np.empty((len(part), VECTOR_SIZE), dtype=np.float32)
+        for row, (point_id, text, vector, i) in enumerate(part):
+            records.append(ChunkRecord(point_id, text, "bench.json", f"bench.json_content_{i+1}", 0, i))
+            vectors[row] = json.loads(vector)
+        batches.append(PointBatch(records, vectors))
+    return batches
+
+def measure(build, chunks):
+    # Inputs are generated before tracing starts; the shared chunk text is not counted for either layout,
+    # so the numbers are the per-chunk overhead on top of the text itself
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build(chunks)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {"held_mb": round(current / 2**20, 2), "peak_mb": round(peak / 2**20, 2),
+            "bytes_per_chunk": round(current / len(chunks)), "build_seconds": round(elapsed, 3)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare memory used by point representations")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    chunks = list(fake_chunks(args.chunks))
+    results = {
+        "chunks": args.chunks,
+        "dict_of_lists": measure(dict_points, chunks),
+        "compact_float32": measure(lambda c: compact_points(c, args.batch_size), chunks),
+    }
+    results["reduction"] = round(results["dict_of_lists"]["held_mb"] / results["compact_float32"]["held_mb"], 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
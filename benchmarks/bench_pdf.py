@@ -0,0 +1,108 @@
+# benchmarks/bench_pdf.py
+# PDF extraction speed: the old sequential pdfplumber loop vs page-parallel fast/layout modes,
+# and the extracted-text cache (first read vs cache hit)
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_pdf --pages 600
+#   python -m benchmarks.bench_pdf --pdf path/to/real.pdf
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from utils.pdf_extract import iter_pdf_pages, chunk_pages
+
+WORDS = ("doctor clinic cardiology hospital patient surgery consultation pune mumbai delhi "
+         "experience education degree appointment phone address speciality treatment care").split()
+
+def write_synthetic_pdf(path, pages, lines_per_page=45, words_per_line=12, seed=0):
+    """Write a plain multi-page PDF using only the standard Helvetica font"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(words_per_line)) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode())
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+def sequential_pdfplumber(path):
+    """The previous load_text_from_file implementation"""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        text = ""
+        for page in pdf.pages:
+            text += page.extract_text() or ""
+    return len(text.split())
+
+def page_streamed(path, mode, workers):
+    words = 0
+    for chunk, _, _ in chunk_pages(iter_pdf_pages(path, mode=mode, workers=workers)):
+        words += len(chunk.split())
+    return words
+
+def text_cached(path):
+    from utils.pipeline import iter_chunks
+    from utils.text_extract import load_text_from_file
+    return sum(len(chunk.split()) for _, _, chunk, _ in iter_chunks(load_text_from_file(path)))
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    words = fn(*args)
+    return {"seconds": round(time.perf_counter() - start, 3), "words": words}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction modes")
+    parser.add_argument("--pages", type=int, default=600)
+    parser.add_argument("--pdf", default=None, help="Benchmark an existing PDF instead of a synthetic one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-sequential", action="store_true", help="Skip the slow pdfplumber baseline")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(folder, "synthetic.pdf")
+            write_synthetic_pdf(path, args.pages)
+
+        results = {"pdf": args.pdf or f"synthetic ({args.pages} pages)", "workers": args.workers}
+        if not args.skip_sequential:
+            results["sequential_pdfplumber"] = timed(sequential_pdfplumber, path)
+        results["fast_single_process"] = timed(page_streamed, path, "fast", 1)
+        results["fast_parallel"] = timed(page_streamed, path, "fast", args.workers)
+        results["layout_parallel"] = timed(page_streamed, path, "layout", args.workers)
+
+        # The text cache reads its path at import time
+        os.environ["TEXT_CACHE_PATH"] = os.path.join(folder, "text_cache.sqlite3")
+        results["text_cache_miss"] = timed(text_cached, path)
+        results["text_cache_hit"] = timed(text_cached, path)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,88 @@
+# benchmarks/bench_snapshot.py
+# Snapshot round trip: export size and speed (float32 vs float16), bulk import throughput,
+# and local memory-mapped search latency and agreement with Qdrant search
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_snapshot --points 20000
+#   QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_snapshot --real --points 1000000
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.bench_upload import make_points, fresh_collection
+from benchmarks.fake_servers import FakeServers
+from benchmarks.run_benchmarks import percentile
+
+def folder_mb(path):
+    return round(sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20, 2)
+
+def load(collection, points, batch_size):
+    from utils.bulk_writer import BulkWriter
+    fresh_collection(collection, len(points[0]["vector"]))
+    with BulkWriter(collection, batch_size=batch_size) as writer:
+        writer.write(points)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark snapshot export, import and local search")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--real", action="store_true", help="Use QDRANT_URL from the environment instead of the fake server")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    servers = None
+    if not args.real:
+        servers = FakeServers(llm_latency=0)
+        os.environ.update(servers.env("bench_snapshot"))
+
+    folder = tempfile.TemporaryDirectory()
+    results = {"points": args.points, "target": "real" if args.real else "fake"}
+    try:
+        from utils.retriever import search_qdrant
+        from utils.snapshot import export_snapshot, import_snapshot, SnapshotIndex
+
+        points = list(make_points(args.points))
+        load("bench_snapshot", points, args.batch_size)
+
+        for dtype in ("float32", "float16"):
+            path = os.path.join(folder.name, dtype)
+            start = time.perf_counter()
+            export_snapshot(path, collection_name="bench_snapshot", dtype=dtype)
+            elapsed = time.perf_counter() - start
+            results[f"export_{dtype}"] = {"seconds": round(elapsed, 3), "points_per_sec": round(args.points / elapsed, 1),
+                                          "size_mb": folder_mb(path)}
+
+        start = time.perf_counter()
+        imported = import_snapshot(os.path.join(folder.name, "float16"), collection_name="bench_snapshot_restored",
+                                   parallel=args.parallel, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        results["import"] = {"seconds": round(elapsed, 3), "points_per_sec": round(imported / elapsed, 1)}
+
+        for dtype in ("float32", "float16"):
+            index = SnapshotIndex(os.path.join(folder.name, dtype))
+            latencies, overlap = [], []
+            for query in points[:args.queries]:
+                start = time.perf_counter()
+                local = index.search(query["vector"], top_k=args.top_k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                remote = search_qdrant(query["vector"], top_k=args.top_k, collection_name="bench_snapshot")
+                overlap.append(len({hit["id"] for hit in local} & {str(hit["id"]) for hit in remote}) / args.top_k)
+            results[f"local_search_{dtype}"] = {
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "overlap_with_qdrant": round(sum(overlap) / len(overlap), 4),
+            }
+    finally:
+        folder.cleanup()
+        if servers:
+            servers.stop()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,83 @@
+# benchmarks/bench_upload.py
+# Upload throughput: single JSON PUTs (upsert_vectors) vs the BulkWriter over REST and gRPC
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_upload --points 20000                 # against the in-process fake Qdrant
+#   QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_upload --real --grpc --points 200000
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+
+from benchmarks.fake_servers import FakeServers
+
+def make_points(count, size=384, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {"id": str(uuid.UUID(int=rng.getrandbits(128))), "vector": [rng.random() for _ in range(size)],
+               "payload": {"text": f"chunk {i}", "source": "bench_upload", "absolute_index": i}}
+
+def fresh_collection(name, size):
+    from utils.qdrant_utils import create_collection
+    from utils.bulk_writer import get_client
+    get_client(False).delete_collection(name)
+    create_collection(name, size)
+
+def run(label, collection, points, fn):
+    fresh_collection(collection, len(points[0]["vector"]))
+    start = time.perf_counter()
+    fn(collection, points)
+    elapsed = time.perf_counter() - start
+    return label, {"seconds": round(elapsed, 3), "points_per_sec": round(len(points) / elapsed, 1)}
+
+def via_upsert_vectors(collection, points, batch_size):
+    from utils.qdrant_utils import upsert_vectors
+    for start in range(0, len(points), batch_size):
+        upsert_vectors(collection, points[start:start + batch_size])
+
+def via_bulk_writer(collection, points, batch_size, parallel, prefer_grpc):
+    from utils.bulk_writer import BulkWriter
+    with BulkWriter(collection, batch_size=batch_size, parallel=parallel, prefer_grpc=prefer_grpc) as writer:
+        for start in range(0, len(points), batch_size):
+            writer.write(points[start:start + batch_size])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant upload paths")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--real", action="store_true", help="Use QDRANT_URL from the environment instead of the fake server")
+    parser.add_argument("--grpc", action="store_true", help="Also measure the gRPC paths (needs a real Qdrant)")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    servers = None
+    if not args.real:
+        servers = FakeServers(llm_latency=0)
+        os.environ.update(servers.env())
+
+    collection = "bench_upload"
+    points = list(make_points(args.points))
+    results = {"points": args.points, "batch_size": args.batch_size, "parallel": args.parallel,
+               "target": "real" if args.real else "fake"}
+    try:
+        cases = [
+            ("upsert_vectors_rest", lambda c, p: via_upsert_vectors(c, p, args.batch_size)),
+            ("bulk_writer_rest", lambda c, p: via_bulk_writer(c, p, args.batch_size, args.parallel, False)),
+        ]
+        if args.grpc:
+            cases.append(("bulk_writer_grpc", lambda c, p: via_bulk_writer(c, p, args.batch_size, args.parallel, True)))
+        for label, fn in cases:
+            name, result = run(label, collection, points, fn)
+            results[name] = result
+            print(name, result)
+    finally:
+        if servers:
+            servers.stop()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
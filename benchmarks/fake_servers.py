@@ -0,0 +1,364 @@
+# benchmarks/fake_servers.py
+# Local stand-ins for Hugging Face inference, Groq chat and Qdrant, for benchmarks and offline runs
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import numpy as np
+except ImportError:  # Pure-Python scoring is slower but keeps the fakes dependency-free
+    np = None
+
+VECTOR_SIZE = 384
+
+def fake_embedding(text, size=VECTOR_SIZE):
+    """Deterministic unit vector derived from the text hash"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(size)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; on a keep-alive connection Nagle's
+    # algorithm holds the body back until the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+class EmbeddingHandler(_JsonHandler):
+    """Hugging Face feature-extraction API: {"inputs": [...]} -> list of vectors"""
+    latency = 0.0
+
+    def do_POST(self):
+        body = self._read_json()
+        inputs = body.get("inputs", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if self.latency:
+            time.sleep(self.latency)
+        self._send_json(200, [fake_embedding(text) for text in inputs])
+
+class ChatHandler(_JsonHandler):
+    """OpenAI-compatible /chat/completions with a configurable response delay"""
+    latency = 0.05
+
+    def do_GET(self):
+        self._send_json(200, {"object": "list", "data": [{"id": "llama3-8b-8192", "object": "model"}]})
+
+    def do_POST(self):
+        body = self._read_json()
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        if "Answer only YES or NO" in prompt:
+            answer = "YES"
+        elif "structured JSON format" in prompt:
+            answer = json.dumps({"Name": "Dr. Example", "Speciality": "Cardiology", "City": "Pune"})
+        else:
+            answer = "This is a benchmark answer drawn from the provided context."
+        if self.latency:
+            time.sleep(self.latency)
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(answer) // 4
+        self._send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        })
+
+class InMemoryCollection:
+    def __init__(self, size):
+        self.size = size
+        self.points = {}
+        self.lock = threading.Lock()
+        self._matrix = None
+
+    def upsert(self, points):
+        with self.lock:
+            for point in points:
+                vector = point["vector"]
+                norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+                self.points[str(point["id"])] = ([v / norm for v in vector], point.get("payload") or {})
+            self._matrix = None
+
+    def _scored(self, vector, candidates):
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        query = [v / norm for v in vector]
+        if np is not None:
+            if self._matrix is None or len(self._matrix[0]) != len(self.points):
+                ids = list(self.points)
+                self._matrix = (ids, np.array([self.points[i][0] for i in ids], dtype=np.float32))
+            ids, matrix = self._matrix
+            scores = matrix @ np.array(query, dtype=np.float32) if len(ids) else []
+            return [(float(s), pid) for pid, s in zip(ids, scores) if pid in candidates]
+        return [(sum(a * b for a, b in zip(query, self.points[pid][0])), pid) for pid in candidates]
+
+    def search(self, vector, top, filter_=None):
+        with self.lock:
+            candidates = {pid for pid, (_, payload) in self.points.items() if _matches(payload, filter_)}
+            scored = sorted(self._scored(vector, candidates), reverse=True)[:top]
+            return [{"id": pid, "version": 0, "score": score, "payload": self.points[pid][1]} for score, pid in scored]
+
+    def scroll(self, limit, offset=None, filter_=None, with_payload=True, with_vector=False):
+        with self.lock:
+            ids = sorted(pid for pid, (_, payload) in self.points.items() if _matches(payload, filter_))
+            start = 0
+            if offset is not None:
+                start = next((i for i, pid in enumerate(ids) if pid >= str(offset)), len(ids))
+            page = ids[start:start + limit]
+            next_offset = ids[start + limit] if start + limit < len(ids) else None
+            points = []
+            for pid in page:
+                vector, payload = self.points[pid]
+                point = {"id": pid, "payload": _select_payload(payload, with_payload)}
+                if with_vector:
+                    point["vector"] = vector
+                points.append(point)
+            return points, next_offset
+
+    def retrieve(self, ids, with_payload=True):
+        with self.lock:
+            return [{"id": str(pid), "payload": _select_payload(self.points[str(pid)][1], with_payload)}
+                    for pid in ids if str(pid) in self.points]
+
+    def delete(self, filter_):
+        with self.lock:
+            for pid in [pid for pid, (_, payload) in self.points.items() if _matches(payload, filter_)]:
+                del self.points[pid]
+            self._matrix = None
+
+    def set_payload(self, ids, payload):
+        with self.lock:
+            for pid in ids:
+                if str(pid) in self.points:
+                    self.points[str(pid)][1].update(payload)
+
+def _select_payload(payload, with_payload):
+    if with_payload is True:
+        return payload
+    if isinstance(with_payload, list):
+        return {k: v for k, v in payload.items() if k in with_payload}
+    if isinstance(with_payload, dict) and "include" in with_payload:
+        return {k: v for k, v in payload.items() if k in with_payload["include"]}
+    return None
+
+def _matches(payload, filter_):
+    """Subset of the Qdrant filter language: must/must_not/should with match value/any"""
+    if not filter_:
+        return True
+
+    def condition(cond):
+        value = payload.get(cond.get("key"))
+        match = cond.get("match", {})
+        values = value if isinstance(value, list) else [value]
+        if "value" in match:
+            return match["value"] in values
+        if "any" in match:
+            return any(v in match["any"] for v in values)
+        return False
+
+    must = filter_.get("must") or []
+    must_not = filter_.get("must_not") or []
+    should = filter_.get("should") or []
+    return (all(condition(c) for c in must)
+            and not any(condition(c) for c in must_not)
+            and (not should or any(condition(c) for c in should)))
+
+class QdrantHandler(_JsonHandler):
+    """Enough of the Qdrant REST API for this repo's requests and qdrant_client calls"""
+    collections = {}
+    aliases = {}
+    lock = threading.Lock()
+
+    def _ok(self, result):
+        self._send_json(200, {"result": result, "status": "ok", "time": 0.0})
+
+    def _not_found(self, name):
+        self._send_json(404, {"status": {"error": f"Collection `{name}` doesn't exist!"}, "time": 0.0})
+
+    def _collection(self, name):
+        """Look a collection up by name or alias"""
+        return self.collections.get(self.aliases.get(name, name))
+
+    def _update_aliases(self, actions):
+        with self.lock:
+            for action in actions:
+                if "delete_alias" in action:
+                    self.aliases.pop(action["delete_alias"]["alias_name"], None)
+                elif "create_alias" in action:
+                    create = action["create_alias"]
+                    if create["alias_name"] in self.collections or create["collection_name"] not in self.collections:
+                        return False
+                    self.aliases[create["alias_name"]] = create["collection_name"]
+        return True
+
+    def _route(self):
+        path = self.path.split("?")[0].rstrip("/")
+        match = re.match(r"^/collections/([^/]+)(/.*)?$", path)
+        if not match:
+            return path, None, None
+        return path, match.group(1), match.group(2) or ""
+
+    def do_GET(self):
+        path, name, rest = self._route()
+        if path == "":
+            self._send_json(200, {"title": "qdrant - fake", "version": "1.9.0"})
+        elif path == "/collections":
+            self._ok({"collections": [{"name": n} for n in self.collections]})
+        elif path == "/aliases":
+            self._ok({"aliases": [{"alias_name": a, "collection_name": c} for a, c in self.aliases.items()]})
+        elif name is not None and rest == "":
+            collection = self._collection(name)
+            if collection is None:
+                return self._not_found(name)
+            self._ok({"status": "green", "points_count": len(collection.points),
+                      "config": {"params": {"vectors": {"size": collection.size, "distance": "Cosine"}, "shard_number": 1}}})
+        else:
+            self._send_json(404, {"status": {"error": "not found"}})
+
+    def do_PUT(self):
+        path, name, rest = self._route()
+        body = self._read_json()
+        if name is None:
+            return self._send_json(404, {"status": {"error": "not found"}})
+        if rest == "":
+            with self.lock:
+                if name in self.collections or name in self.aliases:
+                    return self._send_json(409, {"status": {"error": f"Collection `{name}` already exists!"}})
+                self.collections[name] = InMemoryCollection(body.get("vectors", {}).get("size", VECTOR_SIZE))
+            return self._ok(True)
+
+        collection = self._collection(name)
+        if collection is None:
+            return self._not_found(name)
+        if rest == "/index":
+            self._ok({"operation_id": 0, "status": "completed"})
+        elif rest == "/points":
+            if "batch" in body:
+                batch = body["batch"]
+                payloads = batch.get("payloads") or [None] * len(batch["ids"])
+                points = [{"id": i, "vector": v, "payload": p} for i, v, p in zip(batch["ids"], batch["vectors"], payloads)]
+            else:
+                points = body.get("points", [])
+            collection.upsert(points)
+            self._ok({"operation_id": 0, "status": "completed"})
+        else:
+            self._send_json(404, {"status": {"error": "not found"}})
+
+    def do_DELETE(self):
+        path, name, rest = self._route()
+        if name is None or rest != "":
+            return self._send_json(404, {"status": {"error": "not found"}})
+        with self.lock:
+            existed = self.collections.pop(name, None) is not None
+            for alias in [a for a, c in self.aliases.items() if c == name]:
+                del self.aliases[alias]
+        self._ok(existed)
+
+    def do_POST(self):
+        path, name, rest = self._route()
+        body = self._read_json()
+        if path == "/collections/aliases":
+            if not self._update_aliases(body.get("actions", [])):
+                return self._send_json(400, {"status": {"error": "bad alias action"}})
+            return self._ok(True)
+        collection = self._collection(name) if name else None
+        if collection is None:
+            return self._not_found(name)
+        if rest == "/points/search":
+            self._ok(collection.search(body["vector"], body.get("top") or body.get("limit") or 10, body.get("filter")))
+        elif rest == "/points/scroll":
+            points, next_offset = collection.scroll(
+                body.get("limit") or 10, body.get("offset"), body.get("filter"),
+                body.get("with_payload", True), body.get("with_vector", False)
+            )
+            self._ok({"points": points, "next_page_offset": next_offset})
+        elif rest == "/points":
+            self._ok(collection.retrieve(body.get("ids", []), body.get("with_payload", True)))
+        elif rest == "/points/payload":
+            collection.set_payload(body.get("points", []), body.get("payload", {}))
+            self._ok({"operation_id": 0, "status": "completed"})
+        elif rest == "/points/delete":
+            collection.delete(body.get("filter"))
+            self._ok({"operation_id": 0, "status": "completed"})
+        elif rest == "/points/count":
+            points, _ = collection.scroll(len(collection.points) or 1, filter_=body.get("filter"), with_payload=False)
+            self._ok({"count": len(points)})
+        else:
+            self._send_json(404, {"status": {"error": "not found"}})
+
+class FakeServers:
+    """Starts the three fake services on free localhost ports in background threads"""
+
+    def __init__(self, embed_latency=0.0, llm_latency=0.05):
+        EmbeddingHandler.latency = embed_latency
+        ChatHandler.latency = llm_latency
+        QdrantHandler.collections = {}
+        QdrantHandler.aliases = {}
+        self.servers = {
+            "embedding": ThreadingHTTPServer(("127.0.0.1", 0), EmbeddingHandler),
+            "chat": ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler),
+            "qdrant": ThreadingHTTPServer(("127.0.0.1", 0), QdrantHandler),
+        }
+        for server in self.servers.values():
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def url(self, name):
+        host, port = self.servers[name].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self, collection_name="benchmark"):
+        """Environment variables that point the pipeline at these servers"""
+        return {
+            "HF_API_URL": f"{self.url('embedding')}/models/fake-embedder",
+            "GROQ_API_URL": f"{self.url('chat')}/openai/v1/chat/completions",
+            "QDRANT_URL": self.url("qdrant"),
+            "QDRANT_API_KEY": "fake",
+            "HUGGINGFACE_API_TOKEN": "fake",
+            "GROQ_API_KEY": "fake",
+            "COLLECTION_NAME": collection_name,
+        }
+
+    def points_count(self, collection_name):
+        collection = QdrantHandler.collections.get(collection_name)
+        return len(collection.points) if collection else 0
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    servers = FakeServers()
+    for key, value in servers.env().items():
+        print(f"export {key}={value}")
+    print("Fake servers running, press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servers.stop()
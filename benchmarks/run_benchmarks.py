@@ -0,0 +1,219 @@
+# benchmarks/run_benchmarks.py
+# End-to-end ingestion and query benchmarks against local fake servers
+#
+# Usage (from the repo root):
+#   python -m benchmarks.run_benchmarks --output benchmarks/results/latest.json
+#   python -m benchmarks.run_benchmarks --compare benchmarks/results/previous.json
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_servers import FakeServers
+
+WORDS = ("doctor clinic cardiology hospital patient surgery consultation pune mumbai delhi "
+         "experience education degree appointment phone address speciality treatment care").split()
+
+QUESTIONS = [
+    "Which cardiologists practice in Pune?",
+    "What is the phone number of the clinic?",
+    "Where did the surgeon complete their education?",
+    "How many years of experience does the doctor have?",
+    "Which hospital offers consultation on weekends?",
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+def write_corpus(folder, files, words_per_file, seed=0):
+    rng = random.Random(seed)
+    for i in range(files):
+        text = " ".join(rng.choice(WORDS) for _ in range(words_per_file))
+        with open(os.path.join(folder, f"bench_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+# Imported on first use by the ingestion path (see utils/pipeline.py)
+LAZY_MODULES = ("qdrant_client", "pdfplumber", "docx")
+
+def bench_ingestion(pipeline, servers, files, words_per_file):
+    # Load the lazily imported modules up front so chunks/sec is steady-state throughput
+    start = time.perf_counter()
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    lazy_import_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_corpus(folder, files, words_per_file)
+        pipeline.UPLOAD_FOLDER = folder
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.run_ingestion_pipeline()
+        elapsed = time.perf_counter() - start
+
+    chunks = servers.points_count(pipeline.COLLECTION_NAME)
+    return {
+        "files": files,
+        "words_per_file": words_per_file,
+        "chunks": chunks,
+        "seconds": round(elapsed, 4),
+        "chunks_per_sec": round(chunks / elapsed, 2) if elapsed else None,
+        "lazy_import_seconds": round(lazy_import_seconds, 4),
+    }
+
+STARTUP_SCRIPT = """
+import contextlib, io, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    if sys.argv[1] == "warm":
+        from utils.warmup import warm_up
+        warm_up()
+    warmed = time.perf_counter()
+    main.run_rag_pipeline("Which cardiologists practice in Pune?")
+    first = time.perf_counter()
+    main.run_rag_pipeline("Which cardiologists practice in Pune?")
+    second = time.perf_counter()
+heavy = [m for m in ("pdfplumber", "docx", "qdrant_client", "langgraph") if m in sys.modules]
+print(json.dumps({"import_seconds": imported - started, "warmup_seconds": warmed - imported,
+                  "first_query_ms": (first - warmed) * 1000, "second_query_ms": (second - first) * 1000,
+                  "heavy_modules_loaded": heavy}))
+"""
+
+def bench_startup():
+    """Cold import and first-request latency in fresh interpreters, with and without warm-up"""
+    results = {}
+    for mode in ("cold", "warm"):
+        output = subprocess.check_output([sys.executable, "-c", STARTUP_SCRIPT, mode], text=True, env=os.environ.copy())
+        measured = json.loads(output.strip().splitlines()[-1])
+        results[mode] = {k: round(v, 4) if isinstance(v, float) else v for k, v in measured.items()}
+    return results
+
+def bench_queries(pipeline, requests_count, concurrency):
+    error_answer = "I encountered an error while processing your question."
+
+    def timed(question):
+        start = time.perf_counter()
+        answer = pipeline.run_rag_pipeline(question)
+        return time.perf_counter() - start, answer == error_answer
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(requests_count)]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, questions))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds * 1000 for seconds, _ in results]
+    return {
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, failed in results if failed),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 3) if latencies else None,
+        "throughput_qps": round(requests_count / elapsed, 2) if elapsed else None,
+    }
+
+def compare(current, previous):
+    """Print relative changes between two result files"""
+    print(f"\nComparison against {previous.get('commit') or 'previous run'}:")
+    for path, higher_is_better in [
+        ("ingestion.chunks_per_sec", True),
+        ("query.p50_ms", False),
+        ("query.p95_ms", False),
+        ("query.p99_ms", False),
+        ("query.throughput_qps", True),
+        ("startup.cold.import_seconds", False),
+        ("startup.cold.first_query_ms", False),
+        ("startup.warm.first_query_ms", False),
+    ]:
+        old, new = _lookup(previous, path), _lookup(current, path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = (change > 0) == higher_is_better
+        print(f"  {path}: {old} -> {new} ({change:+.1f}%{'' if abs(change) < 1 else ' better' if better else ' worse'})")
+
+def _lookup(results, path):
+    for key in path.split("."):
+        if not isinstance(results, dict):
+            return None
+        results = results.get(key)
+    return results
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and querying against local fake servers")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--words-per-file", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embed-latency", type=float, default=0.005, help="Seconds added to each embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds added to each chat completion")
+    parser.add_argument("--output", default=None, help="Write JSON results to this path")
+    parser.add_argument("--compare", default=None, help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    servers = FakeServers(embed_latency=args.embed_latency, llm_latency=args.llm_latency)
+    os.environ.update(servers.env())
+    # Keep the dedup index, ingestion journal and text cache of each run separate from the ones used for real ingestion
+    dedup_folder = tempfile.TemporaryDirectory()
+    os.environ["DEDUP_DB_PATH"] = os.path.join(dedup_folder.name, "dedup_index.sqlite3")
+    os.environ["INGEST_JOURNAL_PATH"] = os.path.join(dedup_folder.name, "ingest_journal.sqlite3")
+    os.environ["TEXT_CACHE_PATH"] = os.path.join(dedup_folder.name, "text_cache.sqlite3")
+    os.environ["QUERY_LOG_PATH"] = os.path.join(dedup_folder.name, "query_log.sqlite3")
+    # The benchmark repeats a few questions; measure the pipeline, not the answer cache
+    os.environ.setdefault("QUERY_CACHE", "0")
+    os.environ.setdefault("QUERY_PREWARM", "0")
+
+    # The pipeline reads its configuration at import time, so import it only after the env points at the fakes
+    from utils import pipeline
+
+    try:
+        results = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "params": vars(args),
+            "ingestion": bench_ingestion(pipeline, servers, args.files, args.words_per_file),
+            "query": bench_queries(pipeline, args.requests, args.concurrency),
+            "startup": bench_startup(),
+        }
+    finally:
+        servers.stop()
+        dedup_folder.cleanup()
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main_cli()
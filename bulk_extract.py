@@ -0,0 +1,27 @@
+# bulk_extract.py
+# Overnight doctor-profile extraction over the whole collection
+import argparse
+
+from utils.profile_extractor import run_bulk_extraction
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract structured doctor profiles from every document in the collection")
+    parser.add_argument("output", help="Output .jsonl file, or a directory of part files for parquet")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--by", choices=["content_id", "source"], default="content_id",
+                        help="Payload field that identifies one document")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum LLM calls in flight")
+    parser.add_argument("--max-retries", type=int, default=2, help="Re-prompts allowed for a malformed reply")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many pending documents")
+    parser.add_argument("--collection", default=None, help="Defaults to every shard of COLLECTION_NAME")
+    args = parser.parse_args()
+
+    run_bulk_extraction(
+        args.output,
+        output_format=args.format,
+        group_by=args.by,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        limit=args.limit,
+        collection_name=args.collection
+    )
@@ -0,0 +1,33 @@
+# reindex.py
+# Re-embed the whole collection with EMBEDDING_MODEL and switch queries over without downtime
+import argparse
+import json
+
+from utils.reindex import reindex
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed every stored chunk into a new collection and repoint the COLLECTION_NAME alias")
+    parser.add_argument("--target", default=None, help="Name of the new collection (default: derived from the model and time)")
+    parser.add_argument("--workers", type=int, default=None, help="Pages embedded in parallel")
+    parser.add_argument("--scrollers", type=int, default=None, help="Slices of the collection scrolled in parallel")
+    parser.add_argument("--page-size", type=int, default=None, help="Points per scroll page")
+    parser.add_argument("--embed-batch", type=int, default=None, help="Texts per embedding request")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or fill the embedding cache")
+    parser.add_argument("--no-switch", action="store_true", help="Build the new collection but leave the alias alone")
+    parser.add_argument("--replace-collection", action="store_true",
+                        help="Allow deleting COLLECTION_NAME when it is a plain collection rather than an alias")
+    parser.add_argument("--drop-old", action="store_true", help="Delete the previous collections after switching")
+    args = parser.parse_args()
+
+    summary = reindex(
+        target=args.target,
+        workers=args.workers,
+        page_size=args.page_size,
+        embed_batch=args.embed_batch,
+        use_cache=not args.no_cache,
+        switch=not args.no_switch,
+        replace_collection=args.replace_collection,
+        drop_old=args.drop_old,
+        scrollers=args.scrollers
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,30 @@
+# snapshot.py
+# Export a collection to a compact snapshot directory, or bootstrap a collection from one
+import argparse
+import json
+
+from utils.snapshot import export_snapshot, import_snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a collection snapshot (.npy vector blocks + columnar payloads)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream a collection into a snapshot directory")
+    export_parser.add_argument("path", help="Snapshot directory to create")
+    export_parser.add_argument("--collection", default=None, help="Defaults to COLLECTION_NAME")
+    export_parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                               help="float16 halves the size at a small cost in score precision")
+    export_parser.add_argument("--block-points", type=int, default=None, help="Points per block file")
+
+    import_parser = commands.add_parser("import", help="Create a collection and bulk-load a snapshot into it")
+    import_parser.add_argument("path", help="Snapshot directory")
+    import_parser.add_argument("--collection", default=None, help="Defaults to COLLECTION_NAME")
+    import_parser.add_argument("--parallel", type=int, default=None, help="Uploads in flight (default UPLOAD_PARALLEL)")
+    import_parser.add_argument("--batch-size", type=int, default=None, help="Points per upload request")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_snapshot(args.path, collection_name=args.collection, dtype=args.dtype, block_points=args.block_points)
+        print(json.dumps({key: manifest[key] for key in ("collection", "count", "dim", "dtype")}, indent=2))
+    else:
+        import_snapshot(args.path, collection_name=args.collection, parallel=args.parallel, batch_size=args.batch_size)
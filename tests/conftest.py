@@ -0,0 +1,6 @@
+# tests/conftest.py
+# Lets the tests import the repo's modules (utils.*) however pytest is started
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
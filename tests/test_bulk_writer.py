@@ -0,0 +1,44 @@
+# tests/test_bulk_writer.py
+import threading
+
+import pytest
+
+from utils import bulk_writer
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def upsert(self, collection_name, points, wait):
+        with self.lock:
+            self.calls.append((len(points), wait))
+
+@pytest.fixture
+def client(monkeypatch):
+    client = RecordingClient()
+    monkeypatch.setattr(bulk_writer, "get_client", lambda prefer_grpc=None: client)
+    monkeypatch.setattr(bulk_writer, "to_point_structs", lambda points: points)
+    monkeypatch.setattr(bulk_writer, "_ordered", {})
+    return client
+
+def collection_with_shards(monkeypatch, shards):
+    info = {"config": {"params": {"shard_number": shards}}} if shards else None
+    monkeypatch.setattr(bulk_writer, "get_collection_info", lambda name: info)
+
+def write_points(count):
+    with bulk_writer.BulkWriter("c", batch_size=10, parallel=2) as writer:
+        writer.write([{"id": i} for i in range(count)])
+    return writer.written
+
+def test_single_shard_waits_only_on_the_last_batch(client, monkeypatch):
+    collection_with_shards(monkeypatch, 1)
+    assert write_points(35) == 35
+    assert sorted(client.calls) == [(5, True), (10, False), (10, False), (10, False)]
+
+@pytest.mark.parametrize("shards", [4, None])
+def test_multi_shard_or_unknown_collections_wait_on_every_batch(client, monkeypatch, shards):
+    collection_with_shards(monkeypatch, shards)
+    assert write_points(35) == 35
+    assert all(wait for _, wait in client.calls)
+    assert sum(count for count, _ in client.calls) == 35
@@ -0,0 +1,44 @@
+# tests/test_deadline.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import deadline as deadline_module
+from utils.deadline import Deadline, hedged
+from utils.rate_limiter import DeadlineExceeded
+
+def test_fast_call_is_not_hedged():
+    calls = []
+    assert hedged(lambda: calls.append(1) or "ok", 1.0, "test") == "ok"
+    assert calls == [1]
+
+def test_hedge_wins_when_primary_is_slow():
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(1.0 if first else 0.01)
+        return "slow" if first else "fast"
+
+    started = time.monotonic()
+    assert hedged(fn, 0.02, "test") == "fast"
+    assert time.monotonic() - started < 0.5
+
+def test_deadline_is_enforced():
+    with pytest.raises(DeadlineExceeded):
+        hedged(lambda: time.sleep(1.0), 0.01, "test", deadline=Deadline(0.1))
+
+def test_primaries_do_not_queue_behind_other_queries():
+    # Many more concurrent queries than hedge workers: every primary still starts at once
+    queries = deadline_module.HEDGE_WORKERS * 4
+    with ThreadPoolExecutor(max_workers=queries) as pool:
+        started = time.monotonic()
+        results = list(pool.map(lambda i: hedged(lambda: time.sleep(0.2) or i, 0.01, "test"), range(queries)))
+        elapsed = time.monotonic() - started
+    assert results == list(range(queries))
+    assert elapsed < 0.6
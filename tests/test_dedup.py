@@ -0,0 +1,87 @@
+# tests/test_dedup.py
+import os
+import sqlite3
+
+import pytest
+
+from utils import dedup
+from utils.dedup import DedupIndex, find_duplicates, fingerprint, bands
+
+PROFILE = ("Dr. {name} is a consultant cardiologist at City Care Hospital in {city}, Maharashtra. "
+           "Phone: {phone}. The doctor completed MBBS and MD from a reputed medical college and has "
+           "over 15 years of experience treating patients. Services include consultation, diagnosis, "
+           "preventive care, follow-up visits, second opinions and emergency care. Clinic timings are "
+           "Monday to Saturday, 10 AM to 7 PM. Appointments can be booked online or by phone.")
+
+def profile(name, city, phone):
+    return PROFILE.format(name=name, city=city, phone=phone)
+
+def band_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM bands").fetchone()[0]
+    finally:
+        conn.close()
+
+@pytest.mark.skipif(os.getenv("DEDUP_NEAR") == "1", reason="near duplicates enabled in the environment")
+def test_near_duplicates_are_opt_in():
+    assert not dedup.DEDUP_NEAR
+    assert dedup.DEDUP_THRESHOLD == 1.0
+
+def test_exact_repeats_are_found_in_the_index_and_the_batch(tmp_path):
+    index = DedupIndex("c", path=str(tmp_path / "d.sqlite3"))
+    text = profile("Anil Sharma", "Pune", "+91 98220 11111")
+    index.add([("p1", fingerprint(text))])
+    _, canonical, exact = find_duplicates(index, [text.upper(), "something new entirely", "Something new, entirely!"],
+                                          ["p2", "p3", "p4"])
+    assert canonical == ["p1", None, "p3"]
+    assert exact == [True, False, True]
+
+def test_templated_profiles_are_kept_by_default(tmp_path):
+    index = DedupIndex("c", path=str(tmp_path / "d.sqlite3"), threshold=1.0)
+    first = profile("Anil Sharma", "Pune", "+91 98220 11111")
+    second = profile("Priya Deshpande", "Nagpur", "+91 98220 22222")
+    index.add([("p1", fingerprint(first))])
+    _, canonical, _ = find_duplicates(index, [second], ["p2"])
+    assert canonical == [None]
+
+def test_near_duplicates_when_enabled(tmp_path):
+    index = DedupIndex("c", path=str(tmp_path / "d.sqlite3"), threshold=0.8)
+    words = [f"w{i}" for i in range(300)]
+    changed = list(words)
+    changed[150] = "different"
+    index.add([("p1", fingerprint(" ".join(words)))])
+    _, canonical, exact = find_duplicates(index, [" ".join(changed)], ["p2"])
+    assert canonical == ["p1"]
+    assert exact == [False]
+
+def test_stale_hits_are_dropped(tmp_path):
+    index = DedupIndex("c", path=str(tmp_path / "d.sqlite3"))
+    index.add([("gone", fingerprint("repeated snippet"))])
+    _, canonical, _ = find_duplicates(index, ["repeated snippet"], ["p2"], existing_ids=lambda ids: set())
+    assert canonical == [None]
+    assert index.lookup(fingerprint("repeated snippet")) is None
+
+def test_re_adding_points_does_not_duplicate_band_rows(tmp_path):
+    path = str(tmp_path / "d.sqlite3")
+    index = DedupIndex("c", path=path)
+    entries = [("p1", fingerprint("first chunk text")), ("p2", fingerprint("second chunk text"))]
+    for _ in range(3):
+        index.add(entries)
+    assert band_rows(path) == 2 * len(bands(entries[0][1].signature))
+
+    # Re-ingesting a point with new text replaces its bands
+    index.add([("p1", fingerprint("first chunk, rewritten"))])
+    assert band_rows(path) == 2 * len(bands(entries[0][1].signature))
+    index.close()
+
+def test_existing_duplicate_band_rows_are_cleaned_up(tmp_path):
+    path = str(tmp_path / "d.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE bands (collection TEXT, band INTEGER, key INTEGER, point_id TEXT)")
+    conn.execute("CREATE INDEX bands_lookup ON bands (collection, band, key)")
+    conn.executemany("INSERT INTO bands VALUES (?, ?, ?, ?)", [("c", 0, 7, "p1")] * 3 + [("c", 1, 8, "p1")])
+    conn.commit()
+    conn.close()
+    DedupIndex("c", path=path).close()
+    assert band_rows(path) == 2
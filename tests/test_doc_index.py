@@ -0,0 +1,81 @@
+# tests/test_doc_index.py
+import numpy as np
+import pytest
+
+from utils import doc_index, retriever
+from utils.point_batch import ChunkRecord, PointBatch
+
+def batch(rows):
+    """rows: [(source, content_id, vector)]"""
+    records = [ChunkRecord(f"id-{i}", "", source, content_id, i, i) for i, (source, content_id, _) in enumerate(rows)]
+    return PointBatch(records, np.array([vector for _, _, vector in rows], dtype=np.float32))
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float64)
+    return vector / np.linalg.norm(vector)
+
+def test_centroid_is_normalised_mean_per_source_across_batches():
+    accumulator = doc_index.CentroidAccumulator("source")
+    accumulator.add(batch([("a.txt", "a1", [3.0, 0.0, 0.0]), ("b.txt", "b1", [0.0, 2.0, 0.0])]))
+    accumulator.add(PointBatch.empty(3))
+    accumulator.add(batch([("a.txt", "a2", [0.0, 0.0, 0.5]), ("a.txt", "a3", [0.0, 4.0, 4.0])]))
+
+    points = {point["payload"]["source"]: point for point in accumulator.pop()}
+    expected = unit(unit([3, 0, 0]) + unit([0, 0, 0.5]) + unit([0, 4, 4]))
+    assert np.allclose(points["a.txt"]["vector"], expected, atol=1e-6)
+    assert np.allclose(points["b.txt"]["vector"], [0.0, 1.0, 0.0])
+    assert points["a.txt"]["payload"] == {"source": "a.txt", "chunks": 3}
+    assert points["a.txt"]["id"] == doc_index.doc_point_id("a.txt")
+    assert accumulator.pop() == []
+
+def test_content_id_level_keeps_the_current_item():
+    accumulator = doc_index.CentroidAccumulator("content_id")
+    accumulator.add(batch([("f.json", "item1", [1.0, 0.0]), ("f.json", "item2", [0.0, 1.0])]))
+
+    flushed = accumulator.pop(keep="item2")
+    assert [point["payload"] for point in flushed] == [{"content_id": "item1", "source": "f.json", "chunks": 1}]
+    accumulator.add(batch([("f.json", "item2", [0.0, 3.0])]))
+    [last] = accumulator.pop()
+    assert last["payload"]["chunks"] == 2 and np.allclose(last["vector"], [0.0, 1.0])
+
+@pytest.fixture
+def fake_qdrant(monkeypatch):
+    """Route searches to an in-memory doc collection and chunk collection"""
+    monkeypatch.setattr(retriever, "SHARD_COUNT", 1)
+    monkeypatch.setattr(retriever, "LOCAL_SNAPSHOT_PATH", None)
+    monkeypatch.setattr(doc_index, "HIERARCHICAL_LEVEL", "source")
+    state = {"docs": [], "chunks": [], "requests": []}
+
+    def search_collection(collection_name, payload, deadline=None):
+        state["requests"].append((collection_name, payload))
+        if collection_name == doc_index.DOC_COLLECTION_NAME:
+            return state["docs"][:payload["top"]]
+        hits = state["chunks"]
+        for condition in (payload.get("filter") or {}).get("must", []):
+            hits = [hit for hit in hits if hit["payload"][condition["key"]] in condition["match"]["any"]]
+        return sorted(hits, key=lambda hit: hit["score"], reverse=True)[:payload["top"]]
+
+    monkeypatch.setattr(retriever, "_search_collection", search_collection)
+    return state
+
+def test_second_stage_only_searches_chunks_of_top_documents(fake_qdrant):
+    fake_qdrant["docs"] = [{"score": 0.9, "payload": {"source": "a.txt"}},
+                           {"score": 0.8, "payload": {"source": "b.txt"}},
+                           {"score": 0.1, "payload": {"source": "c.txt"}}]
+    fake_qdrant["chunks"] = [{"score": score, "payload": {"source": source}}
+                             for source, score in [("c.txt", 0.99), ("a.txt", 0.7), ("b.txt", 0.6),
+                                                   ("c.txt", 0.95), ("a.txt", 0.5)]]
+
+    hits = retriever.search_hierarchical([0.1, 0.2], top_k=3, top_docs=2)
+
+    assert [(hit["payload"]["source"], hit["score"]) for hit in hits] == [("a.txt", 0.7), ("b.txt", 0.6), ("a.txt", 0.5)]
+    (doc_name, doc_payload), (chunk_name, chunk_payload) = fake_qdrant["requests"]
+    assert (doc_name, doc_payload["top"]) == (doc_index.DOC_COLLECTION_NAME, 2)
+    assert chunk_name == retriever.COLLECTION_NAME
+    assert chunk_payload["filter"] == {"must": [{"key": "source", "match": {"any": ["a.txt", "b.txt"]}}]}
+
+def test_falls_back_to_flat_search_without_documents(fake_qdrant):
+    fake_qdrant["chunks"] = [{"score": 0.4, "payload": {"source": "a.txt"}}]
+
+    assert retriever.search_hierarchical([0.1, 0.2], top_k=3) == fake_qdrant["chunks"]
+    assert "filter" not in fake_qdrant["requests"][-1][1]
@@ -0,0 +1,28 @@
+# tests/test_groq_llm.py
+import pytest
+import requests
+
+from utils import groq_llm
+from utils.rate_limiter import RateLimitError
+
+def reply_with(result):
+    def chat_completion(messages, **kwargs):
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return chat_completion
+
+def test_not_in_context_reply_becomes_the_fallback(monkeypatch):
+    monkeypatch.setattr(groq_llm, "chat_completion", reply_with('"I cannot answer such questions."'))
+    assert groq_llm.ask_llama3("context", "question") == groq_llm.FALLBACK_ANSWER
+
+@pytest.mark.parametrize("error", [
+    requests.HTTPError("401 Unauthorized"),
+    requests.HTTPError("500 Server Error"),
+    KeyError("choices"),
+    RateLimitError("throttled"),
+])
+def test_failures_are_not_disguised_as_answers(monkeypatch, error):
+    monkeypatch.setattr(groq_llm, "chat_completion", reply_with(error))
+    with pytest.raises(type(error)):
+        groq_llm.ask_llama3("context", "question")
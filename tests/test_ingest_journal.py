@@ -0,0 +1,121 @@
+# tests/test_ingest_journal.py
+import numpy as np
+import pytest
+
+from utils import pipeline
+from utils.ingest_journal import IngestJournal, file_fingerprint
+from utils.point_batch import ChunkRecord, PointBatch
+
+DIM = 4
+
+def batch(start, size, source="a.json"):
+    records = [ChunkRecord(f"id-{i}", f"chunk {i}", source, "c1", i, i, {"json_position": [i // 2]})
+               for i in range(start, start + size)]
+    vectors = np.arange(start * DIM, (start + size) * DIM, dtype=np.float32).reshape(size, DIM)
+    return PointBatch(records, vectors)
+
+def cursor(next_chunk, item_position=None, item_chunks=0):
+    return {"next_chunk": next_chunk, "item_position": item_position, "item_chunks": item_chunks}
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = IngestJournal("docs", path=str(tmp_path / "journal.sqlite3"))
+    yield journal
+    journal.close()
+
+def test_unknown_file_has_no_state(journal):
+    assert journal.state("a.json") is None
+
+def test_begin_starts_fresh(journal):
+    state, stale = journal.begin("a.json", "10:1")
+    assert not stale
+    assert state.status == "in_progress"
+    assert (state.next_chunk, state.batches, state.stored) == (0, 0, 0)
+
+def test_record_batch_advances_cursor(journal):
+    journal.begin("a.json", "10:1")
+    journal.record_batch("a.json", batch(0, 3), [], cursor(3, [1], 1))
+    journal.record_batch("a.json", batch(3, 2), [("id-0", {"source": "b.json"})], cursor(5, [2], 1))
+    state = journal.state("a.json")
+    assert (state.next_chunk, state.item_position, state.item_chunks, state.batches) == (5, [2], 1, 2)
+
+def test_pending_replays_unconfirmed_batches(journal):
+    journal.begin("a.json", "10:1")
+    first, second = batch(0, 3), batch(3, 2)
+    journal.record_batch("a.json", first, [], cursor(3))
+    journal.record_batch("a.json", second, [("id-0", {"source": "b.json"})], cursor(5))
+    pending = list(journal.pending("a.json", DIM))
+    assert [points.ids for points, _ in pending] == [first.ids, second.ids]
+    assert np.array_equal(pending[1][0].vectors, second.vectors)
+    assert [r.payload() for r in pending[1][0].records] == [r.payload() for r in second.records]
+    assert pending[1][1] == [("id-0", {"source": "b.json"})]
+
+def test_checkpoint_confirms_batches(journal):
+    journal.begin("a.json", "10:1")
+    journal.record_batch("a.json", batch(0, 3), [], cursor(3))
+    journal.checkpoint("a.json")
+    journal.record_batch("a.json", batch(3, 2), [], cursor(5))
+    assert [points.ids for points, _ in journal.pending("a.json", DIM)] == [batch(3, 2).ids]
+    assert journal.state("a.json").stored == 3
+
+def test_resume_keeps_progress_of_same_file(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = IngestJournal("docs", path=path)
+    journal.begin("a.json", "10:1")
+    journal.record_batch("a.json", batch(0, 3), [], cursor(3, [1], 1))
+    journal.close()
+
+    # A new process picks up where the interrupted one stopped
+    journal = IngestJournal("docs", path=path)
+    try:
+        state, stale = journal.begin("a.json", "10:1")
+        assert not stale
+        assert (state.next_chunk, state.item_position, state.item_chunks) == (3, [1], 1)
+        assert len(list(journal.pending("a.json", DIM))) == 1
+    finally:
+        journal.close()
+
+def test_changed_file_starts_over(journal):
+    journal.begin("a.json", "10:1")
+    journal.record_batch("a.json", batch(0, 3), [], cursor(3))
+    state, stale = journal.begin("a.json", "12:2")
+    assert stale
+    assert (state.next_chunk, state.batches) == (0, 0)
+    assert list(journal.pending("a.json", DIM)) == []
+
+def test_finished_file_starts_over_when_ingested_again(journal):
+    journal.begin("a.json", "10:1")
+    journal.record_batch("a.json", batch(0, 3), [], cursor(3))
+    journal.finish("a.json")
+    state = journal.state("a.json")
+    assert (state.status, state.stored) == ("done", 3)
+    assert list(journal.pending("a.json", DIM)) == []
+    _, stale = journal.begin("a.json", "10:1")
+    assert stale
+
+def test_collections_are_separate(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    docs, other = IngestJournal("docs", path=path), IngestJournal("other", path=path)
+    try:
+        docs.begin("a.json", "10:1")
+        assert other.state("a.json") is None
+    finally:
+        docs.close()
+        other.close()
+
+def test_should_ingest_resumes_unfinished_files(journal, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_journal", lambda: journal)
+    journal.begin("a.json", "10:1")
+    assert pipeline.should_ingest("a.json", lambda: True)
+    journal.finish("a.json")
+    assert not pipeline.should_ingest("a.json", lambda: True)
+    # Finished, but its points are gone
+    assert pipeline.should_ingest("a.json", lambda: False)
+    assert pipeline.should_ingest("new.json", lambda: False)
+
+def test_file_fingerprint_changes_with_content(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one")
+    before = file_fingerprint(str(path))
+    path.write_text("one two")
+    assert file_fingerprint(str(path)) != before
@@ -0,0 +1,86 @@
+# tests/test_jobs.py
+import threading
+
+import pytest
+
+from utils.jobs import IngestionJobQueue
+
+def wait_for(job, timeout=5):
+    done = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if job.status not in ("queued", "running"):
+            return job
+        done.wait(0.01)
+    raise AssertionError(f"job still {job.status}")
+
+def test_job_moves_from_queued_to_completed_with_progress():
+    started, release = threading.Event(), threading.Event()
+    statuses = []
+
+    def handler(files, progress):
+        started.set()
+        release.wait(5)
+        progress("chunked", 10)
+        progress("embedded", 8)
+        progress("deduplicated", 2)
+        progress("upserted", 8)
+        progress("file_done")
+
+    queue = IngestionJobQueue(handler, workers=1)
+    blocker = queue.submit(["a.txt"])
+    job = queue.submit(["b.txt"])
+    started.wait(5)
+    statuses.append((blocker.status, job.status))
+    release.set()
+    wait_for(blocker)
+    wait_for(job)
+
+    assert statuses == [("running", "queued")]
+    state = job.to_dict()
+    assert state["status"] == "completed"
+    assert (state["chunks_total"], state["chunks_embedded"], state["chunks_deduplicated"],
+            state["chunks_upserted"], state["files_done"]) == (10, 8, 2, 8, 1)
+    assert state["started_at"] <= state["finished_at"]
+
+def test_file_failures_complete_with_errors():
+    queue = IngestionJobQueue(lambda files, progress: progress("file_failed", "b.txt: bad encoding"))
+    job = wait_for(queue.submit(["b.txt"]))
+    assert job.status == "completed_with_errors"
+    assert job.to_dict()["errors"] == ["b.txt: bad encoding"]
+
+def test_handler_exception_fails_the_job():
+    def handler(files, progress):
+        raise RuntimeError("Qdrant is down")
+
+    queue = IngestionJobQueue(handler)
+    job = wait_for(queue.submit(["a.txt"]))
+    assert job.status == "failed"
+    assert job.to_dict()["errors"] == ["Qdrant is down"]
+
+def test_only_the_latest_jobs_are_kept():
+    queue = IngestionJobQueue(lambda files, progress: None, max_jobs=3)
+    jobs = [queue.submit([f"{i}.txt"]) for i in range(5)]
+    for job in jobs:
+        wait_for(job)
+    assert queue.get(jobs[0].id) is None and queue.get(jobs[1].id) is None
+    assert [job.id for job in queue.recent()] == [job.id for job in jobs[:1:-1]]
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("flask")
+    monkeypatch.setenv("WARMUP_ON_START", "0")
+    from utils import prewarm
+    monkeypatch.setattr(prewarm, "QUERY_PREWARM", False)
+    import app
+    return app
+
+def test_failed_job_error_reaches_the_status_route(client, monkeypatch):
+    def handler(files, progress):
+        raise RuntimeError("Qdrant is down")
+
+    monkeypatch.setattr(client, "ingestion_jobs", IngestionJobQueue(handler))
+    job = wait_for(client.ingestion_jobs.submit(["a.txt"]))
+    response = client.app.test_client().get(f"/jobs/{job.id}")
+    assert response.status_code == 200
+    assert (response.json["status"], response.json["errors"]) == ("failed", ["Qdrant is down"])
+    assert client.app.test_client().get("/jobs/unknown").status_code == 404
@@ -0,0 +1,108 @@
+# tests/test_json_stream.py
+import json
+import random
+
+import pytest
+
+from utils.json_stream import iter_web_search_contents
+
+def expected_contents(doc):
+    """What a plain json.load walk of webSearchResults yields"""
+    results = doc.get("webSearchResults") if isinstance(doc, dict) else None
+    contents = []
+    for entry in results if isinstance(results, list) else []:
+        for item in entry if isinstance(entry, list) else []:
+            content = item.get("content") if isinstance(item, dict) else None
+            if isinstance(content, str) and content.replace("\n", " ").strip():
+                contents.append(content.replace("\n", " ").strip())
+    return contents
+
+def random_text(rng):
+    alphabet = ['a', 'Z', ' ', '\n', '"', '\\', '{', '}', '[', ']', ',', ':', 'é', '日本', ' ', '\t', '/']
+    return "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 40)))
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(7 if depth < 3 else 4)
+    if kind == 0:
+        return random_text(rng)
+    if kind == 1:
+        return rng.choice([0, -12, 3.5e-7, 1e20])
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind == 3:
+        return ""
+    if kind == 4:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {random_text(rng): random_value(rng, depth + 1) for _ in range(rng.randrange(4))}
+
+def random_doc(rng):
+    entries = []
+    for _ in range(rng.randrange(1, 6)):
+        if rng.random() < 0.15:
+            entries.append(random_value(rng))  # Not a result list
+            continue
+        items = []
+        for _ in range(rng.randrange(1, 7)):
+            if rng.random() < 0.15:
+                items.append(random_value(rng))  # Not a result object
+                continue
+            item = {"title": random_text(rng), "meta": random_value(rng)}
+            if rng.random() < 0.85:
+                item["content"] = random_text(rng) if rng.random() < 0.9 else random_value(rng)
+            items.append(item)
+        entries.append(items)
+    doc = {"before": random_value(rng), "webSearchResults": entries, "after": random_value(rng)}
+    if rng.random() < 0.05:
+        del doc["webSearchResults"]
+    return doc
+
+def dump(doc, rng):
+    style = rng.randrange(3)
+    if style == 0:
+        return json.dumps(doc)
+    if style == 1:
+        return json.dumps(doc, indent=rng.choice([1, 4]), ensure_ascii=False)
+    return json.dumps(doc, separators=(",", ":"), ensure_ascii=False)
+
+def write(tmp_path, text, name="results.json"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("seed", range(60))
+def test_matches_json_load(tmp_path, seed):
+    rng = random.Random(seed)
+    doc = random_doc(rng)
+    path = write(tmp_path, dump(doc, rng))
+    read_size = rng.choice([1, 3, 16, 1 << 20])
+    found = list(iter_web_search_contents(path, read_size=read_size))
+    assert [content for content, _ in found] == expected_contents(doc)
+    assert [position["index"] for _, position in found] == list(range(len(found)))
+
+@pytest.mark.parametrize("seed", range(15))
+def test_resume_from_every_position(tmp_path, seed):
+    rng = random.Random(1000 + seed)
+    doc = random_doc(rng)
+    path = write(tmp_path, dump(doc, rng))
+    found = list(iter_web_search_contents(path, read_size=8))
+    for k, (_, position) in enumerate(found):
+        after = list(iter_web_search_contents(path, resume=position, read_size=8))
+        assert after == found[k + 1:]
+        again = list(iter_web_search_contents(path, resume=position, inclusive=True, read_size=8))
+        assert again == found[k:]
+
+@pytest.mark.parametrize("text", [
+    "{}",
+    '{"webSearchResults": []}',
+    '{"webSearchResults": [[], []]}',
+    '{"webSearchResults": [[{"content": "   "}, {"content": null}]]}',
+    "[1, 2, 3]",
+])
+def test_documents_without_content(tmp_path, text):
+    assert list(iter_web_search_contents(write(tmp_path, text))) == []
+
+def test_truncated_file_raises(tmp_path):
+    text = json.dumps({"webSearchResults": [[{"content": "one"}, {"content": "two"}]]})
+    path = write(tmp_path, text[:-12])
+    with pytest.raises(ValueError):
+        list(iter_web_search_contents(path))
@@ -0,0 +1,87 @@
+# tests/test_metrics.py
+import pytest
+
+from utils import metrics
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    return registry
+
+def test_counter_and_gauge_render_with_escaped_labels(registry):
+    counter = metrics.Counter("test_requests_total", "Requests", ["path"])
+    gauge = metrics.Gauge("test_in_flight", "In flight")
+    counter.inc(path='say "hi"\\now\nthen')
+    counter.inc(2, path='say "hi"\\now\nthen')
+    gauge.inc()
+    gauge.inc(3)
+    gauge.dec()
+
+    assert registry.render() == (
+        "# HELP test_requests_total Requests\n"
+        "# TYPE test_requests_total counter\n"
+        'test_requests_total{path="say \\"hi\\"\\\\now\\nthen"} 3\n'
+        "# HELP test_in_flight In flight\n"
+        "# TYPE test_in_flight gauge\n"
+        "test_in_flight 3\n"
+    )
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = metrics.Histogram("test_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, stage="embed")
+    histogram.observe(0.2, stage="search")
+
+    lines = registry.render().splitlines()
+    assert lines[:7] == [
+        "# HELP test_seconds Latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="embed",le="0.1"} 2',
+        'test_seconds_bucket{stage="embed",le="1.0"} 3',
+        'test_seconds_bucket{stage="embed",le="+Inf"} 4',
+        'test_seconds_sum{stage="embed"} 2.65',
+        'test_seconds_count{stage="embed"} 4',
+    ]
+    assert 'test_seconds_bucket{stage="search",le="0.1"} 0' in lines
+    assert 'test_seconds_count{stage="search"} 1' in lines
+    assert histogram.totals() == {("embed",): (2.65, 4), ("search",): (0.2, 1)}
+
+def test_timed_records_latency_and_errors(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "STAGE_SECONDS", metrics.Histogram("s", "", ["stage"]))
+    monkeypatch.setattr(metrics, "STAGE_IN_FLIGHT", metrics.Gauge("f", "", ["stage"]))
+    monkeypatch.setattr(metrics, "STAGE_ERRORS", metrics.Counter("e", "", ["stage"]))
+    seen = []
+
+    @metrics.timed("embed")
+    def embed(fail):
+        seen.append(metrics.STAGE_IN_FLIGHT.values[("embed",)])
+        if fail:
+            raise ValueError("boom")
+        return "vector"
+
+    assert embed.__name__ == "embed"
+    assert embed(False) == "vector"
+    with pytest.raises(ValueError):
+        embed(True)
+
+    assert seen == [1, 1]
+    assert metrics.STAGE_IN_FLIGHT.values[("embed",)] == 0
+    assert metrics.STAGE_ERRORS.values == {("embed",): 1}
+    assert metrics.STAGE_SECONDS.totals()[("embed",)][1] == 2
+
+def test_stage_timer_records_latency_and_errors(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "STAGE_SECONDS", metrics.Histogram("s", "", ["stage"]))
+    monkeypatch.setattr(metrics, "STAGE_IN_FLIGHT", metrics.Gauge("f", "", ["stage"]))
+    monkeypatch.setattr(metrics, "STAGE_ERRORS", metrics.Counter("e", "", ["stage"]))
+
+    with metrics.stage_timer("search"):
+        assert metrics.STAGE_IN_FLIGHT.values[("search",)] == 1
+    with pytest.raises(RuntimeError):
+        with metrics.stage_timer("search"):
+            raise RuntimeError("down")
+
+    assert metrics.STAGE_IN_FLIGHT.values[("search",)] == 0
+    assert metrics.STAGE_ERRORS.values == {("search",): 1}
+    total, count = metrics.STAGE_SECONDS.totals()[("search",)]
+    assert count == 2 and total >= 0
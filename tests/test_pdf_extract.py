@@ -0,0 +1,56 @@
+# tests/test_pdf_extract.py
+import pytest
+
+pytest.importorskip("pypdfium2")
+pytest.importorskip("pdfplumber")
+
+from benchmarks.bench_pdf import write_synthetic_pdf
+from utils import pdf_extract
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "synthetic.pdf"
+    write_synthetic_pdf(str(path), pages=20, lines_per_page=3, words_per_line=10)
+    return str(path)
+
+def test_chunk_pages_tracks_pages_across_boundaries():
+    pages = [(1, "a " * 4), (2, ""), (3, "b " * 3), (4, "c " * 5)]
+    chunks = list(pdf_extract.chunk_pages(pages, chunk_size=5))
+    assert [(first, last) for _, first, last in chunks] == [(1, 3), (3, 4), (4, 4)]
+    assert [len(chunk.split()) for chunk, _, _ in chunks] == [5, 5, 2]
+    assert chunks[0][0] == "a a a a b"
+
+def test_chunk_pages_handles_exact_page_fits():
+    pages = [(1, "x y"), (2, "z w")]
+    assert list(pdf_extract.chunk_pages(pages, chunk_size=2)) == [("x y", 1, 1), ("z w", 2, 2)]
+    assert list(pdf_extract.chunk_pages([], chunk_size=2)) == []
+
+def test_iter_pdf_pages_yields_every_page_in_order(pdf_path):
+    pages = list(pdf_extract.iter_pdf_pages(pdf_path, mode="fast", workers=1))
+    assert [number for number, _ in pages] == list(range(1, 21))
+    assert all(len(text.split()) == 30 for _, text in pages)
+
+def test_failed_fast_range_falls_back_to_layout(pdf_path, monkeypatch):
+    fast = pdf_extract._extract_range_fast
+    failed = []
+
+    def flaky_fast(file_path, start, end):
+        if start == pdf_extract.PAGES_PER_TASK:
+            failed.append((start, end))
+            raise RuntimeError("unreadable range")
+        return fast(file_path, start, end)
+
+    monkeypatch.setattr(pdf_extract, "_extract_range_fast", flaky_fast)
+    pages = list(pdf_extract.iter_pdf_pages(pdf_path, mode="fast", workers=1))
+    layout = pdf_extract._extract_range_layout(pdf_path, 16, 20)
+
+    assert failed == [(16, 20)]
+    assert [number for number, _ in pages] == list(range(1, 21))
+    assert pages[16:] == layout
+    assert pages[0] == fast(pdf_path, 0, 1)[0]
+
+def test_parallel_extraction_matches_serial(pdf_path, monkeypatch):
+    monkeypatch.setattr(pdf_extract, "PAGES_PER_TASK", 4)
+    monkeypatch.setattr(pdf_extract, "PDF_PARALLEL_MIN_PAGES", 8)
+    serial = list(pdf_extract.iter_pdf_pages(pdf_path, mode="fast", workers=1))
+    assert list(pdf_extract.iter_pdf_pages(pdf_path, mode="fast", workers=2)) == serial
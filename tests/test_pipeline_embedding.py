@@ -0,0 +1,45 @@
+# tests/test_pipeline_embedding.py
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from utils import pipeline
+
+class FakeEmbedder:
+    """Embeds each text as [chunk number, 0, 0, 0] and records the size of every request"""
+
+    def __init__(self, size=4):
+        self.size = size
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def embed_many(self, texts, deadline=None):
+        with self.lock:
+            self.requests.append(len(texts))
+        return [[float(text.split()[0][1:])] + [0.0] * (self.size - 1) for text in texts]
+
+@pytest.fixture
+def embedder(monkeypatch):
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(pipeline, "get_backend", lambda kind: embedder)
+    monkeypatch.setattr(pipeline, "VECTOR_SIZE", 4)
+    monkeypatch.setattr(pipeline, "EMBED_BATCH_SIZE", 3)
+    return embedder
+
+def document(chunks):
+    return [" ".join(f"c{i}" for _ in range(300)) for i in range(chunks)]
+
+def test_each_batch_is_embedded_in_sub_batch_requests(embedder):
+    batches = [points for points, _, _, _ in pipeline.iter_point_batches([" ".join(document(7))], "a.txt", batch_size=5)]
+
+    assert [len(points) for points in batches] == [5, 2]
+    assert sorted(embedder.requests) == [2, 2, 3]
+    # Vectors stay in chunk order even though sub-batches run concurrently
+    assert [row[0] for points in batches for row in points.vectors.tolist()] == [0, 1, 2, 3, 4, 5, 6]
+
+def test_wrong_vector_length_is_rejected(embedder, monkeypatch):
+    monkeypatch.setattr(pipeline, "VECTOR_SIZE", 8)
+    with pytest.raises(ValueError, match="Invalid embedding length: 4, expected 8"):
+        list(pipeline.iter_point_batches([" ".join(document(2))], "a.txt", batch_size=5))
@@ -0,0 +1,64 @@
+# tests/test_point_batch.py
+import numpy as np
+import pytest
+
+from utils.point_batch import ChunkRecord, PointBatch
+
+def make_record(i, **extra):
+    return ChunkRecord(f"id-{i}", f"text {i}", "a.txt", f"a.txt_content_{i}", i, 10 + i, extra)
+
+def test_payload_round_trip_keeps_extra_fields():
+    record = make_record(1, page_start=2, page_end=3)
+    payload = record.payload()
+    assert payload == {"text": "text 1", "source": "a.txt", "content_id": "a.txt_content_1",
+                       "chunk_index": 1, "absolute_index": 11, "page_start": 2, "page_end": 3}
+
+    restored = ChunkRecord.from_payload("id-1", payload)
+    assert restored.payload() == payload
+    assert restored.extra == {"page_start": 2, "page_end": 3}
+    assert "text" in payload  # from_payload must not consume the caller's dict
+
+def test_record_without_extra_fields():
+    record = ChunkRecord.from_payload("id-2", make_record(2).payload())
+    assert record.extra is None
+    assert set(record.payload()) == {"text", "source", "content_id", "chunk_index", "absolute_index"}
+
+def test_reference_points_back_at_the_chunk():
+    assert make_record(3, page_start=1).reference() == {
+        "source": "a.txt", "content_id": "a.txt_content_3", "chunk_index": 3}
+
+def test_wire_formats():
+    vectors = np.array([[0.5, 0.25], [1.0, -1.0]], dtype=np.float32)
+    batch = PointBatch([make_record(0), make_record(1)], vectors)
+
+    dicts = batch.to_dicts()
+    assert [point["id"] for point in dicts] == batch.ids == ["id-0", "id-1"]
+    assert dicts[1]["vector"] == [1.0, -1.0]
+    assert isinstance(dicts[0]["vector"][0], float)
+    assert dicts[0]["payload"] == make_record(0).payload()
+
+    pytest.importorskip("qdrant_client")
+    structs = batch.to_point_structs()
+    assert [(s.id, s.vector, s.payload) for s in structs] == [(p["id"], p["vector"], p["payload"]) for p in dicts]
+
+def test_slicing_keeps_records_and_vectors_together():
+    batch = PointBatch([make_record(i) for i in range(4)], np.arange(8, dtype=np.float32).reshape(4, 2))
+    part = batch[1:3]
+    assert len(part) == 2 and part.ids == ["id-1", "id-2"]
+    assert part.vectors.tolist() == [[2.0, 3.0], [4.0, 5.0]]
+    with pytest.raises(TypeError):
+        batch[0]
+
+def test_empty_batch():
+    batch = PointBatch.empty(384)
+    assert len(batch) == 0 and batch.vectors.shape == (0, 384) and batch.vectors.dtype == np.float32
+
+@pytest.mark.parametrize("vectors", [
+    np.zeros((2, 3), dtype=np.float32),     # length mismatch
+    np.zeros((1, 3), dtype=np.float64),     # wrong dtype
+    np.zeros(3, dtype=np.float32)[:1],      # 1-D
+    [[0.0, 0.0, 0.0]],                      # plain list
+])
+def test_invalid_vectors_raise(vectors):
+    with pytest.raises(ValueError):
+        PointBatch([make_record(0)], vectors)
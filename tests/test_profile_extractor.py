@@ -0,0 +1,133 @@
+# tests/test_profile_extractor.py
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import profile_extractor
+from utils.profile_extractor import NOT_FOUND_MESSAGE, PROFILE_FIELDS, extract_profile, parse_profile, run_bulk_extraction
+
+def reply(**fields):
+    return json.dumps({field: fields.get(field, "") for field in PROFILE_FIELDS})
+
+class ScriptedLLM:
+    """Stands in for chat_completion: returns scripted replies, or replies from a function of the prompt"""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+
+    def __call__(self, messages, **kwargs):
+        self.calls.append(messages)
+        if callable(self.replies):
+            return self.replies(messages[0]["content"])
+        return self.replies.pop(0)
+
+class FakeClient:
+    """Scrolls points of several collections, honouring a single must/match condition"""
+
+    def __init__(self, collections):
+        self.collections = collections
+
+    def __call__(self, url=None, api_key=None):
+        return self
+
+    def scroll(self, collection_name, limit, offset=None, scroll_filter=None, with_payload=True, with_vectors=False):
+        points = self.collections.get(collection_name, [])
+        if scroll_filter is not None:
+            condition = scroll_filter.must[0]
+            points = [p for p in points if p.get(condition.key) == condition.match.value]
+        start = offset or 0
+        page = points[start:start + limit]
+        next_offset = start + limit if start + limit < len(points) else None
+        return [SimpleNamespace(id=i, payload=payload) for i, payload in enumerate(page, start)], next_offset
+
+def chunk(key, index, text):
+    return {"content_id": key, "source": f"{key}.txt", "absolute_index": index, "text": text}
+
+def test_parse_profile_normalises_fields():
+    profile = parse_profile("Here you go:\n" + json.dumps({"Name": " Dr. A ", "Experience": 15, "Education": ["MBBS", "MD"]}))
+    assert profile["Name"] == "Dr. A"
+    assert profile["Experience"] == "15"
+    assert profile["Education"] == "MBBS, MD"
+    assert profile["Phone"] == ""
+
+@pytest.mark.parametrize("text", ["", NOT_FOUND_MESSAGE, reply()])
+def test_parse_profile_not_found(text):
+    assert parse_profile(text) is None
+
+@pytest.mark.parametrize("text", ["no json here", '{"Name": "A", "Salary": "1"}', '{"Name": {"first": "A"}}', "[1, 2]"])
+def test_parse_profile_rejects_malformed_replies(text):
+    with pytest.raises(ValueError):
+        parse_profile(text)
+
+def test_extract_profile_reprompts_with_the_error(monkeypatch):
+    llm = ScriptedLLM(["not json", '{"Name": "A", "Salary": "1"}', reply(Name="Dr. A")])
+    monkeypatch.setattr(profile_extractor, "chat_completion", llm)
+    assert extract_profile("context")["Name"] == "Dr. A"
+    assert len(llm.calls) == 3
+    assert "unexpected fields: Salary" in llm.calls[2][-1]["content"]
+    assert llm.calls[2][-2] == {"role": "assistant", "content": '{"Name": "A", "Salary": "1"}'}
+
+def test_extract_profile_gives_up(monkeypatch):
+    monkeypatch.setattr(profile_extractor, "chat_completion", ScriptedLLM(["bad"] * 3))
+    with pytest.raises(ValueError, match="after 3 attempts"):
+        extract_profile("context", max_retries=2)
+
+@pytest.fixture
+def shards(monkeypatch):
+    collections = {
+        "docs_shard00": [chunk("a", 1, "second half"), chunk("b", 0, "Doctor B"), chunk("a", 0, "Doctor A")],
+        "docs_shard01": [chunk("c", 0, "FAIL"), chunk("a", 2, "more of A"), chunk("d", 0, "nobody here")],
+    }
+    monkeypatch.setattr(profile_extractor, "QdrantClient", FakeClient(collections))
+    monkeypatch.setattr(profile_extractor, "shard_names", lambda: list(collections))
+    monkeypatch.setattr(profile_extractor, "create_keyword_index", lambda *args: None)
+    return collections
+
+def answer(prompt):
+    if "FAIL" in prompt:
+        return "still not json"
+    if "nobody" in prompt:
+        return NOT_FOUND_MESSAGE
+    name = "A" if "Doctor A" in prompt else "B"
+    return reply(Name=f"Dr. {name}")
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_bulk_extraction_reads_documents_across_shards(shards, tmp_path, monkeypatch):
+    llm = ScriptedLLM(answer)
+    monkeypatch.setattr(profile_extractor, "chat_completion", llm)
+    output = str(tmp_path / "profiles.jsonl")
+    assert run_bulk_extraction(output, concurrency=2, max_retries=0) == {"ok": 2, "not_found": 1, "empty": 0, "failed": 1}
+
+    records = {record["key"]: record for record in read_jsonl(output)}
+    assert sorted(records) == ["a", "b", "d"]
+    assert records["a"]["profile"]["Name"] == "Dr. A"
+    assert records["d"]["status"] == "not_found"
+    # Chunks of "a" from both shards, in chunk order
+    prompt = next(call[0]["content"] for call in llm.calls if "Doctor A" in call[0]["content"])
+    assert "Doctor A second half more of A" in prompt
+    failed = read_jsonl(output + ".failed.jsonl")
+    assert [(record["key"], record["status"]) for record in failed] == [("c", "failed")]
+
+def test_bulk_extraction_resumes_and_keeps_one_record_per_key(shards, tmp_path, monkeypatch):
+    output = str(tmp_path / "profiles.jsonl")
+    monkeypatch.setattr(profile_extractor, "chat_completion", ScriptedLLM(answer))
+    run_bulk_extraction(output, concurrency=2, max_retries=0)
+
+    # The next run only retries the failed document; once it succeeds it is written once
+    shards["docs_shard01"][0]["text"] = "Doctor C"
+    llm = ScriptedLLM(lambda prompt: reply(Name="Dr. C"))
+    monkeypatch.setattr(profile_extractor, "chat_completion", llm)
+    assert run_bulk_extraction(output, concurrency=2, max_retries=0) == {"ok": 1, "not_found": 0, "empty": 0, "failed": 0}
+    assert len(llm.calls) == 1
+    keys = [record["key"] for record in read_jsonl(output)]
+    assert sorted(keys) == ["a", "b", "c", "d"]
+    with open(output + ".checkpoint", encoding="utf-8") as f:
+        assert sorted(f.read().split()) == ["a", "b", "c", "d"]
+
+    # Nothing left to do
+    assert sum(run_bulk_extraction(output, concurrency=2).values()) == 0
@@ -0,0 +1,103 @@
+# tests/test_profiling.py
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from utils import profiling
+from utils.profiling import ProfileSession, StackSampler, _cpu_ns, _module_of, profiled
+
+def test_module_of_groups_frames():
+    assert _module_of("run (utils/pipeline.py:10)") == "utils.pipeline"
+    assert _module_of("wait (3.11/threading.py:300)") == "threading"
+    assert _module_of("dot (numpy/core/multiarray.py:5)") == "numpy"
+    assert _module_of("main (app.py:1)") == "app"
+    # Code outside the repo and library paths is grouped by file name, never as ""
+    assert _module_of("run (/opt/tools/runner.py:3)") == "runner.py"
+    assert _module_of("_call (<frozen importlib._bootstrap>:241)") == "<frozen importlib._bootstrap>"
+
+def test_sampler_skips_waiting_threads():
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            sum(range(1000))
+
+    def sleeper():
+        while not stop.is_set():
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=busy, name="busy"), threading.Thread(target=sleeper, name="sleeper"),
+               threading.Thread(target=stop.wait, name="waiter")]
+    for thread in threads:
+        thread.start()
+    sampler = StackSampler(interval=0.005)
+    sampler.start()
+    time.sleep(0.3)
+    sampler.stop()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    sampled = {stack.split(";", 1)[0] for stack in sampler.stacks}
+    assert "busy" in sampled
+    assert "waiter" not in sampled
+    if _cpu_ns(threading.get_native_id()) is not None:
+        # time.sleep leaves no Python frame of its own; only the CPU check sees it
+        assert "sleeper" not in sampled
+    assert sampler.waiting > 0
+
+def test_sessions_get_distinct_ids_and_directories(tmp_path):
+    sessions = [ProfileSession("ask", directory=str(tmp_path)) for _ in range(3)]
+    assert len({session.id for session in sessions}) == 3
+    assert len({session.path for session in sessions}) == 3
+    assert all(session.id in os.path.basename(session.path) for session in sessions)
+
+def test_profiled_writes_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_MEMORY", False)
+    with profiled("ask") as session:
+        sum(range(100000))
+    with open(os.path.join(session.path, "summary.json"), encoding="utf-8") as f:
+        summary = json.load(f)
+    assert (summary["id"], summary["label"]) == (session.id, "ask")
+    assert sorted(os.listdir(session.path)) == ["cpu.folded", "cpu.prof", "summary.json"]
+
+def test_profiled_disabled_yields_none():
+    with profiled("ask", enabled=False) as session:
+        assert session is None
+
+def test_profile_write_failure_is_logged_not_raised(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_MEMORY", False)
+    monkeypatch.setattr(ProfileSession, "write", lambda self: (_ for _ in ()).throw(OSError("disk full")))
+    with profiled("ask") as session:
+        result = sum(range(1000))
+    assert result == 499500 and session.written is False
+    assert f"Could not write profile {session.id} of 'ask': disk full" in capsys.readouterr().out
+    with profiled("ask") as again:  # the session lock was released
+        assert again is not None
+
+def test_ask_answers_without_profile_id_when_write_fails(tmp_path, monkeypatch):
+    pytest.importorskip("flask")
+    monkeypatch.setenv("WARMUP_ON_START", "0")
+    from utils import prewarm
+    monkeypatch.setattr(prewarm, "QUERY_PREWARM", False)
+    import app
+    monkeypatch.setattr(app, "PROFILE_REQUESTS", True)
+    monkeypatch.setattr(app, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(app, "run_rag_pipeline", lambda question: f"answer to {question}")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_MEMORY", False)
+    client = app.app.test_client()
+
+    response = client.post("/ask", data={"question": "why"}, headers={"X-Profile": "secret"})
+    assert response.headers["X-Profile-Id"]
+
+    monkeypatch.setattr(ProfileSession, "write", lambda self: (_ for _ in ()).throw(OSError("disk full")))
+    response = client.post("/ask", data={"question": "why"}, headers={"X-Profile": "secret"})
+    assert response.status_code == 302 and "X-Profile-Id" not in response.headers
+    with client.session_transaction() as session:
+        assert session["answer"] == "answer to why"
@@ -0,0 +1,127 @@
+# tests/test_query_cache.py
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from utils import prewarm, query_cache, query_log
+
+class Clock:
+    """Stand-in for the time module: sleeping just moves the clock forward"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = time = monotonic
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache, "time", clock)
+    monkeypatch.setattr(prewarm, "time", clock)
+    return clock
+
+def test_entries_expire_after_ttl(clock):
+    cache = query_cache.TTLCache("test", maxsize=10, ttl=60)
+    cache.put("q", "answer")
+    clock.now += 59
+    assert cache.get("q") == "answer"
+    clock.now += 2
+    assert cache.get("q") is None
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = query_cache.TTLCache("test", maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+def test_disabled_cache_stores_nothing(monkeypatch):
+    monkeypatch.setattr(query_cache, "QUERY_CACHE", False)
+    cache = query_cache.TTLCache("test", maxsize=2, ttl=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None and len(cache) == 0
+
+@pytest.fixture
+def shared_caches():
+    caches = (query_cache.query_embeddings, query_cache.retrieval_results, query_cache.answers)
+    yield caches
+    for cache in caches:
+        cache.clear()
+
+def test_collection_change_starts_a_new_generation(shared_caches):
+    embeddings, results, answers = shared_caches
+    before = query_cache.generation()
+    embeddings.put("q", [0.1])
+    results.put((before, "q"), ["hit"])
+    answers.put((before, "q"), "answer")
+
+    query_cache.collection_changed()
+
+    assert query_cache.generation() == before + 1
+    assert results.get((before, "q")) is None and answers.get((before, "q")) is None
+    assert embeddings.get("q") == [0.1]  # only depends on the model
+
+def test_query_log_counts_are_written_on_flush(tmp_path):
+    log = query_log.QueryLog(str(tmp_path / "log.sqlite3"))
+    log.record("what is rag")
+    log.record("what is rag")
+    log.record("x" * (query_log.MAX_QUESTION_CHARS + 1))
+    log.record("")
+    stored = lambda: sqlite3.connect(str(tmp_path / "log.sqlite3")).execute(
+        "SELECT question, count FROM questions").fetchall()
+    assert stored() == []
+
+    log.flush()
+    log.record("what is rag")
+    log.record("who wrote it")
+    assert log.top(5) == [("what is rag", 3), ("who wrote it", 1)]
+    assert stored() == [("what is rag", 3), ("who wrote it", 1)]
+
+def test_query_log_keeps_only_the_most_frequent(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_log, "QUERY_LOG_MAX_QUESTIONS", 2)
+    log = query_log.QueryLog(str(tmp_path / "log.sqlite3"))
+    for question, count in [("a", 3), ("b", 1), ("c", 2)]:
+        for _ in range(count):
+            log.record(question)
+    assert log.top(10) == [("a", 3), ("c", 2)]
+    assert log.top(10, since=query_log.time.time() + 60) == []
+
+@pytest.fixture
+def replay(monkeypatch):
+    """Prewarm over three logged questions with the pipeline replaced by a recorder"""
+    from utils import pipeline
+    state = SimpleNamespace(asked=[], live=[])
+    log = SimpleNamespace(top=lambda n, since=None: [("q1", 9), ("q2", 5), ("q3", 1)][:n])
+    monkeypatch.setattr(prewarm, "get_query_log", lambda: log)
+    monkeypatch.setattr(pipeline, "run_rag_pipeline", lambda question, record=True: state.asked.append((question, record)))
+    monkeypatch.setattr(pipeline, "live_queries", lambda: state.live.pop(0) if state.live else 0)
+    return state
+
+def test_prewarm_is_rate_limited(replay, clock):
+    summary = prewarm.prewarm(top_n=2, rate=2, reason="test")
+    assert replay.asked == [("q1", False), ("q2", False)]
+    assert clock.sleeps == [0.5, 0.5]
+    assert summary["questions"] == 2
+
+def test_prewarm_pauses_while_live_queries_run(replay, clock):
+    replay.live = [1, 1, 1, 0]
+    prewarm.prewarm(top_n=1, rate=1)
+    assert clock.sleeps == [0.1, 0.1, 0.1, 1.0]
+    assert replay.asked == [("q1", False)]
+
+def test_prewarm_stops_waiting_after_live_traffic_limit(replay, clock):
+    replay.live = [1] * 1000
+    prewarm.prewarm(top_n=1, rate=1)
+    assert replay.asked == [("q1", False)]
+    assert sum(clock.sleeps[:-1]) == pytest.approx(prewarm.LIVE_TRAFFIC_WAIT)
@@ -0,0 +1,57 @@
+# tests/test_rate_limiter.py
+import time
+
+import pytest
+import requests
+
+from utils.rate_limiter import ProviderGovernor, RateLimitError
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def raising(exc):
+    def send():
+        raise exc
+    return send
+
+def test_unexpected_errors_release_their_slot():
+    governor = ProviderGovernor("test", max_concurrency=2, queue_timeout=1.0)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            governor.call(raising(requests.exceptions.ChunkedEncodingError("cut off")))
+    assert governor.in_flight == 0
+    assert governor.call(lambda: FakeResponse(200), deadline=time.monotonic() + 0.5).status_code == 200
+
+def test_errors_in_caller_send_release_their_slot():
+    governor = ProviderGovernor("test", max_concurrency=1, queue_timeout=1.0)
+    with pytest.raises(ValueError):
+        governor.call(raising(ValueError("bad JSON")))
+    with pytest.raises(requests.exceptions.MissingSchema):
+        governor.call(raising(requests.exceptions.MissingSchema("no scheme")))
+    assert governor.in_flight == 0
+    assert governor.limit == 1.0
+
+def test_throttling_and_timeouts_halve_the_limit_other_errors_do_not():
+    governor = ProviderGovernor("test", max_concurrency=8, max_retries=0)
+    with pytest.raises(RateLimitError):
+        governor.call(lambda: FakeResponse(429))
+    assert governor.limit == 4.0 and governor.throttled == 1
+    with pytest.raises(requests.Timeout):
+        governor.call(raising(requests.Timeout("slow")))
+    assert governor.limit == 2.0
+    with pytest.raises(RuntimeError):
+        governor.call(raising(RuntimeError("boom")))
+    assert governor.limit == 2.0
+    governor.call(lambda: FakeResponse(200))
+    assert governor.limit == 2.5
+    assert governor.in_flight == 0
+
+def test_retry_after_is_honoured_and_slot_reused():
+    governor = ProviderGovernor("test", max_concurrency=1, max_retries=1)
+    responses = iter([FakeResponse(429, {"Retry-After": "0.05"}), FakeResponse(200)])
+    started = time.monotonic()
+    assert governor.call(lambda: next(responses)).status_code == 200
+    assert time.monotonic() - started >= 0.05
+    assert governor.in_flight == 0
@@ -0,0 +1,50 @@
+# tests/test_reindex.py
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from utils.reindex import _id_order, _scroll_parallel, id_ranges
+
+class FakeClient:
+    """Scrolls ids in Qdrant's order; offsets need not be existing ids"""
+
+    def __init__(self, ids, fail=False):
+        self.ids = sorted(ids, key=_id_order)
+        self.fail = fail
+        self.threads = set()
+
+    def scroll(self, collection_name, limit, offset=None, with_payload=True, with_vectors=False):
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise RuntimeError("scroll failed")
+        start = 0 if offset is None else next(
+            (i for i, pid in enumerate(self.ids) if _id_order(pid) >= _id_order(offset)), len(self.ids))
+        page = self.ids[start:start + limit]
+        next_offset = self.ids[start + limit] if start + limit < len(self.ids) else None
+        return [SimpleNamespace(id=pid, payload={"text": str(pid)}) for pid in page], next_offset
+
+def scrolled_ids(client, scrollers, page_size=7):
+    return [pid for page in _scroll_parallel(client, "docs", page_size, scrollers) for pid, _ in page]
+
+def test_id_ranges_cover_the_id_space():
+    ranges = id_ranges(4)
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+    assert ranges[1][0] == "40000000-0000-0000-0000-000000000000"
+
+@pytest.mark.parametrize("scrollers", [1, 3, 4])
+def test_parallel_scroll_reads_every_point_once(scrollers):
+    ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"chunk-{i}")) for i in range(500)] + [1, 2, 300]
+    client = FakeClient(ids)
+    assert sorted(scrolled_ids(client, scrollers), key=_id_order) == [str(pid) for pid in client.ids]
+    if scrollers > 1:
+        assert len(client.threads) == scrollers
+
+def test_parallel_scroll_of_empty_collection():
+    assert scrolled_ids(FakeClient([]), 4) == []
+
+def test_parallel_scroll_raises_scroll_errors():
+    with pytest.raises(RuntimeError, match="scroll failed"):
+        scrolled_ids(FakeClient([str(uuid.uuid4())], fail=True), 4)
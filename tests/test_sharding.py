@@ -0,0 +1,89 @@
+# tests/test_sharding.py
+from types import SimpleNamespace
+
+import pytest
+
+from utils import retriever, sharding
+from utils.config import COLLECTION_NAME
+
+@pytest.fixture
+def four_shards(monkeypatch):
+    monkeypatch.setattr(sharding, "SHARD_COUNT", 4)
+    monkeypatch.setattr(retriever, "SHARD_COUNT", 4)
+    return sharding.shard_names()
+
+def test_single_shard_is_the_collection(monkeypatch):
+    monkeypatch.setattr(sharding, "SHARD_COUNT", 1)
+    assert sharding.shard_names() == [COLLECTION_NAME]
+    assert sharding.shard_for("a.txt") == COLLECTION_NAME
+
+def test_hash_routing_is_stable_and_in_range(four_shards):
+    assert four_shards == [f"{COLLECTION_NAME}_shard{i:02d}" for i in range(4)]
+    sources = [f"file_{i}.txt" for i in range(200)]
+    routed = [sharding.shard_for(source) for source in sources]
+    assert routed == [sharding.shard_for(source) for source in sources]
+    assert set(routed) == set(four_shards)  # 200 keys reach every shard
+    # blake2b, not the per-process salted hash(), so the mapping survives restarts
+    assert sharding.shard_for("report.pdf") == sharding.shard_for("report.pdf") == f"{COLLECTION_NAME}_shard03"
+
+def test_filter_on_source_prunes_shards(four_shards):
+    shard = sharding.shard_for("a.txt")
+    assert sharding.shards_for_filter({"must": [{"key": "source", "match": {"value": "a.txt"}}]}) == [shard]
+
+    sources = ["a.txt", "b.txt", "c.txt"]
+    expected = sorted({sharding.shard_for(source) for source in sources})
+    query_filter = {"must": [{"key": "content_id", "match": {"value": "x"}},
+                             {"key": "source", "match": {"any": sources}}]}
+    assert sharding.shards_for_filter(query_filter) == expected
+
+def test_other_filters_search_every_shard(four_shards):
+    assert sharding.shards_for_filter(None) == four_shards
+    assert sharding.shards_for_filter({}) == four_shards
+    assert sharding.shards_for_filter({"must": [{"key": "content_id", "match": {"value": "x"}}]}) == four_shards
+    assert sharding.shards_for_filter({"should": [{"key": "source", "match": {"value": "a.txt"}}]}) == four_shards
+    assert sharding.shards_for_filter({"must": [{"key": "source", "match": {"any": []}}]}) == four_shards
+
+@pytest.fixture
+def fake_shards(four_shards, monkeypatch):
+    """Per-shard hit lists served over a fake HTTP session; a shard mapped to an exception fails"""
+    results = {}
+
+    def post(url, headers=None, json=None, timeout=None):
+        name = url.split("/collections/")[1].split("/")[0]
+        hits = results.get(name, [])
+        if isinstance(hits, Exception):
+            raise hits
+        return SimpleNamespace(raise_for_status=lambda: None,
+                               json=lambda: {"result": sorted(hits, key=lambda h: -h["score"])[:json["top"]]})
+
+    monkeypatch.setattr(retriever, "get_session", lambda name: SimpleNamespace(post=post))
+    return four_shards, results
+
+def hits(shard, *scores):
+    return [{"id": f"{shard}-{score}", "score": score} for score in scores]
+
+def test_search_merges_shard_hits_into_global_top_k(fake_shards):
+    shards, results = fake_shards
+    results.update({shards[0]: hits(0, 0.9, 0.2), shards[1]: hits(1, 0.8, 0.7, 0.1),
+                    shards[2]: hits(2, 0.85), shards[3]: hits(3, 0.3)})
+
+    found = retriever.search_shards({"vector": [0.1], "top": 4, "with_payload": True})
+    assert [hit["id"] for hit in found] == ["0-0.9", "2-0.85", "1-0.8", "1-0.7"]
+
+def test_failed_or_empty_shards_contribute_nothing(fake_shards, capsys):
+    shards, results = fake_shards
+    results.update({shards[0]: ConnectionError("shard down"), shards[1]: hits(1, 0.4, 0.6),
+                    shards[3]: hits(3, 0.5)})
+
+    found = retriever.search_shards({"vector": [0.1], "top": 5, "with_payload": True})
+    assert [hit["id"] for hit in found] == ["1-0.6", "3-0.5", "1-0.4"]
+    assert f"Error searching Qdrant ({shards[0]}): shard down" in capsys.readouterr().out
+
+def test_pruned_search_only_queries_matching_shard(fake_shards):
+    shards, results = fake_shards
+    target = sharding.shard_for("a.txt")
+    for name in shards:
+        results[name] = hits(name[-2:], 0.5)
+
+    payload = {"vector": [0.1], "top": 3, "filter": {"must": [{"key": "source", "match": {"value": "a.txt"}}]}}
+    assert retriever.search_shards(payload) == hits(target[-2:], 0.5)
@@ -0,0 +1,60 @@
+# tests/test_snapshot.py
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils import snapshot
+from utils.snapshot import SnapshotIndex, export_snapshot, iter_points, load_manifest
+
+DIM = 3
+
+class FakeClient:
+    def __init__(self, points):
+        self.points = points
+
+    def scroll(self, collection_name, limit, offset=None, with_payload=True, with_vectors=False):
+        start = offset or 0
+        page = self.points[start:start + limit]
+        next_offset = start + limit if start + limit < len(self.points) else None
+        return [SimpleNamespace(id=pid, vector=vector, payload=payload) for pid, vector, payload in page], next_offset
+
+@pytest.fixture
+def collection(monkeypatch):
+    rng = np.random.default_rng(0)
+    points = [(i, (rng.random(DIM) + 0.1).tolist(), {"text": f"chunk {i}", "source": f"s{i % 3}"}) for i in range(10)]
+    info = {"config": {"params": {"vectors": {"distance": "Cosine"}}}, "payload_schema": {"source": {"data_type": "keyword"}}}
+    monkeypatch.setattr(snapshot, "get_client", lambda: FakeClient(points))
+    monkeypatch.setattr(snapshot, "get_collection_info", lambda name: info)
+    monkeypatch.setattr(snapshot, "SCROLL_PAGE_SIZE", 3)
+    return points
+
+def test_export_splits_blocks_across_pages(collection, tmp_path):
+    manifest = export_snapshot(str(tmp_path), collection_name="docs", block_points=4)
+    assert [block["count"] for block in manifest["blocks"]] == [4, 4, 2]
+    assert (manifest["count"], manifest["dim"]) == (10, DIM)
+    assert manifest["keyword_indexes"] == ["source"]
+    assert load_manifest(str(tmp_path)) == manifest
+
+def test_export_round_trip(collection, tmp_path):
+    export_snapshot(str(tmp_path), collection_name="docs", block_points=4)
+    exported = list(iter_points(str(tmp_path)))
+    assert [point["id"] for point in exported] == [str(pid) for pid, _, _ in collection]
+    assert [point["payload"] for point in exported] == [payload for _, _, payload in collection]
+    for point, (_, vector, _) in zip(exported, collection):
+        expected = np.asarray(vector) / np.linalg.norm(vector)
+        assert np.allclose(point["vector"], expected, atol=1e-6)
+
+def test_float16_export_searches_like_float32(collection, tmp_path):
+    export_snapshot(str(tmp_path / "f32"), collection_name="docs", block_points=4)
+    export_snapshot(str(tmp_path / "f16"), collection_name="docs", dtype="float16", block_points=4)
+    query = collection[7][1]
+    hits = [SnapshotIndex(str(tmp_path / dtype)).search(query, top_k=3) for dtype in ("f32", "f16")]
+    assert hits[0][0]["id"] == "7"
+    assert [hit["id"] for hit in hits[0]] == [hit["id"] for hit in hits[1]]
+
+def test_export_of_empty_collection(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "get_client", lambda: FakeClient([]))
+    monkeypatch.setattr(snapshot, "get_collection_info", lambda name: {})
+    manifest = export_snapshot(str(tmp_path), collection_name="docs")
+    assert (manifest["count"], manifest["blocks"]) == (0, [])
@@ -0,0 +1,103 @@
+# tests/test_text_cache.py
+import json
+import time
+
+import pytest
+
+from utils import text_extract
+from utils.text_cache import TextCache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TextCache(path=str(tmp_path / "text_cache.sqlite3"))
+    monkeypatch.setattr(text_extract, "get_text_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+def files(cache):
+    return cache.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+def write_json(path, texts):
+    path.write_text(json.dumps({"webSearchResults": [[{"content": text} for text in texts]]}))
+    return str(path)
+
+def test_text_file_miss_then_hit(cache, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("hello   world\n\nagain")
+    assert text_extract.load_text_from_file(str(path)) == ["hello   world\n\nagain"]
+    key = cache.key(str(path), text_extract.extractor_version(".txt"))
+    # Stored with whitespace collapsed, which chunks the same
+    assert cache.get(key) == ["hello world again"]
+    assert text_extract.load_text_from_file(str(path)) == ["hello world again"]
+
+def test_changed_content_is_a_miss(cache, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("first version")
+    text_extract.load_text_from_file(str(path))
+    path.write_text("second version")
+    assert text_extract.load_text_from_file(str(path)) == ["second version"]
+    assert files(cache) == 2
+
+def test_extractor_version_change_is_a_miss(cache, tmp_path, monkeypatch):
+    path = tmp_path / "a.txt"
+    path.write_text("some text")
+    text_extract.load_text_from_file(str(path))
+    old_key = cache.key(str(path), text_extract.extractor_version(".txt"))
+
+    monkeypatch.setattr(text_extract, "EXTRACTOR_VERSION", text_extract.EXTRACTOR_VERSION + 1)
+    assert cache.get(cache.key(str(path), text_extract.extractor_version(".txt"))) is None
+    text_extract.load_text_from_file(str(path))
+    # Cleanup drops what the old extractor produced
+    assert text_extract.cleanup_text_cache(max_age_days=0) == 1
+    assert cache.get(old_key) is None
+    assert files(cache) == 1
+
+def test_streamed_json_is_published_only_when_fully_read(cache, tmp_path):
+    path = write_json(tmp_path / "a.json", ["one  item", "two", "three"])
+    items = text_extract.load_text_from_file(path)
+    next(items)
+    items.close()
+    assert files(cache) == 0
+
+    first = list(text_extract.load_text_from_file(path))
+    assert files(cache) == 1
+    hit = text_extract.load_text_from_file(path)
+    assert not isinstance(hit, list)
+    assert [item["position"] for item in hit] == [item["position"] for item in first]
+
+def test_unfinished_items_are_cleaned_up(cache, tmp_path):
+    items = text_extract.load_text_from_file(write_json(tmp_path / "a.json", ["one", "two"]))
+    next(items)
+    items.close()
+    assert cache.cleanup(max_age_days=0) == 0
+    assert cache.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+
+def test_empty_results_are_not_stored(cache, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("   \n")
+    assert text_extract.load_text_from_file(str(path)) == []
+    assert files(cache) == 0
+
+def test_pages_round_trip(cache):
+    pages = [(3, "page  three"), (4, "page four")]
+    stored = cache.record("k", "v", [iter(pages)])
+    assert list(stored[0]) == pages
+    assert cache.get("k") == [[(3, "page three"), (4, "page four")]]
+
+def test_least_recently_used_files_are_evicted(cache):
+    for key in ("a", "b", "c"):
+        cache.record(key, "v", ["x" * 1000 + key])
+        time.sleep(0.01)
+    cache.get("a")
+    cache.max_bytes = cache.size() - 1
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+def test_cleanup_removes_files_unused_for_too_long(cache):
+    cache.record("old", "v", ["old text"])
+    cache.record("new", "v", ["new text"])
+    cache.conn.execute("UPDATE files SET last_used = ? WHERE key = 'old'", (time.time() - 3 * 86400,))
+    assert cache.cleanup(max_age_days=2) == 1
+    assert cache.get("old") is None
+    assert cache.get("new") == ["new text"]
@@ -0,0 +1,108 @@
+# utils/backends.py
+# Registry of the swappable parts of the pipeline: embedder, vector store, LLM and text extractor
+#
+# The pipeline engine (utils/pipeline.py) asks this registry for its backends
+# instead of calling HTTP APIs itself, so request batching, caching, pooling
+# and rate limiting are implemented once and reach every front end.
+# EMBEDDER_BACKEND, VECTOR_STORE_BACKEND, LLM_BACKEND and EXTRACTOR_BACKEND
+# pick an implementation by name; more are added with @register(kind, name).
+import os
+import threading
+
+from utils.groq_llm import FALLBACK_ANSWER
+
+BACKEND_KINDS = ("embedder", "vector_store", "llm", "extractor")
+DEFAULT_BACKENDS = {"embedder": "huggingface", "vector_store": "qdrant", "llm": "groq", "extractor": "files"}
+
+_factories = {kind: {} for kind in BACKEND_KINDS}
+_instances = {}
+_lock = threading.Lock()
+
+def register(kind, name):
+    """Class (or factory) decorator that makes a backend available as `name`"""
+    if kind not in _factories:
+        raise ValueError(f"Unknown backend kind: {kind}")
+
+    def decorator(factory):
+        _factories[kind][name] = factory
+        return factory
+    return decorator
+
+def backend_name(kind):
+    return os.getenv(f"{kind.upper()}_BACKEND", DEFAULT_BACKENDS[kind])
+
+def get_backend(kind, name=None):
+    """Shared instance of the configured backend of `kind` (or of the one called `name`)"""
+    name = name or backend_name(kind)
+    with _lock:
+        if (kind, name) not in _instances:
+            factory = _factories.get(kind, {}).get(name)
+            if factory is None:
+                available = ", ".join(sorted(_factories.get(kind, {}))) or "none"
+                raise ValueError(f"Unknown {kind} backend: {name} (available: {available})")
+            _instances[(kind, name)] = factory()
+        return _instances[(kind, name)]
+
+@register("embedder", "huggingface")
+class HuggingFaceEmbedder:
+    """Hugging Face Inference API through the pooled session and the 'huggingface' governor"""
+
+    def embed(self, text, deadline=None):
+        from utils.embedder import get_embedding
+        return get_embedding(text, deadline=deadline)
+
+    def embed_many(self, texts, deadline=None):
+        from utils.embedder import get_embeddings
+        return get_embeddings(texts, deadline=deadline)
+
+    def embed_query(self, text, deadline=None):
+        """Query embedding (with the 'query:' prefix and hedging)"""
+        from utils.embed_query import embed_query
+        return embed_query(text, deadline=deadline)
+
+@register("vector_store", "qdrant")
+class QdrantStore:
+    """Qdrant search (sharded, two-stage or from a local snapshot, as configured) and bulk writes"""
+
+    def search(self, vector, top_k=5, deadline=None, query_filter=None, collection_name=None):
+        from utils.retriever import search_qdrant
+        return search_qdrant(vector, top_k=top_k, deadline=deadline, query_filter=query_filter,
+                             collection_name=collection_name)
+
+    def retrieve(self, vector, top_k=5, deadline=None):
+        """Search with the configured strategy (see retriever.retrieve)"""
+        from utils.retriever import retrieve
+        return retrieve(vector, top_k=top_k, deadline=deadline)
+
+    def writer(self, collection_name, **kwargs):
+        """A BulkWriter for `collection_name`; use it as a context manager"""
+        from utils.bulk_writer import BulkWriter
+        return BulkWriter(collection_name, **kwargs)
+
+@register("llm", "groq")
+class GroqLLM:
+    """Groq chat completions through the pooled session and the 'groq' governor"""
+
+    # What `answer` returns when the context has no answer (or the call failed); never cached
+    fallback_answer = FALLBACK_ANSWER
+
+    def complete(self, messages, temperature=0.2, max_tokens=512, deadline=None):
+        from utils.groq_llm import chat_completion
+        return chat_completion(messages, temperature=temperature, max_tokens=max_tokens, deadline=deadline)
+
+    def answer(self, context, question, deadline=None):
+        """Answer `question` from `context` only"""
+        from utils.groq_llm import ask_llama3
+        return ask_llama3(context, question, deadline=deadline)
+
+@register("extractor", "files")
+class FileExtractor:
+    """PDF, DOCX, TXT and webSearchResults JSON files (see utils/text_extract.py)"""
+
+    def supports(self, filename):
+        from utils.text_extract import is_supported
+        return is_supported(filename)
+
+    def load(self, file_path, resume_from=None, inclusive=False):
+        from utils.text_extract import load_text_from_file
+        return load_text_from_file(file_path, resume_from=resume_from, inclusive=inclusive)
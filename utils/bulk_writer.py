@@ -0,0 +1,156 @@
+# utils/bulk_writer.py
+# High-throughput point uploads through qdrant_client (REST or gRPC)
+#
+# Batches are sent with wait=False so Qdrant acknowledges them once they are
+# in its write-ahead log, and several batches are kept in flight at once.
+# Qdrant applies a shard's updates in order, so for a single-shard collection
+# (what create_collection makes; utils/sharding.py spreads data over whole
+# collections instead) holding back the final batch and sending it with
+# wait=True acts as a consistency barrier: when it returns, every earlier
+# batch has been applied and is searchable. Across the shards of a
+# multi-shard collection there is no such order, so there every batch is
+# sent with wait=True (still several in flight) and the barrier waits for
+# all of them.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.config import QDRANT_URL, QDRANT_API_KEY
+from utils.qdrant_utils import get_collection_info
+
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "256"))
+UPLOAD_PARALLEL = int(os.getenv("UPLOAD_PARALLEL", "4"))
+
+_clients = {}
+_clients_lock = threading.Lock()
+_ordered = {}
+_ordered_lock = threading.Lock()
+
+def get_client(prefer_grpc=None):
+    """Shared QdrantClient (imported on first use); gRPC when QDRANT_PREFER_GRPC=1"""
+    prefer_grpc = QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    with _clients_lock:
+        if prefer_grpc not in _clients:
+            from qdrant_client import QdrantClient
+            _clients[prefer_grpc] = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY,
+                                                 prefer_grpc=prefer_grpc, grpc_port=QDRANT_GRPC_PORT)
+        return _clients[prefer_grpc]
+
+def writes_are_ordered(collection_name):
+    """Whether Qdrant applies the collection's updates in order, i.e. it has a single shard.
+
+    Cached per collection. A collection that can't be inspected counts as unordered.
+    """
+    with _ordered_lock:
+        if collection_name not in _ordered:
+            try:
+                info = get_collection_info(collection_name)
+            except Exception as e:
+                print(f"Could not read the shard count of {collection_name}: {e}")
+                return False
+            if info is None:
+                return False
+            _ordered[collection_name] = info.get("config", {}).get("params", {}).get("shard_number", 1) == 1
+        return _ordered[collection_name]
+
+def to_point_structs(points):
+    """Convert a PointBatch or {"id", "vector", "payload"} dicts into qdrant_client PointStructs"""
+    if hasattr(points, "to_point_structs"):
+        return points.to_point_structs()
+    from qdrant_client.http import models as rest
+    return [rest.PointStruct(id=p["id"], vector=[float(v) for v in p["vector"]], payload=p.get("payload") or {})
+            for p in points]
+
+class BulkWriter:
+    """Uploads points in parallel batches; `close()` is the consistency barrier.
+
+    `write()` blocks once `parallel * 2` batches are in flight, so memory stays
+    bounded however fast points are produced. `on_written(count)` is called
+    (from a worker thread) as each batch is acknowledged. Upload errors are
+    raised from the next `write()` or from `close()`.
+    """
+
+    def __init__(self, collection_name, batch_size=None, parallel=None, prefer_grpc=None, on_written=None):
+        self.collection_name = collection_name
+        self.batch_size = batch_size or UPLOAD_BATCH_SIZE
+        self.parallel = parallel or UPLOAD_PARALLEL
+        self.client = get_client(prefer_grpc)
+        self.on_written = on_written
+        # Without ordered writes the held-back batch proves nothing about the others
+        self.wait_each = not writes_are_ordered(collection_name)
+        self.executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="qdrant-upload")
+        self.slots = threading.BoundedSemaphore(self.parallel * 2)
+        self.pending = None
+        self.futures = []
+        self.written = 0
+        self.closed = False
+
+    def _send(self, points, wait):
+        try:
+            self.client.upsert(collection_name=self.collection_name, points=to_point_structs(points), wait=wait)
+        finally:
+            self.slots.release()
+        if self.on_written:
+            self.on_written(len(points))
+        return len(points)
+
+    def _collect(self, block=False):
+        remaining = []
+        for future in self.futures:
+            if block or future.done():
+                self.written += future.result()
+            else:
+                remaining.append(future)
+        self.futures = remaining
+
+    def _submit(self, points):
+        self.slots.acquire()
+        self.futures.append(self.executor.submit(self._send, points, self.wait_each))
+
+    def write(self, points):
+        """Queue a PointBatch or a list of point dicts, uploaded in slices of `batch_size`"""
+        if self.closed:
+            raise RuntimeError("BulkWriter is closed")
+        # The most recent slice is held back so the final upload can carry the barrier
+        for start in range(0, len(points), self.batch_size):
+            if self.pending is not None:
+                self._submit(self.pending)
+            self.pending = points[start:start + self.batch_size]
+        self._collect()
+
+    def flush(self):
+        """Barrier without closing: wait for every batch and send the held-back one with wait=True.
+
+        When it returns, everything written so far is applied. Returns points written.
+        """
+        if self.closed:
+            raise RuntimeError("BulkWriter is closed")
+        self._collect(block=True)
+        if self.pending is not None:
+            self.slots.acquire()
+            self.written += self._send(self.pending, True)
+            self.pending = None
+        return self.written
+
+    def close(self):
+        """Wait for every batch, then send the held-back batch with wait=True. Returns points written."""
+        if self.closed:
+            return self.written
+        try:
+            self.flush()
+        finally:
+            self.closed = True
+            self.executor.shutdown(wait=True)
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.closed = True
+            self.executor.shutdown(wait=True, cancel_futures=True)
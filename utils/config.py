@@ -0,0 +1,19 @@
+# utils/config.py
+# Loads .env once and exposes the settings shared by the utils modules
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+
+# Changing the model needs a re-index of stored vectors (python reindex.py)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+HF_API_URL = os.getenv("HF_API_URL", f"https://api-inference.huggingface.co/models/{EMBEDDING_MODEL}")
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = "llama3-8b-8192"
+VECTOR_SIZE = int(os.getenv("VECTOR_SIZE", "384"))
@@ -0,0 +1,122 @@
+# utils/deadline.py
+# Per-question time budgets and hedged requests for the query path
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.rate_limiter import DeadlineExceeded
+from utils.metrics import HEDGED_REQUESTS, DEADLINE_EXCEEDED
+
+HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", "16"))  # Most duplicate requests in flight at once
+MIN_SAMPLES = 20
+
+class Deadline:
+    """An absolute point in time (time.monotonic()) shared by every stage of one request"""
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def check(self, stage):
+        """Raise DeadlineExceeded (and count it against `stage`) if no time is left"""
+        if self.expired():
+            DEADLINE_EXCEEDED.inc(stage=stage)
+            raise DeadlineExceeded(f"{stage}: deadline exceeded")
+
+def request_timeout(deadline):
+    """Timeout for one HTTP request: the time left on `deadline`, or None for the session default.
+
+    Never raises, so it is safe inside a governor `send()`; the governor
+    itself refuses to start calls once the deadline has passed.
+    """
+    if deadline is None:
+        return None
+    return max(0.001, deadline.remaining())
+
+class LatencyTracker:
+    """Rolling window of recent call latencies"""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        """Latency at `pct`, or None until MIN_SAMPLES calls have been seen"""
+        with self.lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+# Only duplicates run here, and never more than the pool has workers, so a hedge
+# never waits in a queue; under heavier load extra hedges are skipped instead
+_hedges = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+_hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+
+def _start_primary(fn):
+    """Run `fn()` on a thread of its own, so the primary request never queues behind other queries"""
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+    return future
+
+def _start_hedge(fn, stage):
+    """Submit a duplicate of `fn` if a hedge worker is free, else None"""
+    if not _hedge_slots.acquire(blocking=False):
+        HEDGED_REQUESTS.inc(stage=stage, outcome="skipped")
+        return None
+    HEDGED_REQUESTS.inc(stage=stage, outcome="sent")
+    future = _hedges.submit(fn)
+    future.add_done_callback(lambda _: _hedge_slots.release())
+    return future
+
+def hedged(fn, hedge_after, stage, deadline=None):
+    """Call `fn()`; if it hasn't returned after `hedge_after` seconds, start a duplicate.
+
+    Returns the first successful result. The slower call is left to finish in
+    the background (its result is discarded). Raises DeadlineExceeded when
+    `deadline` passes first, or the last error if every call fails.
+    """
+    def remaining():
+        return deadline.remaining() if deadline else None
+
+    first = _start_primary(fn)
+    wait([first], timeout=hedge_after if deadline is None else min(hedge_after, remaining()))
+    if first.done():
+        return first.result()
+    if deadline:
+        deadline.check(stage)
+
+    second = _start_hedge(fn, stage)
+    pending = {first} if second is None else {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            DEADLINE_EXCEEDED.inc(stage=stage)
+            raise DeadlineExceeded(f"{stage}: deadline exceeded")
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    HEDGED_REQUESTS.inc(stage=stage, outcome="won")
+                return future.result()
+            error = future.exception()
+    raise error
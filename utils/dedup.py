@@ -0,0 +1,176 @@
+# utils/dedup.py
+# Exact and near-duplicate chunk detection with a persistent SQLite index
+#
+# Each chunk gets a SHA-1 of its normalised text (exact matches) and a MinHash
+# signature over word 3-shingles (near matches). Signatures are split into
+# LSH bands of BAND_ROWS values; chunks sharing any band are candidates, and
+# a candidate counts as a duplicate when the signatures agree on at least
+# DEDUP_THRESHOLD of their slots (an estimate of the shingle Jaccard similarity).
+# Near-duplicate matching is opt-in (DEDUP_NEAR=1): templated documents such
+# as doctor profiles that differ only in name, phone and city score ~0.9, so
+# only exact repeats are skipped by default.
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+import threading
+from collections import namedtuple
+
+DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dedup_index.sqlite3"))
+DEDUP_NEAR = os.getenv("DEDUP_NEAR", "0") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.95")) if DEDUP_NEAR else 1.0
+NUM_PERM = 64
+BAND_ROWS = 4
+MAX_CANDIDATES = 200
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(b"a%d" % i, digest_size=8).digest(), "big") % (_PRIME - 1) + 1,
+     int.from_bytes(hashlib.blake2b(b"b%d" % i, digest_size=8).digest(), "big") % _PRIME)
+    for i in range(NUM_PERM)
+]
+
+Fingerprint = namedtuple("Fingerprint", ["exact", "signature"])
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+def normalize(text):
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+def minhash(words):
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS)
+
+def fingerprint(text):
+    normalized = normalize(text)
+    return Fingerprint(hashlib.sha1(normalized.encode("utf-8")).hexdigest(), minhash(normalized.split()))
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+def bands(signature):
+    """(band, key) pairs; keys are signed so they fit SQLite integers"""
+    result = []
+    for band, start in enumerate(range(0, len(signature), BAND_ROWS)):
+        digest = hashlib.blake2b(struct.pack(f"<{BAND_ROWS}I", *signature[start:start + BAND_ROWS]), digest_size=8).digest()
+        result.append((band, int.from_bytes(digest, "big", signed=True)))
+    return result
+
+def _pack(signature):
+    return struct.pack(f"<{NUM_PERM}I", *signature)
+
+def _unpack(blob):
+    return struct.unpack(f"<{NUM_PERM}I", blob)
+
+class DedupIndex:
+    """Fingerprints of stored points, scoped per collection and shared across runs"""
+
+    def __init__(self, collection_name, path=None, threshold=DEDUP_THRESHOLD):
+        self.collection = collection_name
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path or DEDUP_DB_PATH, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS fingerprints ("
+                              "collection TEXT, point_id TEXT, exact TEXT, signature BLOB, "
+                              "PRIMARY KEY (collection, point_id))")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS fingerprints_exact ON fingerprints (collection, exact)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS bands (collection TEXT, band INTEGER, key INTEGER, point_id TEXT)")
+            if not self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'bands_unique'").fetchone():
+                # Older indexes inserted band rows again on every re-ingest
+                self.conn.execute("DELETE FROM bands WHERE rowid NOT IN "
+                                  "(SELECT MIN(rowid) FROM bands GROUP BY collection, band, key, point_id)")
+                self.conn.execute("DROP INDEX IF EXISTS bands_lookup")
+                self.conn.execute("CREATE UNIQUE INDEX bands_unique ON bands (collection, band, key, point_id)")
+
+    def lookup(self, fp):
+        """Return (point id, exact) of a stored exact or near duplicate, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT point_id FROM fingerprints WHERE collection = ? AND exact = ? LIMIT 1",
+                                    (self.collection, fp.exact)).fetchone()
+            if row:
+                return row[0], True
+            if self.threshold >= 1:
+                return None
+            band_keys = bands(fp.signature)
+            clauses = " OR ".join("(b.band = ? AND b.key = ?)" for _ in band_keys)
+            rows = self.conn.execute(
+                "SELECT DISTINCT f.point_id, f.signature FROM bands b JOIN fingerprints f "
+                "ON f.collection = b.collection AND f.point_id = b.point_id "
+                f"WHERE b.collection = ? AND ({clauses}) LIMIT ?",
+                [self.collection, *[value for pair in band_keys for value in pair], MAX_CANDIDATES]
+            ).fetchall()
+        best = None
+        for point_id, blob in rows:
+            score = similarity(fp.signature, _unpack(blob))
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, point_id)
+        return (best[1], False) if best else None
+
+    def add(self, entries):
+        """Record [(point_id, fingerprint)] for points that are now stored"""
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)",
+                                  [(self.collection, pid, fp.exact, _pack(fp.signature)) for pid, fp in entries])
+            # A re-ingested point may have new text, so its old bands go
+            self.conn.executemany("DELETE FROM bands WHERE collection = ? AND point_id = ?",
+                                  [(self.collection, pid) for pid, _ in entries])
+            self.conn.executemany("INSERT OR IGNORE INTO bands VALUES (?, ?, ?, ?)",
+                                  [(self.collection, band, key, pid) for pid, fp in entries for band, key in bands(fp.signature)])
+
+    def remove(self, point_ids):
+        """Forget points that no longer exist in the collection"""
+        with self.lock, self.conn:
+            for table in ("fingerprints", "bands"):
+                self.conn.executemany(f"DELETE FROM {table} WHERE collection = ? AND point_id = ?",
+                                      [(self.collection, pid) for pid in point_ids])
+
+    def close(self):
+        self.conn.close()
+
+def find_duplicates(index, texts, ids, existing_ids=None):
+    """Return (fingerprints, canonical, exact) for a batch of chunks.
+
+    `canonical[i]` is the id of the stored point (or earlier chunk in the
+    same batch) that chunk i duplicates, or None if it is new; `exact[i]`
+    tells whether it is an exact repeat rather than a near duplicate.
+    `existing_ids(ids)` is called with the index hits and must return the
+    subset still present in the collection; stale entries are dropped from
+    the index and their chunks treated as new.
+    """
+    fingerprints = [fingerprint(text) for text in texts]
+    hits = [index.lookup(fp) for fp in fingerprints]
+
+    if existing_ids is not None:
+        hit_ids = {hit[0] for hit in hits if hit}
+        alive = existing_ids(sorted(hit_ids)) if hit_ids else set()
+        stale = hit_ids - set(alive)
+        if stale:
+            index.remove(stale)
+            hits = [hit if hit and hit[0] not in stale else None for hit in hits]
+
+    canonical = []
+    exact = []
+    batch_exact = {}
+    batch_bands = {}
+    batch_signatures = {}
+    for point_id, fp, hit in zip(ids, fingerprints, hits):
+        if hit is None and fp.exact in batch_exact:
+            hit = (batch_exact[fp.exact], True)
+        if hit is None and index.threshold < 1:
+            candidates = {pid for key in bands(fp.signature) for pid in batch_bands.get(key, ())}
+            scored = [(similarity(fp.signature, batch_signatures[pid]), pid) for pid in candidates]
+            scored = [item for item in scored if item[0] >= index.threshold]
+            hit = (max(scored)[1], False) if scored else None
+        canonical.append(hit[0] if hit else None)
+        exact.append(hit[1] if hit else False)
+        if hit is None:
+            batch_exact[fp.exact] = point_id
+            batch_signatures[point_id] = fp.signature
+            for key in bands(fp.signature):
+                batch_bands.setdefault(key, []).append(point_id)
+    return fingerprints, canonical, exact
@@ -0,0 +1,102 @@
+# utils/doc_index.py
+# Document-level centroid collection for two-stage (document, then chunk) retrieval
+#
+# Every document (a `source` file, or a `content_id` item with
+# HIERARCHICAL_LEVEL=content_id) gets one point holding the normalised mean
+# of its chunk vectors. Queries first find the closest documents in this
+# small collection, then search chunks only within them using the keyword
+# index on the same payload field.
+import os
+import uuid
+
+from utils.config import COLLECTION_NAME, VECTOR_SIZE
+from utils.qdrant_utils import collection_exists, create_collection, create_keyword_index
+from utils.sharding import shard_names
+
+HIERARCHICAL_INDEX = os.getenv("HIERARCHICAL_INDEX", "0") == "1"
+HIERARCHICAL_LEVEL = os.getenv("HIERARCHICAL_LEVEL", "source")
+DOC_COLLECTION_NAME = os.getenv("DOC_COLLECTION_NAME") or f"{COLLECTION_NAME}_docs"
+
+def doc_point_id(key):
+    """Stable id so re-ingesting a document replaces its centroid"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{DOC_COLLECTION_NAME}/{key}"))
+
+def prepare_doc_collection(vector_size=VECTOR_SIZE):
+    if not collection_exists(DOC_COLLECTION_NAME):
+        print(f"Creating document collection: {DOC_COLLECTION_NAME}")
+        create_collection(DOC_COLLECTION_NAME, vector_size)
+    # Second-stage filters match on this field in the chunk collection
+    for name in shard_names():
+        create_keyword_index(name, HIERARCHICAL_LEVEL)
+
+class CentroidAccumulator:
+    """Running per-document vector sums, fed one PointBatch at a time"""
+
+    def __init__(self, level=None):
+        self.level = level or HIERARCHICAL_LEVEL
+        self.sums = {}
+        self.counts = {}
+        self.sources = {}
+
+    def add(self, points):
+        import numpy as np
+        if not len(points):
+            return
+        vectors = points.vectors / np.maximum(np.linalg.norm(points.vectors, axis=1, keepdims=True), 1e-12)
+        for record, vector in zip(points.records, vectors):
+            key = getattr(record, self.level)
+            if key not in self.sums:
+                self.sums[key] = np.zeros(vectors.shape[1], dtype=np.float64)
+                self.counts[key] = 0
+                self.sources[key] = record.source
+            self.sums[key] += vector
+            self.counts[key] += 1
+
+    def pop(self, keep=None):
+        """Return centroid points for every document except `keep`, and forget them.
+
+        Items of a JSON file arrive in order, so with content_id granularity
+        everything but the item currently being read can be flushed early.
+        """
+        import numpy as np
+        points = []
+        for key in [k for k in self.sums if k != keep]:
+            total = self.sums.pop(key)
+            centroid = total / max(np.linalg.norm(total), 1e-12)
+            points.append({
+                "id": doc_point_id(key),
+                "vector": centroid.astype(np.float32).tolist(),
+                "payload": {self.level: key, "source": self.sources.pop(key), "chunks": self.counts.pop(key)}
+            })
+        return points
+
+def rebuild_doc_index(client, source=None, batch_size=256):
+    """Compute centroids for every document already in the chunk collection (or only those of `source`)"""
+    from utils.bulk_writer import BulkWriter
+    from utils.point_batch import ChunkRecord, PointBatch
+    from qdrant_client.http import models as rest
+    import numpy as np
+
+    prepare_doc_collection()
+    accumulator = CentroidAccumulator()
+    scroll_filter = None
+    if source is not None:
+        scroll_filter = rest.Filter(must=[rest.FieldCondition(key="source", match=rest.MatchValue(value=source))])
+    for name in shard_names():
+        offset = None
+        while True:
+            points, offset = client.scroll(collection_name=name, limit=batch_size, offset=offset,
+                                           scroll_filter=scroll_filter,
+                                           with_payload=["source", "content_id"], with_vectors=True)
+            records = [ChunkRecord(str(p.id), "", p.payload.get("source"), p.payload.get("content_id"), 0, 0)
+                       for p in points]
+            if records:
+                accumulator.add(PointBatch(records, np.asarray([p.vector for p in points], dtype=np.float32)))
+            if offset is None:
+                break
+
+    with BulkWriter(DOC_COLLECTION_NAME) as writer:
+        writer.write(accumulator.pop())
+        written = writer.close()
+    print(f"Document index {DOC_COLLECTION_NAME}: {written} documents")
+    return written
@@ -1,8 +1,45 @@
 # utils/embed_query.py
+import logging
+import os
+import time
+
 from utils.embedder import get_embedding
+from utils.deadline import LatencyTracker, hedged
+from utils.metrics import timed
+from utils.query_cache import query_embeddings, normalize_question
+
+EMBED_HEDGE = os.getenv("EMBED_HEDGE", "1") == "1"
+# Used until enough calls have been seen to estimate the p95
+EMBED_HEDGE_DELAY = float(os.getenv("EMBED_HEDGE_DELAY", "1.0"))
+EMBED_HEDGE_MIN_DELAY = float(os.getenv("EMBED_HEDGE_MIN_DELAY", "0.05"))
+
+latencies = LatencyTracker()
+logger = logging.getLogger(__name__)
+
+def _timed_embedding(text, deadline):
+    start = time.perf_counter()
+    embedding = get_embedding(text, deadline=deadline)
+    latencies.record(time.perf_counter() - start)
+    return embedding
+
+@timed("embed_query")
+def embed_query(text: str, deadline=None) -> list:
+    """Embed a query text with the 'query:' prefix for better retrieval.
 
-def embed_query(text: str) -> list:
-    """Embed a query text with the 'query:' prefix for better retrieval"""
-    embedding = get_embedding(f"query: {text}")
-    print("Query embedding ready. Vector size:", len(embedding))
-    return embedding
\ No newline at end of file
+    When EMBED_HEDGE is on, a duplicate request is sent if the first one is
+    slower than the recent p95 embedding latency, and the faster reply wins.
+    Embeddings of recent queries are cached (see utils/query_cache.py).
+    """
+    query = f"query: {normalize_question(text)}"
+    cached = query_embeddings.get(query)
+    if cached is not None:
+        return cached
+    if EMBED_HEDGE:
+        p95 = latencies.percentile(95)
+        hedge_after = max(EMBED_HEDGE_MIN_DELAY, p95) if p95 is not None else EMBED_HEDGE_DELAY
+        embedding = hedged(lambda: _timed_embedding(query, deadline), hedge_after, "embed_query", deadline)
+    else:
+        embedding = _timed_embedding(query, deadline)
+    logger.debug("Query embedding ready. Vector size: %d", len(embedding))
+    query_embeddings.put(query, embedding)
+    return embedding
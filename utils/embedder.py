@@ -1,30 +1,34 @@
 # utils/embedder.py
-import requests
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
-MODEL_NAME = "BAAI/bge-small-en-v1.5"
-API_URL = f"https://api-inference.huggingface.co/models/{MODEL_NAME}"
+from utils.config import HUGGINGFACE_API_TOKEN, HF_API_URL as API_URL
+from utils.http_client import get_session
+from utils.rate_limiter import get_governor
+from utils.metrics import timed
+from utils.deadline import request_timeout
 
 headers = {
     "Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}",
     "Content-Type": "application/json"
 }
 
-def get_embedding(text: str):
-    """Get embedding for a single text string"""
-    payload = {"inputs": [text]}  # Text must be in a list
+def _request_embeddings(texts, deadline=None):
+    payload = {"inputs": list(texts)}  # Text must be in a list
 
-    response = requests.post(API_URL, headers=headers, json=payload)
+    response = get_governor("huggingface").call(
+        lambda: get_session("huggingface").post(API_URL, headers=headers, json=payload,
+                                                timeout=request_timeout(deadline)),
+        deadline=deadline
+    )
 
     if response.status_code != 200:
         print("Hugging Face error:", response.text)
         response.raise_for_status()
 
-    result = response.json()
+    return response.json()
+
+@timed("get_embedding")
+def get_embedding(text: str, deadline=None):
+    """Get embedding for a single text string, giving up when `deadline` passes"""
+    result = _request_embeddings([text], deadline)
 
     # Handle the response format
     if isinstance(result, list):
@@ -33,4 +37,16 @@ def get_embedding(text: str):
         else:
             return result  # Return as is if it's already a flat list
     
-    raise ValueError("Unexpected response format from Hugging Face API")
\ No newline at end of file
+    raise ValueError("Unexpected response format from Hugging Face API")
+
+@timed("get_embeddings")
+def get_embeddings(texts, deadline=None):
+    """Embed several texts in one request; returns one vector per text, in order"""
+    if not texts:
+        return []
+    result = _request_embeddings(texts, deadline)
+    if len(texts) == 1 and isinstance(result, list) and result and not isinstance(result[0], list):
+        return [result]
+    if not isinstance(result, list) or len(result) != len(texts) or not all(isinstance(v, list) for v in result):
+        raise ValueError("Unexpected response format from Hugging Face API")
+    return result
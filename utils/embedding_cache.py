@@ -0,0 +1,58 @@
+# utils/embedding_cache.py
+# Persistent cache of chunk embeddings keyed by model and text
+#
+# A re-index re-embeds every stored chunk. With the vectors cached, a run
+# that was interrupted, or one repeated only to change collection settings,
+# reuses them instead of calling the embedding API again.
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+
+from utils.metrics import record_cache
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "embedding_cache.sqlite3"))
+
+def _key(text):
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+class EmbeddingCache:
+    """float32 vectors of one embedding model, looked up by the SHA-1 of the text"""
+
+    def __init__(self, model, path=None):
+        self.model = model
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path or EMBEDDING_CACHE_PATH, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings ("
+                              "model TEXT, key BLOB, vector BLOB, PRIMARY KEY (model, key)) WITHOUT ROWID")
+
+    def get_many(self, texts):
+        """Cached vector (a list of floats) for each text, or None where there is none"""
+        keys = [_key(text) for text in texts]
+        found = {}
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(part))})",
+                    [self.model, *part]
+                ).fetchall()
+                found.update(rows)
+        vectors = []
+        for key in keys:
+            blob = found.get(key)
+            record_cache("embedding", blob is not None)
+            vectors.append(array("f", blob).tolist() if blob is not None else None)
+        return vectors
+
+    def put_many(self, texts, vectors):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                                  [(self.model, _key(text), array("f", vector).tobytes())
+                                   for text, vector in zip(texts, vectors)])
+
+    def close(self):
+        self.conn.close()
@@ -1,4 +1,9 @@
 # utils/formatter.py
+from utils.metrics import timed
+
+MAX_LINKED_TEXTS = 3  # Near-duplicate texts added per retrieved point
+
+@timed("format_context")
 def format_context(results):
     """Format search results into a context string for the LLM"""
     if not results:
@@ -6,7 +11,11 @@ def format_context(results):
     
     chunks = []
     for hit in results:
-        if "payload" in hit and "text" in hit["payload"]:
-            chunks.append(hit["payload"]["text"])
+        payload = hit.get("payload") or {}
+        if "text" in payload:
+            chunks.append(payload["text"])
+        # Near duplicates were linked to this point instead of being embedded
+        linked = [ref["text"] for ref in payload.get("duplicates") or [] if ref.get("text")]
+        chunks.extend(linked[:MAX_LINKED_TEXTS])
     
     return "\n---\n".join(chunks)
\ No newline at end of file
@@ -1,20 +1,51 @@
 # utils/groq_llm.py
 import requests
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from utils.config import GROQ_API_URL, GROQ_API_KEY, GROQ_MODEL
+from utils.http_client import get_session
+from utils.rate_limiter import get_governor, RateLimitError
+from utils.metrics import timed, LLM_TOKENS
+from utils.deadline import request_timeout
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions" 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")  
+FALLBACK_ANSWER = "I cannot answer such questions."
 
-def ask_llama3(context, question):
-    """Ask a question to Llama3 model with the given context"""
+def chat_completion(messages, temperature=0.2, max_tokens=512, deadline=None):
+    """Send a chat completion request to Groq and return the reply text"""
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json"
     }
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    # Rough prompt size (~4 chars per token) plus the completion budget
+    estimated_tokens = sum(len(m["content"]) for m in messages) // 4 + max_tokens
+    governor = get_governor("groq")
+    response = governor.call(
+        lambda: get_session("groq").post(GROQ_API_URL, headers=headers, json=payload,
+                                         timeout=request_timeout(deadline)),
+        tokens=estimated_tokens,
+        deadline=deadline
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    usage = data.get("usage", {})
+    LLM_TOKENS.inc(usage.get("prompt_tokens", 0), kind="prompt")
+    LLM_TOKENS.inc(usage.get("completion_tokens", 0), kind="completion")
+
+    used_tokens = usage.get("total_tokens")
+    if used_tokens and governor.token_bucket:
+        governor.token_bucket.debit(used_tokens - estimated_tokens)
+
+    return data["choices"][0]["message"]["content"].strip()
 
+@timed("ask_llama3")
+def ask_llama3(context, question, deadline=None):
+    """Ask a question to Llama3 model with the given context"""
     prompt = f"""
 You are a helpful assistant specialized in answering based only on the provided context.
 If the answer is not found in the context, respond strictly with: "I cannot answer such questions."
@@ -34,25 +65,26 @@ Question: {question}
 Answer:
 """
 
-    payload = {
-        "model": "llama3-8b-8192",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.2,
-        "max_tokens": 512
-    }
-
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        answer = response.json()["choices"][0]["message"]["content"].strip()
-
-        # Optional: fallback check
-        fallback_message = "I cannot answer such questions."
-        if not answer or fallback_message.lower() in answer.lower():
-            return fallback_message
-
-        return answer
-        
-    except Exception as e:
-        print(f"Error calling Groq API: {str(e)}")
-        return "I cannot answer such questions."
\ No newline at end of file
+        answer = chat_completion([{"role": "user", "content": prompt}], deadline=deadline)
+    except RateLimitError:
+        # Surface throttling and deadlines instead of disguising them as an unanswerable question
+        raise
+    except (requests.ConnectionError, requests.Timeout) as e:
+        # The governor already retried these; once the deadline has passed it is a timeout
+        if deadline:
+            deadline.check("ask_llama3")
+        print(f"Groq request failed after retries: {e}")
+        raise
+    except requests.HTTPError as e:
+        body = e.response.text[:200] if e.response is not None else ""
+        print(f"Groq API error ({GROQ_MODEL}): {e}: {body}")
+        raise
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        print(f"Malformed Groq response ({GROQ_MODEL}): {e!r}")
+        raise
+
+    # The model's own "not in the context" reply (or an empty one) is the only fallback
+    if not answer or FALLBACK_ANSWER.lower() in answer.lower():
+        return FALLBACK_ANSWER
+    return answer
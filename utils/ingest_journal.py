@@ -0,0 +1,132 @@
+# utils/ingest_journal.py
+# Write-ahead journal of ingestion progress, so an interrupted run resumes without re-embedding
+#
+# Each embedded batch (ids, payloads and float32 vectors) is committed here
+# before it is handed to the uploader, together with the file's read cursor.
+# At checkpoints the uploader's barrier confirms everything sent so far is
+# applied; those batches are then marked upserted and their vectors dropped.
+# After a crash, batches still marked "embedded" are upserted again from the
+# journal (point ids are derived from the file and chunk index, so this just
+# overwrites) and chunking continues after the last journalled chunk.
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+INGEST_JOURNAL = os.getenv("INGEST_JOURNAL", "1") == "1"
+INGEST_JOURNAL_PATH = os.getenv("INGEST_JOURNAL_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ingest_journal.sqlite3"))
+JOURNAL_CHECKPOINT_BATCHES = int(os.getenv("JOURNAL_CHECKPOINT_BATCHES", "16"))
+
+# `next_chunk` is the absolute index of the first chunk not yet journalled. For JSON
+# files `item_position` is the json_position of the item that chunk belongs to (or
+# of the last journalled item) and `item_chunks` how many of its chunks are done.
+FileState = namedtuple("FileState", ["status", "fingerprint", "next_chunk", "item_position", "item_chunks", "batches", "stored"])
+
+def file_fingerprint(file_path):
+    """Size and modification time; a file that changes mid-ingest is started over"""
+    stat = os.stat(file_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+class IngestJournal:
+    """Per-file and per-batch ingestion progress for one collection, kept across runs"""
+
+    def __init__(self, collection_name, path=None):
+        self.collection = collection_name
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path or INGEST_JOURNAL_PATH, check_same_thread=False)
+        # Every journal commit must be on disk before the batch is uploaded
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files ("
+                              "collection TEXT, source TEXT, status TEXT, fingerprint TEXT, "
+                              "next_chunk INTEGER, item_position TEXT, item_chunks INTEGER, "
+                              "batches INTEGER, stored INTEGER, updated REAL, "
+                              "PRIMARY KEY (collection, source))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS batches ("
+                              "collection TEXT, source TEXT, batch INTEGER, status TEXT, size INTEGER, "
+                              "records TEXT, vectors BLOB, duplicates TEXT, "
+                              "PRIMARY KEY (collection, source, batch))")
+
+    def state(self, source):
+        """The FileState of `source`, or None if the journal has never seen it"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, fingerprint, next_chunk, item_position, item_chunks, batches, stored "
+                "FROM files WHERE collection = ? AND source = ?", (self.collection, source)
+            ).fetchone()
+        if row is None:
+            return None
+        return FileState(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None, row[4], row[5], row[6])
+
+    def begin(self, source, fingerprint):
+        """Start or resume `source`. Returns (state, stale).
+
+        An unfinished entry with the same fingerprint is resumed as is.
+        Anything else starts from scratch; `stale` is True when the old entry
+        may have left points behind that the caller should delete first.
+        """
+        state = self.state(source)
+        if state is not None and state.status == "in_progress" and state.fingerprint == fingerprint:
+            return state, False
+        stale = state is not None and state.batches > 0
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM batches WHERE collection = ? AND source = ?", (self.collection, source))
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, 'in_progress', ?, 0, NULL, 0, 0, 0, ?)",
+                              (self.collection, source, fingerprint, time.time()))
+        return FileState("in_progress", fingerprint, 0, None, 0, 0, 0), stale
+
+    def record_batch(self, source, points, duplicates, cursor):
+        """Journal an embedded batch and advance the file's cursor in one transaction"""
+        records = json.dumps([[record.id, record.payload()] for record in points.records])
+        with self.lock, self.conn:
+            (batch,) = self.conn.execute("SELECT batches FROM files WHERE collection = ? AND source = ?",
+                                         (self.collection, source)).fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO batches VALUES (?, ?, ?, 'embedded', ?, ?, ?, ?)",
+                              (self.collection, source, batch, len(points), records,
+                               points.vectors.tobytes(), json.dumps(duplicates)))
+            self.conn.execute("UPDATE files SET next_chunk = ?, item_position = ?, item_chunks = ?, "
+                              "batches = batches + 1, updated = ? WHERE collection = ? AND source = ?",
+                              (cursor["next_chunk"], json.dumps(cursor["item_position"]) if cursor["item_position"] else None,
+                               cursor["item_chunks"], time.time(), self.collection, source))
+
+    def pending(self, source, dim):
+        """Yield (PointBatch, duplicates) for batches journalled but not yet confirmed upserted"""
+        import numpy as np
+        from utils.point_batch import ChunkRecord, PointBatch
+
+        with self.lock:
+            rows = self.conn.execute("SELECT records, vectors, duplicates FROM batches "
+                                     "WHERE collection = ? AND source = ? AND status = 'embedded' ORDER BY batch",
+                                     (self.collection, source)).fetchall()
+        for records, vectors, duplicates in rows:
+            records = [ChunkRecord.from_payload(pid, payload) for pid, payload in json.loads(records)]
+            vectors = np.frombuffer(vectors, dtype=np.float32).reshape(len(records), dim).copy()
+            yield PointBatch(records, vectors), [tuple(pair) for pair in json.loads(duplicates)]
+
+    def checkpoint(self, source):
+        """Mark every journalled batch of `source` as upserted and drop its vectors.
+
+        Only call this after the uploader's barrier has returned.
+        """
+        with self.lock, self.conn:
+            (stored,) = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM batches "
+                                          "WHERE collection = ? AND source = ? AND status = 'embedded'",
+                                          (self.collection, source)).fetchone()
+            self.conn.execute("UPDATE batches SET status = 'upserted', records = NULL, vectors = NULL, duplicates = NULL "
+                              "WHERE collection = ? AND source = ? AND status = 'embedded'", (self.collection, source))
+            self.conn.execute("UPDATE files SET stored = stored + ?, updated = ? WHERE collection = ? AND source = ?",
+                              (stored, time.time(), self.collection, source))
+
+    def finish(self, source):
+        """Mark `source` as fully ingested"""
+        self.checkpoint(source)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM batches WHERE collection = ? AND source = ?", (self.collection, source))
+            self.conn.execute("UPDATE files SET status = 'done', updated = ? WHERE collection = ? AND source = ?",
+                              (time.time(), self.collection, source))
+
+    def close(self):
+        self.conn.close()
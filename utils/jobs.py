@@ -0,0 +1,110 @@
+# utils/jobs.py
+# Background ingestion jobs processed by a worker pool
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.profiling import profiled
+
+class IngestionJob:
+    """Progress record for one batch of uploaded files"""
+
+    def __init__(self, files, profile=False):
+        self.id = uuid.uuid4().hex
+        self.files = list(files)
+        self.profile = profile
+        self.profile_id = None
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.counts = {
+            "chunked": 0, "deduplicated": 0, "embedded": 0, "upserted": 0, "failed": 0,
+            "file_done": 0, "file_skipped": 0, "file_failed": 0
+        }
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def update(self, event, value=1):
+        """Progress callback handed to the ingestion pipeline"""
+        with self.lock:
+            if event == "file_failed":
+                self.counts["file_failed"] += 1
+                self.errors.append(value)
+            elif event in self.counts:
+                self.counts[event] += value
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "files": self.files,
+                "chunks_total": self.counts["chunked"],
+                "chunks_deduplicated": self.counts["deduplicated"],
+                "chunks_embedded": self.counts["embedded"],
+                "chunks_upserted": self.counts["upserted"],
+                "chunks_failed": self.counts["failed"],
+                "files_done": self.counts["file_done"],
+                "files_skipped": self.counts["file_skipped"],
+                "files_failed": self.counts["file_failed"],
+                "errors": list(self.errors),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "profile": self.profile_id,
+            }
+
+class IngestionJobQueue:
+    """Runs `handler(files, progress)` for each submitted job on a pool of worker threads.
+
+    Only the most recent `max_jobs` jobs are remembered for status queries.
+    """
+
+    def __init__(self, handler, workers=2, max_jobs=200):
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, files, profile=False):
+        """Queue `files`; with `profile`, the job is profiled (see utils/profiling.py)"""
+        job = IngestionJob(files, profile=profile)
+        with self.lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.max_jobs:
+                self.jobs.popitem(last=False)
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def recent(self, limit=20):
+        with self.lock:
+            return list(self.jobs.values())[-limit:][::-1]
+
+    def _run(self, job):
+        with job.lock:
+            job.status = "running"
+            job.started_at = time.time()
+        session = None
+        try:
+            with profiled(f"ingest-{job.id}", job.profile) as session:
+                if session is not None:
+                    job.profile_id = session.id
+                self.handler(job.files, job.update)
+            status = "completed_with_errors" if job.counts["file_failed"] else "completed"
+        except Exception as e:
+            print(f"Ingestion job {job.id} failed: {e}")
+            job.update("file_failed", str(e))
+            status = "failed"
+        if session is not None and not session.written:
+            job.profile_id = None
+        with job.lock:
+            job.status = status
+            job.finished_at = time.time()
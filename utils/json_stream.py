@@ -0,0 +1,238 @@
+# utils/json_stream.py
+# Incremental reader for webSearchResults JSON exports
+#
+# Only one result item is decoded at a time, so memory stays bounded by the
+# largest single item no matter how big the file is. Structural scanning is
+# done on raw bytes (UTF-8 multi-byte sequences never contain ASCII
+# brackets or quotes), which also gives exact byte offsets for resuming.
+import json
+import re
+
+READ_SIZE = 1 << 20
+
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_SCALAR_END = re.compile(rb'[,\]}\s]')
+_WHITESPACE = b" \t\r\n"
+
+class _Buffer:
+    """Byte window over a file that grows on demand and is compacted between items"""
+
+    def __init__(self, f, base=0, read_size=READ_SIZE):
+        self.f = f
+        self.base = base
+        self.read_size = read_size
+        self.data = b""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.data += chunk
+        return True
+
+    def compact(self):
+        if self.pos > self.read_size:
+            self.base += self.pos
+            self.data = self.data[self.pos:]
+            self.pos = 0
+
+    def offset(self):
+        return self.base + self.pos
+
+    def peek(self):
+        """Next non-whitespace byte (as a one-byte bytes object), or None at EOF"""
+        while True:
+            while self.pos < len(self.data) and self.data[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.data):
+                return self.data[self.pos:self.pos + 1]
+            if not self.fill():
+                return None
+
+    def expect(self, token):
+        found = self.peek()
+        if found != token:
+            raise ValueError(f"Expected {token!r} at byte {self.offset()}, found {found!r}")
+        self.pos += 1
+
+    def read_value(self):
+        """Return the raw bytes of the JSON value starting at the current position"""
+        if self.peek() is None:
+            raise ValueError("Unexpected end of file")
+        start = self.pos
+        end = self._value_end(start)
+        self.pos = end
+        return self.data[start:end]
+
+    def _value_end(self, start):
+        first = self.data[start:start + 1]
+        if first not in (b'"', b"[", b"{"):
+            while True:
+                match = _SCALAR_END.search(self.data, start)
+                if match:
+                    return match.start()
+                if not self.fill():
+                    return len(self.data)
+
+        i, depth, in_string = start, 0, False
+        while True:
+            if in_string:
+                match = _STRING_SPECIAL.search(self.data, i)
+                if match is None or (self.data[match.start()] == 0x5C and match.start() + 1 >= len(self.data)):
+                    i = match.start() if match else len(self.data)
+                    if not self.fill():
+                        raise ValueError("Unterminated string")
+                    continue
+                j = match.start()
+                if self.data[j] == 0x5C:  # Backslash escape: skip the escaped byte
+                    i = j + 2
+                    continue
+                in_string = False
+                i = j + 1
+                if depth == 0:
+                    return i
+                continue
+
+            match = _STRUCTURAL.search(self.data, i)
+            if match is None:
+                i = len(self.data)
+                if not self.fill():
+                    raise ValueError("Unterminated JSON value")
+                continue
+            j = match.start()
+            char = self.data[j]
+            i = j + 1
+            if char == 0x22:  # "
+                in_string = True
+            elif char in (0x5B, 0x7B):  # [ {
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i
+
+def _items(buf, entry, item, index, continuing):
+    """Walk one inner result list, yielding (content, position) for each usable item"""
+    if continuing == "at":
+        pass  # Positioned at the start of an item
+    elif not continuing:
+        buf.expect(b"[")
+        if buf.peek() == b"]":
+            buf.pos += 1
+            return index
+    else:
+        if buf.peek() == b"]":
+            buf.pos += 1
+            return index
+        buf.expect(b",")
+
+    while True:
+        is_object = buf.peek() == b"{"
+        start = buf.offset()
+        raw = buf.read_value()
+        if is_object:
+            data = json.loads(raw)
+            content = data.get("content")
+            if isinstance(content, str):
+                cleaned = content.replace("\n", " ").strip()
+                if cleaned:
+                    yield cleaned, {"offset": buf.offset(), "start": start, "entry": entry, "item": item, "index": index}
+                    index += 1
+        item += 1
+        buf.compact()
+
+        token = buf.peek()
+        buf.pos += 1
+        if token == b"]":
+            return index
+        if token != b",":
+            raise ValueError(f"Malformed result list at byte {buf.offset() - 1}")
+
+def _entries(buf, entry, index, continuing):
+    """Walk the webSearchResults array of result lists"""
+    if not continuing:
+        buf.expect(b"[")
+        if buf.peek() == b"]":
+            buf.pos += 1
+            return index
+    else:
+        if buf.peek() == b"]":
+            buf.pos += 1
+            return index
+        buf.expect(b",")
+
+    while True:
+        if buf.peek() == b"[":
+            index = yield from _items(buf, entry, 0, index, continuing=False)
+        else:
+            buf.read_value()
+        entry += 1
+        buf.compact()
+
+        token = buf.peek()
+        buf.pos += 1
+        if token == b"]":
+            return index
+        if token != b",":
+            raise ValueError(f"Malformed webSearchResults array at byte {buf.offset() - 1}")
+
+def _members(buf, index, continuing):
+    """Walk the top-level object, descending only into webSearchResults"""
+    if not continuing:
+        if buf.peek() != b"{":
+            return index
+        buf.pos += 1
+        if buf.peek() == b"}":
+            return index
+    else:
+        if buf.peek() == b"}":
+            return index
+        buf.expect(b",")
+
+    while True:
+        key = json.loads(buf.read_value())
+        buf.expect(b":")
+        if key == "webSearchResults" and buf.peek() == b"[":
+            index = yield from _entries(buf, 0, index, continuing=False)
+        else:
+            buf.read_value()
+        buf.compact()
+
+        token = buf.peek()
+        buf.pos += 1
+        if token == b"}":
+            return index
+        if token != b",":
+            raise ValueError(f"Malformed top-level object at byte {buf.offset() - 1}")
+
+def iter_web_search_contents(file_path, resume=None, inclusive=False, read_size=READ_SIZE):
+    """Yield (content, position) for every non-empty `content` in webSearchResults.
+
+    `position` holds the byte offsets of the item ("start", and "offset" just
+    past it), its entry/item coordinates and its ordinal "index" among
+    yielded items. Passing a position back as `resume` continues with the
+    item after it (or with that item itself when `inclusive`) without
+    re-reading the start of the file.
+    """
+    with open(file_path, "rb") as f:
+        if resume is None:
+            buf = _Buffer(f, 0, read_size)
+            yield from _members(buf, 0, continuing=False)
+            return
+
+        if inclusive:
+            f.seek(resume["start"])
+            buf = _Buffer(f, resume["start"], read_size)
+            index = yield from _items(buf, resume["entry"], resume["item"], resume["index"], continuing="at")
+        else:
+            f.seek(resume["offset"])
+            buf = _Buffer(f, resume["offset"], read_size)
+            index = yield from _items(buf, resume["entry"], resume["item"] + 1, resume["index"] + 1, continuing=True)
+        index = yield from _entries(buf, resume["entry"] + 1, index, continuing=True)
+        yield from _members(buf, index, continuing=True)
@@ -0,0 +1,177 @@
+# utils/metrics.py
+# In-process metrics with Prometheus text exposition
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def totals(self):
+        """{label values: (sum, count)} snapshot"""
+        with self.lock:
+            return {key: (state[1], state[2]) for key, state in self.values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self.values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self.lock:
+            metrics = list(self.metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = Histogram("rag_stage_duration_seconds", "Time spent in each pipeline stage", ["stage"])
+STAGE_IN_FLIGHT = Gauge("rag_stage_in_flight", "Calls currently executing in each pipeline stage", ["stage"])
+STAGE_ERRORS = Counter("rag_stage_errors_total", "Exceptions raised by each pipeline stage", ["stage"])
+CHUNKS = Counter("rag_ingest_chunks_total", "Chunks processed by ingestion, by step", ["step"])
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+API_RETRIES = Counter("rag_api_retries_total", "External API calls retried by the rate governor", ["provider"])
+API_THROTTLED = Counter("rag_api_throttled_total", "HTTP 429 responses from external APIs", ["provider"])
+API_IN_FLIGHT = Gauge("rag_api_in_flight", "External API calls currently in flight", ["provider"])
+API_CONCURRENCY_LIMIT = Gauge("rag_api_concurrency_limit", "Current adaptive concurrency limit", ["provider"])
+STARTUP_SECONDS = Gauge("rag_startup_seconds", "Process start-up cost by phase", ["phase"])
+WARMUP_SECONDS = Gauge("rag_warmup_seconds", "Time taken by each warm-up step", ["step"])
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens reported by the provider", ["kind"])
+HEDGED_REQUESTS = Counter("rag_hedged_requests_total", "Hedged duplicate requests by stage and outcome", ["stage", "outcome"])
+DEADLINE_EXCEEDED = Counter("rag_deadline_exceeded_total", "Query stages that ran out of time", ["stage"])
+DEGRADED_ANSWERS = Counter("rag_degraded_answers_total", "Answers returned without generation, by reason", ["reason"])
+SHARDS = Gauge("rag_shards", "Collections the chunk index is sharded over")
+SHARD_SEARCH_SECONDS = Histogram("rag_shard_search_seconds", "Search latency per shard collection", ["shard"])
+SHARDS_SEARCHED = Counter("rag_shards_searched_total", "Shard searches issued, by whether the filter pruned the fan-out", ["fanout"])
+PREWARMED_QUERIES = Counter("rag_prewarmed_queries_total", "Logged questions replayed to pre-warm the query caches", ["reason"])
+
+def timed(stage):
+    """Decorator recording latency, in-flight calls and errors for a pipeline stage"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            STAGE_IN_FLIGHT.inc(stage=stage)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.inc(stage=stage)
+                raise
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+                STAGE_IN_FLIGHT.dec(stage=stage)
+        return wrapper
+    return decorator
+
+@contextmanager
+def stage_timer(stage):
+    """Context-manager form of `timed` for inline blocks"""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,103 @@
+# utils/pdf_extract.py
+# Page-parallel PDF text extraction that streams pages in order
+#
+# "fast" mode uses pypdfium2 (installed alongside pdfplumber). "layout" mode
+# uses pdfplumber's layout-aware extraction, which is much slower but copes
+# better with multi-column and oddly encoded files. Fast mode falls back to
+# layout mode for any page range it cannot read.
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_EXTRACT_MODE = os.getenv("PDF_EXTRACT_MODE", "fast")
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(8, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+PAGES_PER_TASK = 16
+
+def _extract_range_fast(file_path, start, end):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages = []
+        for index in range(start, end):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            pages.append((index + 1, textpage.get_text_range()))
+            textpage.close()
+            page.close()
+        return pages
+    finally:
+        pdf.close()
+
+def _extract_range_layout(file_path, start, end):
+    import pdfplumber
+    with pdfplumber.open(file_path, pages=list(range(start + 1, end + 1))) as pdf:
+        return [(page.page_number, page.extract_text() or "") for page in pdf.pages]
+
+def _extract_range(file_path, start, end, mode):
+    if mode == "fast":
+        try:
+            return _extract_range_fast(file_path, start, end)
+        except Exception as e:
+            print(f"Fast PDF extraction failed for pages {start + 1}-{end} of {file_path}, using layout mode: {e}")
+    return _extract_range_layout(file_path, start, end)
+
+def count_pages(file_path, mode=None):
+    mode = mode or PDF_EXTRACT_MODE
+    if mode == "fast":
+        try:
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception:
+            pass
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+def iter_pdf_pages(file_path, mode=None, workers=None):
+    """Yield (page_number, text) for every page, in page order.
+
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages are split into page
+    ranges that are extracted by a pool of worker processes. Pages are
+    yielded as soon as their range is done, so chunking and embedding can
+    start before the whole file has been read.
+    """
+    mode = mode or PDF_EXTRACT_MODE
+    workers = workers or PDF_WORKERS
+    total = count_pages(file_path, mode)
+    ranges = [(start, min(start + PAGES_PER_TASK, total)) for start in range(0, total, PAGES_PER_TASK)]
+
+    if workers <= 1 or total < PDF_PARALLEL_MIN_PAGES:
+        for start, end in ranges:
+            yield from _extract_range(file_path, start, end, mode)
+        return
+
+    # Spawned workers do not inherit the parent's threads, locks or open
+    # clients, which a forked copy of the multi-threaded app would
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as executor:
+        futures = [executor.submit(_extract_range, file_path, start, end, mode) for start, end in ranges]
+        for future in futures:
+            yield from future.result()
+
+def chunk_pages(pages, chunk_size=300):
+    """Word-based chunking across page boundaries.
+
+    Yields (chunk, first_page, last_page) so each chunk records the pages it spans.
+    """
+    words = []
+    word_pages = []
+    for page_number, text in pages:
+        page_words = text.split()
+        words.extend(page_words)
+        word_pages.extend([page_number] * len(page_words))
+        while len(words) >= chunk_size:
+            yield " ".join(words[:chunk_size]), word_pages[0], word_pages[chunk_size - 1]
+            del words[:chunk_size]
+            del word_pages[:chunk_size]
+    if words:
+        yield " ".join(words), word_pages[0], word_pages[-1]
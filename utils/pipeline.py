@@ -0,0 +1,605 @@
+# utils/pipeline.py
+# The RAG pipeline engine behind main.py, allinone.py, rag_langraph.py and the Flask app
+#
+# Ingestion: extract, chunk, dedup, embed and upsert files, resumably.
+# Querying: embed the question, retrieve, and answer within a deadline.
+# The embedder, vector store, LLM and extractor come from utils/backends.py.
+# pdfplumber, python-docx and qdrant_client are imported on first use so
+# query-only processes (like the Flask app answering questions) start fast
+import logging
+import os
+from utils.config import COLLECTION_NAME, VECTOR_SIZE
+from utils.backends import get_backend
+from utils.qdrant_utils import create_collection, create_source_index, create_keyword_index, collection_exists, get_collection_info, set_payload, delete_points
+import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from utils.pdf_extract import chunk_pages
+from utils.dedup import DedupIndex, find_duplicates
+from utils.bulk_writer import get_client
+from utils.doc_index import HIERARCHICAL_INDEX, DOC_COLLECTION_NAME, CentroidAccumulator, prepare_doc_collection, rebuild_doc_index
+from utils.sharding import shard_names, shard_for, retrieve_from_shards
+from utils.text_extract import cleanup_text_cache
+from utils.ingest_journal import INGEST_JOURNAL, JOURNAL_CHECKPOINT_BATCHES, IngestJournal, file_fingerprint
+import threading
+
+# For retrieving and asking a question
+from utils.formatter import format_context
+from utils.query_cache import answers, retrieval_results, collection_changed, generation, normalize_question
+from utils.query_log import get_query_log
+from utils.prewarm import schedule_prewarm
+from utils.metrics import timed, stage_timer, CHUNKS, STAGE_SECONDS, DEGRADED_ANSWERS
+from utils.deadline import Deadline
+from utils.rate_limiter import DeadlineExceeded, RateLimitError
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "upload_here")
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"  # Exact repeats only unless DEDUP_NEAR=1
+QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+LLM_MIN_BUDGET = float(os.getenv("LLM_MIN_BUDGET_SECONDS", "2"))
+DEGRADED_PASSAGE_CHARS = 500
+
+logger = logging.getLogger(__name__)
+
+_dedup_index = None
+_dedup_lock = threading.Lock()
+_journal = None
+_live_queries = 0
+_live_lock = threading.Lock()
+
+@timed("extract")
+def load_text_from_file(file_path, resume_from=None, inclusive=False):
+    """Content items of a file from the configured extractor (see utils/text_extract.py)"""
+    return get_backend("extractor").load(file_path, resume_from=resume_from, inclusive=inclusive)
+
+def chunk_text(text, chunk_size=300):
+    words = text.split()
+    for i in range(0, len(words), chunk_size):
+        yield " ".join(words[i:i + chunk_size])
+
+def iter_chunks(contents):
+    """Yield (content_idx, relative_idx, chunk, extra_payload) for every chunk.
+
+    A content item is a string, a {"text", "position"} dict from the JSON
+    stream reader, or an iterable of (page_number, text) pairs; JSON items
+    keep their position in the file and page-streamed items record the pages
+    each chunk spans.
+    """
+    for content_idx, content in enumerate(contents):
+        if isinstance(content, str):
+            for relative_idx, chunk in enumerate(chunk_text(content)):
+                yield content_idx, relative_idx, chunk, {}
+        elif isinstance(content, dict):
+            position = content["position"]
+            for relative_idx, chunk in enumerate(chunk_text(content["text"])):
+                yield position["index"], relative_idx, chunk, {"json_position": position}
+        else:
+            for relative_idx, (chunk, first_page, last_page) in enumerate(chunk_pages(content)):
+                yield content_idx, relative_idx, chunk, {"page_start": first_page, "page_end": last_page}
+
+def chunk_point_id(filename, absolute_index):
+    """Stable point id, so re-upserting a chunk after an interrupted run overwrites it"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{filename}#{absolute_index}"))
+
+def iter_point_batches(contents, filename, progress=None, batch_size=None, dedup=None, known_ids=None,
+                       start_index=0, skip=0):
+    """Chunk and embed `contents`, yielding (PointBatch, duplicates, fingerprints, cursor) per batch.
+
+    Only one batch of at most `batch_size` chunks is held in memory at a
+    time, so a file of any size can be ingested by upserting each batch as
+    it arrives. With a `dedup` index, chunks that repeat a stored point (or
+    an earlier chunk of the batch) are not embedded; they come back in
+    `duplicates` as (canonical_point_id, reference) pairs, and `fingerprints`
+    holds (point_id, fingerprint) for the new points. `known_ids` are ids
+    already written but perhaps not yet visible; dedup hits on them are kept.
+    The first `skip` chunks are dropped unembedded and numbering starts at
+    `start_index`; `cursor` says where to pick up again after the batch
+    (see `IngestJournal.record_batch`).
+    """
+    # Imported here so query-only processes don't pay for NumPy at start-up
+    import numpy as np
+    from utils.point_batch import ChunkRecord, PointBatch
+
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    embedder = get_backend("embedder")
+    source = islice(iter_chunks(contents), skip, None)
+    absolute_chunk_index = start_index
+    chunk_seconds = 0.0
+
+    # Sub-batch embedding requests run in parallel; the backend's rate limiter keeps them within limits
+    with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY) as executor:
+        while True:
+            start = time.perf_counter()
+            chunks = list(islice(source, batch_size))
+            chunk_seconds += time.perf_counter() - start
+            if not chunks:
+                break
+            CHUNKS.inc(len(chunks), step="chunked")
+            if progress:
+                progress("chunked", len(chunks))
+
+            records = []
+            for content_idx, relative_idx, chunk, extra_payload in chunks:
+                records.append(ChunkRecord(chunk_point_id(filename, absolute_chunk_index), chunk, filename, f"{filename}_content_{content_idx+1}",
+                                           relative_idx, absolute_chunk_index, extra_payload))
+                absolute_chunk_index += 1
+            _, last_relative_idx, _, last_extra = chunks[-1]
+            cursor = {"next_chunk": absolute_chunk_index, "item_position": last_extra.get("json_position"),
+                      "item_chunks": last_relative_idx + 1}
+
+            duplicates = []
+            fingerprints = []
+            if dedup is not None:
+                with stage_timer("dedup"):
+                    all_fingerprints, canonical, exact = find_duplicates(
+                        dedup, [record.text for record in records], [record.id for record in records],
+                        existing_ids=lambda hit_ids: existing_point_ids(hit_ids, known_ids)
+                    )
+                unique = []
+                for record, fp, canonical_id, is_exact in zip(records, all_fingerprints, canonical, exact):
+                    if canonical_id is None:
+                        unique.append(record)
+                        fingerprints.append((record.id, fp))
+                    elif is_exact:
+                        duplicates.append((canonical_id, record.reference()))
+                    else:
+                        # A near duplicate is not embedded, so keep its own text on the canonical point
+                        duplicates.append((canonical_id, {**record.reference(), "text": record.text}))
+                records = unique
+                if duplicates:
+                    CHUNKS.inc(len(duplicates), step="deduplicated")
+                    if progress:
+                        progress("deduplicated", len(duplicates))
+
+            # Vectors go straight into one float32 block; wire formats are only built at upload time
+            vectors = np.empty((len(records), VECTOR_SIZE), dtype=np.float32)
+            with stage_timer("embed_chunks"):
+                texts = [record.text for record in records]
+                parts = [texts[start:start + EMBED_BATCH_SIZE] for start in range(0, len(texts), EMBED_BATCH_SIZE)]
+                embeddings = (embedding for part in executor.map(embedder.embed_many, parts) for embedding in part)
+                for row, embedding in enumerate(embeddings):
+                    if len(embedding) != VECTOR_SIZE:
+                        raise ValueError(f"Invalid embedding length: {len(embedding)}, expected {VECTOR_SIZE}")
+                    vectors[row] = embedding
+            points = PointBatch(records, vectors)
+            CHUNKS.inc(len(points), step="embedded")
+            if progress:
+                progress("embedded", len(points))
+            yield points, duplicates, fingerprints, cursor
+
+    # Time spent producing chunks (including streamed extraction) is the "chunk" stage
+    STAGE_SECONDS.observe(chunk_seconds, stage="chunk")
+
+def embed_chunks(contents, filename, progress=None):
+    return [point for points, _, _, _ in iter_point_batches(contents, filename, progress) for point in points.to_dicts()]
+
+def existing_point_ids(point_ids, known_ids=None):
+    known = {pid for pid in point_ids if known_ids and pid in known_ids}
+    unknown = [pid for pid in point_ids if pid not in known]
+    if unknown:
+        known.update(str(point["id"]) for points in retrieve_from_shards(unknown, with_payload=False).values()
+                     for point in points)
+    return known
+
+def get_dedup_index():
+    """Shared dedup index for COLLECTION_NAME, or None when DEDUP_ENABLED is off"""
+    global _dedup_index
+    if not DEDUP_ENABLED:
+        return None
+    with _dedup_lock:
+        if _dedup_index is None:
+            _dedup_index = DedupIndex(COLLECTION_NAME)
+        return _dedup_index
+
+def get_journal():
+    """Shared ingestion journal for COLLECTION_NAME, or None when INGEST_JOURNAL is off"""
+    global _journal
+    if not INGEST_JOURNAL:
+        return None
+    with _dedup_lock:
+        if _journal is None:
+            _journal = IngestJournal(COLLECTION_NAME)
+        return _journal
+
+def should_ingest(filename, in_collection):
+    """Whether a file still needs ingesting; `in_collection()` checks Qdrant for its points.
+
+    Unfinished files in the journal are resumed. Finished ones are skipped
+    unless their points have gone (e.g. the collection was recreated).
+    Files the journal has never seen fall back to the collection check.
+    """
+    journal = get_journal()
+    state = journal.state(filename) if journal else None
+    if state is not None and state.status == "in_progress":
+        return True
+    return not in_collection()
+
+def link_duplicates(duplicates):
+    """Record duplicate chunks on their canonical points as extra sources.
+
+    Each canonical point gets a `sources` list (its own source plus every
+    file it was repeated in) and a `duplicates` list of the skipped chunks.
+    Returns the number of duplicates linked.
+    """
+    if not duplicates:
+        return 0
+    grouped = {}
+    for canonical_id, reference in duplicates:
+        grouped.setdefault(canonical_id, []).append(reference)
+
+    # Read-modify-write of the lists, so serialise it across ingestion workers
+    with _dedup_lock:
+        # Canonical points can live in any shard
+        stored = {str(point["id"]): (collection, point.get("payload") or {})
+                  for collection, points in retrieve_from_shards(
+                      list(grouped), with_payload={"include": ["source", "sources", "duplicates"]}).items()
+                  for point in points}
+        for canonical_id, references in grouped.items():
+            if canonical_id not in stored:
+                continue
+            collection, payload = stored[canonical_id]
+            sources = list(payload.get("sources") or [payload.get("source")])
+            linked = list(payload.get("duplicates") or [])
+            for reference in references:
+                if reference not in linked:
+                    linked.append(reference)
+                if reference["source"] not in sources:
+                    sources.append(reference["source"])
+            set_payload(collection, [canonical_id], {"sources": sources, "duplicates": linked})
+    return len(duplicates)
+
+def get_all_sources_in_collection(client, collection_name):
+    """Get all unique sources in the collection by scrolling through all points"""
+    existing_sources = set()
+    offset = None
+    
+    while True:
+        try:
+            scroll_result = client.scroll(
+                collection_name=collection_name,
+                limit=100,
+                offset=offset,
+                with_payload=True
+            )
+            
+            points, next_offset = scroll_result
+            
+            for point in points:
+                if "source" in point.payload:
+                    existing_sources.add(point.payload["source"])
+                # Files whose chunks were all duplicates only appear as extra sources
+                existing_sources.update(point.payload.get("sources") or [])
+            
+            if next_offset is None:
+                break
+            offset = next_offset
+            
+        except Exception as e:
+            print(f"Error scrolling collection: {e}")
+            break
+    
+    return existing_sources
+
+def source_exists(client, collection_name, filename):
+    """Check whether any point in the collection came from this file"""
+    from qdrant_client.http import models as rest
+    points, _ = client.scroll(
+        collection_name=collection_name,
+        scroll_filter=rest.Filter(
+            should=[
+                rest.FieldCondition(key="source", match=rest.MatchValue(value=filename)),
+                rest.FieldCondition(key="sources", match=rest.MatchValue(value=filename))
+            ]
+        ),
+        limit=1
+    )
+    return bool(points)
+
+def prepare_collection():
+    """Create the collection (every shard of it) and the 'source' indexes if they are missing"""
+    # Check if collection exists, if not create it
+    for name in shard_names():
+        if not collection_exists(name):
+            print(f"Creating collection: {name}")
+            create_collection(name, VECTOR_SIZE)
+        else:
+            print(f"Collection {name} already exists")
+    
+    if HIERARCHICAL_INDEX:
+        prepare_doc_collection()
+
+    # Create index for source field (this is idempotent - won't fail if index already exists)
+    print("Creating index for 'source' field...")
+    try:
+        for name in shard_names():
+            create_source_index(name)
+            create_keyword_index(name, "sources")
+        print("Index created successfully")
+    except Exception as e:
+        print(f"Index creation info: {e}")  # This might fail if index already exists, which is okay
+
+@timed("ingest_file")
+def ingest_file(file_path, filename=None, progress=None):
+    """Extract, embed and upsert a single file. Returns the number of points stored by this call.
+
+    Points are embedded in batches of INGEST_BATCH_SIZE and handed to the
+    vector store's writer (a BulkWriter for Qdrant), which uploads them in
+    parallel and returns only once they are all searchable.
+    Chunks that duplicate an existing point are linked to it instead (see
+    `link_duplicates`) and do not count towards the returned number. With
+    HIERARCHICAL_INDEX=1 the file's document centroids are also written.
+    `progress(event, count)` is called with "chunked", "embedded" and "upserted"
+    events. With INGEST_JOURNAL=1 every batch is journalled before upload, so
+    a file interrupted part-way is resumed where it stopped: journalled
+    batches are upserted again without re-embedding and only the remaining
+    chunks are read and embedded. The points go to the shard picked by the
+    file name.
+    """
+    filename = filename or os.path.basename(file_path)
+    collection = shard_for(filename)
+    journal = get_journal()
+    state, stale = journal.begin(filename, file_fingerprint(file_path)) if journal else (None, False)
+    if stale:
+        # The file changed since an unfinished run; its old chunks may not line up with the new ones
+        print(f"{filename} changed since it was last ingested, starting over")
+        delete_points(collection, {"must": [{"key": "source", "match": {"value": filename}}]})
+    resuming = state is not None and state.batches > 0
+    print(f"Processing: {filename}" + (f" (resuming at chunk {state.next_chunk})" if resuming else ""))
+
+    if resuming and state.item_position:
+        # JSON: re-read from the item the last journalled chunk came from
+        contents = load_text_from_file(file_path, resume_from=state.item_position, inclusive=True)
+        skip = state.item_chunks
+    else:
+        contents = load_text_from_file(file_path)
+        skip = state.next_chunk if resuming else 0
+    if not contents:
+        print(f"No content found in {filename}, skipping...")
+        if journal:
+            journal.finish(filename)
+        return 0
+
+    dedup = get_dedup_index()
+    written_ids = set()
+    duplicates = []
+
+    def written(count):
+        CHUNKS.inc(count, step="upserted")
+        if progress:
+            progress("upserted", count)
+
+    # A resumed file's earlier centroids were never written, so they are rebuilt from Qdrant at the end
+    centroids = CentroidAccumulator() if HIERARCHICAL_INDEX and not resuming else None
+    doc_points = []
+    linked = 0
+
+    store = get_backend("vector_store")
+    with store.writer(collection, on_written=written) as writer:
+        def checkpoint():
+            nonlocal duplicates, linked
+            writer.flush()
+            journal.checkpoint(filename)
+            linked += link_duplicates(duplicates)
+            duplicates = []
+
+        if resuming:
+            for points, batch_duplicates in journal.pending(filename, VECTOR_SIZE):
+                writer.write(points)
+                written_ids.update(points.ids)
+                duplicates.extend(batch_duplicates)
+            checkpoint()
+
+        since_checkpoint = 0
+        for points, batch_duplicates, fingerprints, cursor in iter_point_batches(
+                contents, filename, progress=progress, dedup=dedup, known_ids=written_ids,
+                start_index=state.next_chunk if resuming else 0, skip=skip):
+            if journal:
+                journal.record_batch(filename, points, batch_duplicates, cursor)
+            writer.write(points)
+            written_ids.update(points.ids)
+            # A failed upload leaves stale entries here; lookups drop them once the points are found missing
+            if dedup is not None and fingerprints:
+                dedup.add(fingerprints)
+            duplicates.extend(batch_duplicates)
+            if centroids is not None and len(points):
+                centroids.add(points)
+                doc_points.extend(centroids.pop(keep=getattr(points.records[-1], centroids.level)))
+            since_checkpoint += 1
+            if journal and since_checkpoint >= JOURNAL_CHECKPOINT_BATCHES:
+                checkpoint()
+                since_checkpoint = 0
+        stored = writer.close()
+
+    # Document centroids are written once their chunks are searchable
+    if centroids is not None:
+        doc_points.extend(centroids.pop())
+        with store.writer(DOC_COLLECTION_NAME) as doc_writer:
+            doc_writer.write(doc_points)
+    elif HIERARCHICAL_INDEX:
+        rebuild_doc_index(get_client(), source=filename)
+
+    # Canonical points may be in batches that were only applied at the barrier, so link afterwards
+    linked += link_duplicates(duplicates)
+    if journal:
+        journal.finish(filename)
+
+    if not stored and not linked:
+        print(f"No content found in {filename}, skipping...")
+        return 0
+    print(f"Uploaded {stored} vectors for {filename}" + (f", linked {linked} duplicate chunks" if linked else "") + "\n")
+    return stored
+
+def ingest_files(filenames, progress=None):
+    """Ingest the given files from the upload folder, skipping ones already in the collection.
+
+    Files left unfinished by an earlier run are resumed (see `should_ingest`).
+
+    Besides the per-chunk events of `ingest_file`, `progress` receives
+    "file_done", "file_skipped", "failed" (chunks lost) and "file_failed"
+    (with an error message).
+    """
+    progress = progress or (lambda event, value: None)
+    prepare_collection()
+
+    client = get_client()
+    changed = False
+
+    for filename in filenames:
+        if not should_ingest(filename, lambda: any(source_exists(client, name, filename) for name in shard_names())):
+            print(f"Skipping '{filename}' — already uploaded.\n")
+            progress("file_skipped", 1)
+            continue
+        changed = True
+
+        counts = {"chunked": 0, "deduplicated": 0, "upserted": 0}
+
+        def file_progress(event, count):
+            if event in counts:
+                counts[event] += count
+            progress(event, count)
+
+        try:
+            ingest_file(os.path.join(UPLOAD_FOLDER, filename), filename, progress=file_progress)
+            progress("file_done", 1)
+        except Exception as e:
+            print(f"Error processing {filename}: {str(e)}\n")
+            # Replayed journal batches are upserted without being chunked again
+            lost = max(0, counts["chunked"] - counts["deduplicated"] - counts["upserted"])
+            CHUNKS.inc(lost, step="failed")
+            progress("failed", lost)
+            progress("file_failed", f"{filename}: {e}")
+
+    if changed:
+        collection_updated()
+
+def collection_updated():
+    """Drop cached retrieval results and answers, then re-warm them from the query log in the background"""
+    collection_changed()
+    schedule_prewarm("ingest")
+
+def run_ingestion_pipeline():
+    prepare_collection()
+
+    # Check if upload folder exists
+    if not os.path.exists(UPLOAD_FOLDER):
+        print(f"Folder '{UPLOAD_FOLDER}' not found.")
+        return
+
+    # Shared Qdrant client
+    client = get_client()
+
+    # Get existing sources using the alternative method
+    print("Checking for existing files...")
+    existing_sources = set()
+    for name in shard_names():
+        existing_sources |= get_all_sources_in_collection(client, name)
+    print(f"Found {len(existing_sources)} existing files in collection")
+
+    removed = cleanup_text_cache()
+    if removed:
+        print(f"Removed {removed} stale entries from the text cache")
+
+    # Collections ingested before the document index was enabled get their centroids backfilled
+    if HIERARCHICAL_INDEX and existing_sources and not (get_collection_info(DOC_COLLECTION_NAME) or {}).get("points_count"):
+        rebuild_doc_index(client)
+
+    # Process files in upload folder
+    changed = False
+    for filename in os.listdir(UPLOAD_FOLDER):
+        if not get_backend("extractor").supports(filename):
+            continue
+
+        if not should_ingest(filename, lambda: filename in existing_sources):
+            print(f"Skipping '{filename}' — already uploaded.\n")
+            continue
+
+        # Process and upload the file
+        changed = True
+        try:
+            ingest_file(os.path.join(UPLOAD_FOLDER, filename), filename)
+        except Exception as e:
+            print(f"Error processing {filename}: {str(e)}\n")
+
+    if changed:
+        collection_updated()
+
+# For the query asked by the user
+def degraded_answer(results, reason):
+    """Answer with the retrieved passages when there is no time (or capacity) left to generate"""
+    DEGRADED_ANSWERS.inc(reason=reason)
+    passages = [hit["payload"] for hit in results if "text" in hit.get("payload", {})]
+    if not passages:
+        return "I couldn't find an answer in time. Please try again."
+    lines = [f"[{i}] ({payload.get('source', 'unknown')}) {payload['text'][:DEGRADED_PASSAGE_CHARS]}"
+             for i, payload in enumerate(passages, start=1)]
+    return "I couldn't generate an answer in time. These are the most relevant passages I found:\n\n" + "\n\n".join(lines)
+
+def live_queries():
+    """Questions from users (not pre-warming) currently being answered"""
+    return _live_queries
+
+@timed("rag_pipeline")
+def run_rag_pipeline(user_question, timeout=None, record=True):
+    """Answer a question within `timeout` seconds (QUERY_TIMEOUT_SECONDS by default).
+
+    The deadline is shared by the embedding, search and LLM stages. If less
+    than LLM_MIN_BUDGET_SECONDS is left after retrieval, or generation runs
+    out of time or is throttled, the retrieved passages are returned instead.
+    Answers, retrieval results and query embeddings are cached (see
+    utils/query_cache.py). With `record` the question is added to the query
+    log and counts as live traffic; pre-warming passes record=False.
+    """
+    global _live_queries
+    question = normalize_question(user_question)
+    if not record:
+        return _answer(question, timeout)
+    log = get_query_log()
+    if log is not None:
+        log.record(question)
+    with _live_lock:
+        _live_queries += 1
+    try:
+        return _answer(question, timeout)
+    finally:
+        with _live_lock:
+            _live_queries -= 1
+
+def _answer(user_question, timeout):
+    key = (generation(), user_question)
+    cached = answers.get(key)
+    if cached is not None:
+        return cached
+    deadline = Deadline(timeout or QUERY_TIMEOUT)
+    llm = get_backend("llm")
+    try:
+        results = retrieval_results.get(key)
+        if results is None:
+            query_vector = get_backend("embedder").embed_query(user_question, deadline=deadline)
+            results = get_backend("vector_store").retrieve(query_vector, deadline=deadline)
+            # Failed searches come back empty; don't remember those
+            if results:
+                retrieval_results.put(key, results)
+        if deadline.remaining() < LLM_MIN_BUDGET:
+            return degraded_answer(results, "llm_budget")
+        context = format_context(results)
+        try:
+            answer = llm.answer(context, user_question, deadline=deadline)
+        except DeadlineExceeded:
+            return degraded_answer(results, "llm_timeout")
+        except RateLimitError:
+            return degraded_answer(results, "llm_throttled")
+        logger.debug("Retrieved context for %r:\n%s", user_question, context)
+        # "Cannot answer" may change once more documents are ingested, so only real answers are cached
+        if answer != getattr(llm, "fallback_answer", None):
+            answers.put(key, answer)
+        return answer
+    except DeadlineExceeded as e:
+        print(f"RAG pipeline ran out of time: {str(e)}")
+        DEGRADED_ANSWERS.inc(reason="retrieval_timeout")
+        return "Sorry, answering this question took too long. Please try again."
+    except Exception as e:
+        print(f"Error in RAG pipeline: {str(e)}")
+        return "I encountered an error while processing your question."
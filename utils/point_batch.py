@@ -0,0 +1,83 @@
+# utils/point_batch.py
+# Compact in-memory representation of chunks and their vectors during ingestion
+#
+# A chunk is a __slots__ record instead of a dict with a nested payload dict,
+# and a batch keeps its vectors as one contiguous float32 array instead of a
+# Python list of floats per point. Wire formats (JSON dicts or qdrant_client
+# PointStructs) are only built at upload time.
+import numpy as np
+
+class ChunkRecord:
+    """One chunk's id and payload fields"""
+    __slots__ = ("id", "text", "source", "content_id", "chunk_index", "absolute_index", "extra")
+
+    def __init__(self, id, text, source, content_id, chunk_index, absolute_index, extra=None):
+        self.id = id
+        self.text = text
+        self.source = source
+        self.content_id = content_id
+        self.chunk_index = chunk_index
+        self.absolute_index = absolute_index
+        self.extra = extra or None
+
+    @classmethod
+    def from_payload(cls, id, payload):
+        """Inverse of `payload()`; unknown keys become `extra`"""
+        payload = dict(payload)
+        return cls(id, payload.pop("text"), payload.pop("source"), payload.pop("content_id"),
+                   payload.pop("chunk_index"), payload.pop("absolute_index"), payload)
+
+    def payload(self):
+        payload = {
+            "text": self.text,
+            "source": self.source,
+            "content_id": self.content_id,
+            "chunk_index": self.chunk_index,
+            "absolute_index": self.absolute_index,
+        }
+        if self.extra:
+            payload.update(self.extra)
+        return payload
+
+    def reference(self):
+        """The fields used to point back at this chunk from another point"""
+        return {"source": self.source, "content_id": self.content_id, "chunk_index": self.chunk_index}
+
+class PointBatch:
+    """Chunk records plus their vectors as a single (n, dim) float32 array"""
+    __slots__ = ("records", "vectors")
+
+    def __init__(self, records, vectors):
+        if len(records) != len(vectors):
+            raise ValueError(f"{len(records)} records but {len(vectors)} vectors")
+        if getattr(vectors, "dtype", None) != np.float32 or vectors.ndim != 2:
+            raise ValueError(f"vectors must be a 2-D float32 array, got {getattr(vectors, 'dtype', type(vectors).__name__)} "
+                             f"with shape {getattr(vectors, 'shape', None)}")
+        self.records = records
+        self.vectors = vectors
+
+    @classmethod
+    def empty(cls, dim):
+        return cls([], np.empty((0, dim), dtype=np.float32))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("PointBatch only supports slicing")
+        return PointBatch(self.records[index], self.vectors[index])
+
+    @property
+    def ids(self):
+        return [record.id for record in self.records]
+
+    def to_dicts(self):
+        """JSON wire format: [{"id", "vector", "payload"}]"""
+        return [{"id": record.id, "vector": vector, "payload": record.payload()}
+                for record, vector in zip(self.records, self.vectors.tolist())]
+
+    def to_point_structs(self):
+        from qdrant_client.http import models as rest
+        return [rest.PointStruct(id=record.id, vector=vector, payload=record.payload())
+                for record, vector in zip(self.records, self.vectors.tolist())]
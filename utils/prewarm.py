@@ -0,0 +1,90 @@
+# utils/prewarm.py
+# Replay the most frequent logged questions to fill the query caches after a deploy or re-ingest
+#
+# Every cache starts cold after a restart, and ingestion invalidates cached
+# retrieval results and answers. Instead of the next users paying for
+# embedding, search and generation, a background thread re-asks the top
+# QUERY_PREWARM_TOP_N questions from the query log. It sends at most
+# QUERY_PREWARM_RATE questions per second and pauses while live queries are
+# in flight, and its API calls go through the same rate governors as
+# everything else, so live traffic comes first.
+#
+# The caches are per process, so this only helps a long-running process:
+# the Flask app, at start-up and after its ingestion jobs. A CLI ingestion
+# run exits before the pre-warm delay has passed, and cannot reach the
+# caches of an app running in another process.
+import os
+import threading
+import time
+
+from utils.metrics import PREWARMED_QUERIES
+from utils.query_log import QUERY_LOG, get_query_log
+
+QUERY_PREWARM = os.getenv("QUERY_PREWARM", "1") == "1"
+QUERY_PREWARM_TOP_N = int(os.getenv("QUERY_PREWARM_TOP_N", "50"))
+QUERY_PREWARM_RATE = float(os.getenv("QUERY_PREWARM_RATE", "0.5"))
+# Lets start-up (and the warm-up hook) settle first
+QUERY_PREWARM_DELAY = float(os.getenv("QUERY_PREWARM_DELAY_SECONDS", "5"))
+QUERY_PREWARM_WINDOW_DAYS = float(os.getenv("QUERY_PREWARM_WINDOW_DAYS", "7"))
+LIVE_TRAFFIC_WAIT = 30  # Longest pause for live queries before replaying anyway
+
+_state_lock = threading.Lock()
+_running = False
+_rerun = None
+
+def prewarm(top_n=None, rate=None, reason="manual"):
+    """Re-ask the most frequent recent questions through the pipeline, filling its caches. Returns a summary."""
+    from utils.pipeline import live_queries, run_rag_pipeline
+
+    log = get_query_log()
+    if log is None:
+        return {"questions": 0}
+    top_n = QUERY_PREWARM_TOP_N if top_n is None else top_n
+    interval = 1.0 / (rate or QUERY_PREWARM_RATE)
+    since = time.time() - QUERY_PREWARM_WINDOW_DAYS * 86400 if QUERY_PREWARM_WINDOW_DAYS else None
+    questions = [question for question, _ in log.top(top_n, since=since)]
+
+    start = time.perf_counter()
+    for question in questions:
+        paused = time.monotonic()
+        while live_queries() and time.monotonic() - paused < LIVE_TRAFFIC_WAIT:
+            time.sleep(0.1)
+        started = time.monotonic()
+        run_rag_pipeline(question, record=False)
+        PREWARMED_QUERIES.inc(reason=reason)
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    summary = {"reason": reason, "questions": len(questions), "seconds": round(time.perf_counter() - start, 2)}
+    print("Query cache pre-warm finished:", summary)
+    return summary
+
+def schedule_prewarm(reason, delay=None):
+    """Pre-warm in a background thread after `delay` seconds (QUERY_PREWARM_DELAY_SECONDS).
+
+    If a pre-warm is already running, one more run follows it, since the
+    caches it filled may just have been invalidated.
+    """
+    global _running, _rerun
+    if not QUERY_PREWARM or not QUERY_LOG:
+        return False
+    with _state_lock:
+        if _running:
+            _rerun = reason
+            return True
+        _running = True
+
+    def run():
+        global _running, _rerun
+        time.sleep(QUERY_PREWARM_DELAY if delay is None else delay)
+        current = reason
+        while current:
+            try:
+                prewarm(reason=current)
+            except Exception as e:
+                print(f"Query cache pre-warm failed: {e}")
+            with _state_lock:
+                current, _rerun = _rerun, None
+                if not current:
+                    _running = False
+
+    threading.Thread(target=run, name="query-prewarm", daemon=True).start()
+    return True
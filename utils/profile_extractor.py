@@ -0,0 +1,339 @@
+# utils/profile_extractor.py
+# Bulk doctor-profile extraction over every document in the collection
+import os
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+
+from utils.config import QDRANT_URL, QDRANT_API_KEY
+from utils.groq_llm import chat_completion
+from utils.qdrant_utils import create_keyword_index
+from utils.sharding import shard_names
+
+PROFILE_FIELDS = [
+    "Name", "Speciality", "Phone", "Address", "State",
+    "City", "Education", "Experience", "Hospital", "Website"
+]
+NOT_FOUND_MESSAGE = "I cannot answer such questions."
+DEFAULT_QUESTION = "Extract the doctor profile described in the context."
+MAX_CONTEXT_CHARS = 12000  # Keeps prompt + answer inside llama3-8b-8192's window
+
+def build_profile_prompt(context, question):
+    """Build the structured doctor-profile extraction prompt"""
+    schema = json.dumps({field: "" for field in PROFILE_FIELDS}, indent=2)
+    return f"""
+You are a helpful assistant specialized in extracting doctor profiles based only on the provided context.
+If the answer is not found in the context, respond strictly with: '{NOT_FOUND_MESSAGE}'
+
+Return your answer in this structured JSON format:
+{schema}
+
+Context:
+{context}
+
+Question: {question}
+
+Answer:
+"""
+
+def parse_profile(text):
+    """Parse and validate an LLM reply against the profile schema.
+
+    Returns the profile dict, or None when the model reported that the context
+    holds no profile. Raises ValueError when the reply is malformed.
+    """
+    if not text or NOT_FOUND_MESSAGE.lower() in text.lower():
+        return None
+
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("no JSON object found in reply")
+    data = json.loads(match.group(0))
+
+    if not isinstance(data, dict):
+        raise ValueError("reply JSON is not an object")
+    unknown = set(data) - set(PROFILE_FIELDS)
+    if unknown:
+        raise ValueError(f"unexpected fields: {', '.join(sorted(unknown))}")
+
+    profile = {}
+    for field in PROFILE_FIELDS:
+        value = data.get(field, "")
+        if value is None:
+            value = ""
+        if isinstance(value, (int, float)):
+            value = str(value)
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            value = ", ".join(value)
+        if not isinstance(value, str):
+            raise ValueError(f"field '{field}' must be a string")
+        profile[field] = value.strip()
+
+    if not any(profile.values()):
+        return None
+    return profile
+
+def extract_profile(context, question=DEFAULT_QUESTION, max_retries=2):
+    """Ask the LLM for a profile, re-prompting with the parse error when the reply is malformed"""
+    messages = [{"role": "user", "content": build_profile_prompt(context, question)}]
+    last_error = None
+
+    for _ in range(max_retries + 1):
+        reply = chat_completion(messages, temperature=0.0, max_tokens=512)
+        try:
+            return parse_profile(reply)
+        except (ValueError, json.JSONDecodeError) as e:
+            last_error = e
+            messages = messages + [
+                {"role": "assistant", "content": reply},
+                {"role": "user", "content": (
+                    f"Your previous reply was invalid: {e}. "
+                    f"Reply with only the JSON object using exactly these keys: {', '.join(PROFILE_FIELDS)}."
+                )}
+            ]
+
+    raise ValueError(f"malformed reply after {max_retries + 1} attempts: {last_error}")
+
+def list_document_keys(client, collection_name, group_by="content_id"):
+    """Scroll the collection and return the distinct document keys in first-seen order"""
+    keys = {}
+    offset = None
+
+    while True:
+        points, next_offset = client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=[group_by],
+            with_vectors=False
+        )
+        for point in points:
+            key = (point.payload or {}).get(group_by)
+            if key is not None:
+                keys.setdefault(key, None)
+
+        if next_offset is None:
+            break
+        offset = next_offset
+
+    return list(keys)
+
+def load_document_text(client, collection_names, key, group_by="content_id"):
+    """Fetch every chunk of one document from the collections holding it and join them in chunk order"""
+    chunks = []
+    source = None
+    for collection_name in collection_names:
+        source = _scroll_document(client, collection_name, key, group_by, chunks) or source
+
+    chunks.sort(key=lambda c: c[0])
+    return source, " ".join(text for _, text in chunks)[:MAX_CONTEXT_CHARS]
+
+def _scroll_document(client, collection_name, key, group_by, chunks):
+    source = None
+    offset = None
+    while True:
+        points, next_offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=rest.Filter(
+                must=[rest.FieldCondition(key=group_by, match=rest.MatchValue(value=key))]
+            ),
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        for point in points:
+            payload = point.payload or {}
+            source = source or payload.get("source")
+            chunks.append((payload.get("absolute_index", 0), payload.get("text", "")))
+
+        if next_offset is None:
+            return source
+        offset = next_offset
+
+class JsonlProfileWriter:
+    """Appends one JSON record per line, flushing after each record"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        """Write a record and return the records that are now durable"""
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        return [record]
+
+    def close(self):
+        self.file.close()
+        return []
+
+class ParquetProfileWriter:
+    """Buffers records and writes them as numbered part files inside a directory.
+
+    Each run adds new part files instead of rewriting earlier ones, so resumed
+    runs never touch data that was already flushed.
+    """
+
+    def __init__(self, path, rows_per_part=5000):
+        import pyarrow  # noqa: F401 - fail early if the optional dependency is missing
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.rows = []
+        self.records = []
+        self.part = len([f for f in os.listdir(path) if f.endswith(".parquet")])
+
+    def write(self, record):
+        """Buffer a record and return the records that are now durable"""
+        row = {"key": record["key"], "source": record.get("source"), "status": record["status"]}
+        profile = record.get("profile") or {}
+        for field in PROFILE_FIELDS:
+            row[field] = profile.get(field)
+        self.rows.append(row)
+        self.records.append(record)
+        if len(self.rows) >= self.rows_per_part:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self.rows:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist(self.rows)
+        pq.write_table(table, os.path.join(self.path, f"part-{self.part:05d}.parquet"))
+        self.part += 1
+        durable, self.rows, self.records = self.records, [], []
+        return durable
+
+    def close(self):
+        return self.flush()
+
+class Checkpoint:
+    """Line-per-key record of documents whose result has been written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self.file = open(path, "a", encoding="utf-8")
+
+    def mark(self, key):
+        self.file.write(f"{key}\n")
+        self.file.flush()
+        self.done.add(key)
+
+    def close(self):
+        self.file.close()
+
+class FailureLog:
+    """JSONL log of failed documents, kept apart from the results so the output holds one record per key"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def write(self, record):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps(dict(record, failed_at=time.time()), ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+def _mark_durable(checkpoint, records):
+    for record in records:
+        checkpoint.mark(record["key"])
+
+def _process_document(client, collection_names, key, group_by, max_retries):
+    record = {"key": key, "source": None}
+    try:
+        record["source"], text = load_document_text(client, collection_names, key, group_by)
+        if not text.strip():
+            record.update(status="empty", profile=None)
+            return record
+        profile = extract_profile(text, max_retries=max_retries)
+        record.update(status="ok" if profile else "not_found", profile=profile)
+    except Exception as e:
+        record.update(status="failed", profile=None, error=str(e))
+    return record
+
+def run_bulk_extraction(output_path, output_format="jsonl", group_by="content_id",
+                        concurrency=4, max_retries=2, limit=None, collection_name=None):
+    """Extract a profile for every document in the collection (every shard by default), resuming from the checkpoint.
+
+    Only finished documents are written to the output; failures go to a
+    separate log and are retried by the next run.
+    """
+    collection_names = [collection_name] if collection_name else shard_names()
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+
+    if output_format == "parquet":
+        writer = ParquetProfileWriter(output_path)
+        checkpoint = Checkpoint(os.path.join(output_path, "_checkpoint"))
+        failures = FailureLog(os.path.join(output_path, "_failed.jsonl"))
+    elif output_format == "jsonl":
+        writer = JsonlProfileWriter(output_path)
+        checkpoint = Checkpoint(f"{output_path}.checkpoint")
+        failures = FailureLog(f"{output_path}.failed.jsonl")
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    # Keys in first-seen order, each with the collections (shards) holding its chunks
+    keys = {}
+    for name in collection_names:
+        # Per-document scrolls filter on the grouping field, so make sure it is indexed
+        try:
+            create_keyword_index(name, group_by)
+        except Exception as e:
+            print(f"Index creation info: {e}")
+
+        print(f"Listing documents by '{group_by}' in {name}...")
+        for key in list_document_keys(client, name, group_by):
+            keys.setdefault(key, []).append(name)
+    pending = [k for k in keys if k not in checkpoint.done]
+    print(f"Found {len(keys)} documents, {len(keys) - len(pending)} already done")
+    if limit is not None:
+        pending = pending[:limit]
+
+    counts = {"ok": 0, "not_found": 0, "empty": 0, "failed": 0}
+    in_flight = set()
+    queue = iter(pending)
+
+    # Only keep a bounded number of futures alive so huge collections don't queue everything at once
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            while True:
+                for key in queue:
+                    in_flight.add(executor.submit(_process_document, client, keys[key], key, group_by, max_retries))
+                    if len(in_flight) >= concurrency * 2:
+                        break
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    counts[record["status"]] += 1
+                    if record["status"] == "failed":
+                        failures.write(record)
+                    else:
+                        _mark_durable(checkpoint, writer.write(record))
+
+                processed = sum(counts.values())
+                if processed // 100 > (processed - len(finished)) // 100:
+                    print(f"Processed {processed}/{len(pending)} documents: {counts}")
+        finally:
+            _mark_durable(checkpoint, writer.close())
+            checkpoint.close()
+            failures.close()
+
+    print(f"Bulk extraction finished: {counts}")
+    return counts
@@ -0,0 +1,284 @@
+# utils/profiling.py
+# On-demand profiling of one ingestion or query: CPU profile, allocation snapshot and per-stage summary
+#
+# Nothing here runs unless an operation is explicitly profiled (main.py
+# --profile, or an operator's X-Profile header on the Flask /ask and /upload
+# routes), so there is no overhead otherwise. A profiled operation gets an
+# opaque id and writes a directory <time>_<id>_<label> under PROFILE_DIR holding:
+#   cpu.folded     stack samples of every thread that was running, in collapsed
+#                  format (flamegraph.pl, speedscope, inferno); the first frame is the thread name
+#   cpu.prof       cProfile stats of the calling thread (pstats, snakeviz)
+#   alloc.folded   bytes still allocated at the end, per allocation stack (collapsed format)
+#   summary.json   wall time, time per pipeline stage, busiest modules, top functions and allocations
+# The samples see the threads the pipeline fans out to (embedding, upload,
+# shard search), which cProfile alone would miss. Waiting threads are skipped:
+# those whose innermost frame is a known wait (a lock, event, queue or socket
+# read) and, on Linux, those that used no CPU since the previous sample
+# (/proc/self/task/<tid>/schedstat), which also catches C calls like
+# time.sleep that leave no Python frame. Stage times come from the
+# stage metrics, so other requests running at the same time are included.
+# Only one operation is profiled at a time. Tracing allocations slows
+# allocation-heavy work (a cold model load most of all); set PROFILE_MEMORY=0
+# when the CPU timings matter more than the allocation snapshot.
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from utils.metrics import STAGE_SECONDS
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "1") == "1"
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_MEMORY_FRAMES", "10"))
+TOP_ENTRIES = 25
+
+# Innermost frames of threads that are waiting: for work, a lock, an event or
+# condition (Event.wait, Queue.get, Future.result), a join, or a socket read
+IDLE_FRAMES = {
+    ("thread.py", "_worker"), ("selectors.py", "select"), ("socketserver.py", "serve_forever"),
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get"),
+    ("socket.py", "readinto"), ("socket.py", "accept"), ("ssl.py", "read"), ("ssl.py", "recv_into"),
+}
+# A thread that ran for less than this share of the interval since the last sample counts as waiting
+MIN_CPU_SHARE = 0.05
+
+_session_lock = threading.Lock()
+
+def _frame_label(code):
+    path = code.co_filename
+    for marker in ("site-packages" + os.sep, os.sep + "lib" + os.sep + "python"):
+        if marker in path:
+            path = path.split(marker, 1)[1]
+            break
+    else:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if path.startswith(root):
+            path = os.path.relpath(path, root)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+def _module_of(label):
+    """Top-level package or repo module a frame label belongs to; other code is grouped by file name"""
+    path = label.rsplit("(", 1)[-1].rsplit(":", 1)[0].replace("\\", "/")
+    if path.startswith("<") or os.path.isabs(path) or ":" in path:
+        # Outside the repo and library paths (or not a file at all, like <frozen ...>)
+        return path.rsplit("/", 1)[-1]
+    parts = [part for part in path.split("/") if part]
+    if parts and parts[0].startswith(("3.", "python")):
+        parts = parts[1:]
+    if not parts:
+        return path
+    if parts[0] == "utils" and len(parts) > 1:
+        return "utils." + parts[1].rsplit(".", 1)[0]
+    return parts[0].rsplit(".", 1)[0]
+
+def _cpu_ns(native_id):
+    """Nanoseconds a thread has spent on a CPU, or None where that can't be read (non-Linux)"""
+    try:
+        with open(f"/proc/self/task/{native_id}/schedstat", "rb") as f:
+            return int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StackSampler:
+    """Samples the Python stacks of all running threads every `interval` seconds from a background thread"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or PROFILE_SAMPLE_INTERVAL
+        self.stacks = Counter()
+        self.samples = 0
+        self.waiting = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _is_waiting(self, ident, thread, frame, cpu_before):
+        cpu = _cpu_ns(thread.native_id) if thread is not None and thread.native_id else None
+        previous = cpu_before.get(ident)
+        if cpu is not None:
+            cpu_before[ident] = cpu
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return True
+        # Catches C calls that block without a Python frame of their own (time.sleep, lock.acquire)
+        return cpu is not None and previous is not None and cpu - previous < MIN_CPU_SHARE * self.interval * 1e9
+
+    def _run(self):
+        own = threading.get_ident()
+        # Baseline CPU times, so the first sample can already tell waiting threads apart
+        cpu_before = {thread.ident: _cpu_ns(thread.native_id) for thread in threading.enumerate() if thread.native_id}
+        cpu_before = {ident: cpu for ident, cpu in cpu_before.items() if cpu is not None}
+        while not self.stopped.wait(self.interval):
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                thread = threads.get(ident)
+                if self._is_waiting(ident, thread, frame, cpu_before):
+                    self.waiting += 1
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(thread.name if thread is not None else f"thread-{ident}")
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def modules(self):
+        """Share of samples whose innermost frame is in each module"""
+        counts = Counter()
+        for stack, count in self.stacks.items():
+            counts[_module_of(stack.rsplit(";", 1)[-1])] += count
+        total = sum(counts.values()) or 1
+        return [{"module": module, "samples": count, "share": round(count / total, 4)}
+                for module, count in counts.most_common(TOP_ENTRIES)]
+
+class ProfileSession:
+    def __init__(self, label, directory=None):
+        self.label = label
+        # Handed to clients instead of the path; also keeps same-second profiles apart
+        self.id = uuid.uuid4().hex[:16]
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+        self.path = os.path.join(directory or PROFILE_DIR, f"{stamp}_{self.id}_{safe}")
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler()
+        self.started_tracemalloc = False
+        self.written = False
+
+    def start(self):
+        self.stages_before = STAGE_SECONDS.totals()
+        if PROFILE_MEMORY and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.started_tracemalloc = True
+        self.sampler.start()
+        self.start_time = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.wall_seconds = time.perf_counter() - self.start_time
+        self.sampler.stop()
+        self.snapshot = None
+        self.peak_bytes = None
+        if tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+        self.stages_after = STAGE_SECONDS.totals()
+
+    def stage_summary(self):
+        """Calls and seconds per pipeline stage during the session (stages nest, so they don't add up)"""
+        stages = []
+        for key, (total, count) in self.stages_after.items():
+            before_total, before_count = self.stages_before.get(key, (0.0, 0))
+            if count > before_count:
+                stages.append({"stage": key[0], "calls": count - before_count, "seconds": round(total - before_total, 4)})
+        return sorted(stages, key=lambda stage: stage["seconds"], reverse=True)
+
+    def top_functions(self):
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({"function": f"{name} ({filename}:{line})", "calls": calls,
+                         "own_seconds": round(own, 4), "cumulative_seconds": round(cumulative, 4)})
+        return sorted(rows, key=lambda row: row["cumulative_seconds"], reverse=True)[:TOP_ENTRIES]
+
+    def write(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.profiler.dump_stats(os.path.join(self.path, "cpu.prof"))
+        with open(os.path.join(self.path, "cpu.folded"), "w", encoding="utf-8") as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        allocations = []
+        if self.snapshot is not None:
+            stats = self.snapshot.statistics("traceback")
+            with open(os.path.join(self.path, "alloc.folded"), "w", encoding="utf-8") as f:
+                for stat in stats:
+                    frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+                    f.write(f"{';'.join(reversed(frames))} {stat.size}\n")
+            allocations = [{"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                            "bytes": stat.size, "blocks": stat.count} for stat in stats[:TOP_ENTRIES]]
+
+        summary = {
+            "id": self.id,
+            "label": self.label,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "samples": self.sampler.samples,
+            "waiting_thread_samples": self.sampler.waiting,
+            "sample_interval_ms": self.sampler.interval * 1000,
+            "stages": self.stage_summary(),
+            "modules": self.sampler.modules(),
+            "top_functions": self.top_functions(),
+            "peak_traced_bytes": self.peak_bytes,
+            "top_allocations": allocations,
+        }
+        with open(os.path.join(self.path, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        _prune(os.path.dirname(self.path))
+        self.written = True
+        return summary
+
+def _prune(directory):
+    """Keep only the newest PROFILE_KEEP profiles"""
+    sessions = sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+    for name in sessions[:-PROFILE_KEEP] if PROFILE_KEEP else []:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+def print_summary(summary, path):
+    print(f"\nProfile {summary['id']} of '{summary['label']}' ({summary['wall_seconds']:.3f}s) written to {path}")
+    for stage in summary["stages"][:10]:
+        print(f"  {stage['stage']:<24} {stage['seconds']:>9.3f}s  {stage['calls']:>6} calls")
+    busiest = ", ".join(f"{m['module']} {100 * m['share']:.0f}%" for m in summary["modules"][:6])
+    print(f"  Busiest modules: {busiest}")
+
+@contextmanager
+def profiled(label, enabled=True):
+    """Profile the enclosed block when `enabled`. Yields the ProfileSession, or None when not profiling.
+
+    If another operation is already being profiled, this one runs unprofiled.
+    A profile that cannot be written is logged and dropped, never raised;
+    `session.written` says whether it was saved.
+    """
+    if not enabled:
+        yield None
+        return
+    if not _session_lock.acquire(blocking=False):
+        print(f"Not profiling '{label}': another profile is in progress")
+        yield None
+        return
+    session = ProfileSession(label)
+    try:
+        session.start()
+        try:
+            yield session
+        finally:
+            try:
+                session.stop()
+                print_summary(session.write(), session.path)
+            except Exception as e:
+                print(f"Could not write profile {session.id} of '{label}': {e}")
+    finally:
+        _session_lock.release()
@@ -1,13 +1,7 @@
 # utils/qdrant_utils.py
-import requests
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+from utils.config import QDRANT_URL, QDRANT_API_KEY
+from utils.http_client import get_session
+from utils.metrics import timed
 
 HEADERS = {
     "Content-Type": "application/json",
@@ -18,11 +12,20 @@ def collection_exists(collection_name):
     """Check if a collection exists"""
     url = f"{QDRANT_URL}/collections/{collection_name}"
     try:
-        response = requests.get(url, headers=HEADERS)
+        response = get_session("qdrant").get(url, headers=HEADERS)
         return response.status_code == 200
     except:
         return False
 
+def get_collection_info(collection_name):
+    """Return the collection description, or None if it does not exist"""
+    url = f"{QDRANT_URL}/collections/{collection_name}"
+    response = get_session("qdrant").get(url, headers=HEADERS)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()["result"]
+
 def create_collection(collection_name, vector_size):
     """Create a new collection"""
     url = f"{QDRANT_URL}/collections/{collection_name}"
@@ -32,27 +35,86 @@ def create_collection(collection_name, vector_size):
             "distance": "Cosine"
         }
     }
-    response = requests.put(url, headers=HEADERS, json=payload)
+    response = get_session("qdrant").put(url, headers=HEADERS, json=payload)
     if response.status_code not in [200, 409]:  # 409 means collection already exists
         response.raise_for_status()
     return response.json()
 
 def create_source_index(collection_name):
     """Create an index for the 'source' field to enable filtering"""
+    return create_keyword_index(collection_name, "source")
+
+def create_keyword_index(collection_name, field_name):
+    """Create a keyword index for a payload field to enable filtering"""
     url = f"{QDRANT_URL}/collections/{collection_name}/index"
     payload = {
-        "field_name": "source",
+        "field_name": field_name,
         "field_schema": "keyword"
     }
-    response = requests.put(url, headers=HEADERS, json=payload)
+    response = get_session("qdrant").put(url, headers=HEADERS, json=payload)
     if response.status_code not in [200, 409]:  # 409 means index already exists
         response.raise_for_status()
     return response.json()
 
+@timed("upsert_vectors")
 def upsert_vectors(collection_name, points):
     """Insert or update vectors in the collection"""
     url = f"{QDRANT_URL}/collections/{collection_name}/points"
     payload = {"points": points}
-    response = requests.put(url, headers=HEADERS, json=payload)
+    response = get_session("qdrant").put(url, headers=HEADERS, json=payload)
+    response.raise_for_status()
+    return response.json()
+
+def retrieve_points(collection_name, point_ids, with_payload=True):
+    """Fetch points by id; ids that do not exist are simply missing from the result"""
+    url = f"{QDRANT_URL}/collections/{collection_name}/points"
+    payload = {"ids": list(point_ids), "with_payload": with_payload, "with_vector": False}
+    response = get_session("qdrant").post(url, headers=HEADERS, json=payload)
+    response.raise_for_status()
+    return response.json()["result"]
+
+def count_points(collection_name, points_filter=None):
+    """Exact number of points (matching `points_filter`); unlike points_count in the collection info it is never an estimate"""
+    url = f"{QDRANT_URL}/collections/{collection_name}/points/count"
+    body = {"exact": True}
+    if points_filter:
+        body["filter"] = points_filter
+    response = get_session("qdrant").post(url, headers=HEADERS, json=body)
+    response.raise_for_status()
+    return response.json()["result"]["count"]
+
+def set_payload(collection_name, point_ids, payload):
+    """Set (merge) payload keys on existing points"""
+    url = f"{QDRANT_URL}/collections/{collection_name}/points/payload"
+    body = {"payload": payload, "points": list(point_ids)}
+    response = get_session("qdrant").post(url, headers=HEADERS, json=body)
+    response.raise_for_status()
+    return response.json()
+
+def delete_points(collection_name, points_filter):
+    """Delete every point matching a Qdrant filter"""
+    url = f"{QDRANT_URL}/collections/{collection_name}/points/delete?wait=true"
+    response = get_session("qdrant").post(url, headers=HEADERS, json={"filter": points_filter})
     response.raise_for_status()
-    return response.json()
\ No newline at end of file
+    return response.json()
+
+def delete_collection(collection_name):
+    """Delete a collection (and its aliases); returns False if it did not exist"""
+    url = f"{QDRANT_URL}/collections/{collection_name}"
+    response = get_session("qdrant").delete(url, headers=HEADERS)
+    response.raise_for_status()
+    return response.json()["result"]
+
+def get_aliases():
+    """Map every alias to the collection it points at"""
+    url = f"{QDRANT_URL}/aliases"
+    response = get_session("qdrant").get(url, headers=HEADERS)
+    response.raise_for_status()
+    return {alias["alias_name"]: alias["collection_name"] for alias in response.json()["result"]["aliases"]}
+
+def update_aliases(actions):
+    """Apply create_alias/delete_alias actions; Qdrant applies the whole list atomically"""
+    url = f"{QDRANT_URL}/collections/aliases"
+    response = get_session("qdrant").post(url, headers=HEADERS, json={"actions": actions})
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,80 @@
+# utils/query_cache.py
+# In-process caches for the query path: query embeddings, retrieval results and answers
+#
+# Traffic is repetitive, so a repeated question can skip the embedding call,
+# the search and the LLM. Retrieval results and answers depend on what is in
+# the collection; `collection_changed()` (called when ingestion stores new
+# points) starts a new generation, so older entries are never served again.
+# Query embeddings only depend on the model and stay valid. Entries expire
+# after QUERY_CACHE_TTL_SECONDS, which also bounds how stale results can get
+# when another process ingests.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import record_cache
+
+QUERY_CACHE = os.getenv("QUERY_CACHE", "1") == "1"
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
+_generation = 0
+_generation_lock = threading.Lock()
+
+def normalize_question(text):
+    return " ".join(text.split())
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they are stored"""
+
+    def __init__(self, name, maxsize=None, ttl=None):
+        self.name = name
+        self.maxsize = maxsize or QUERY_CACHE_SIZE
+        self.ttl = ttl or QUERY_CACHE_TTL
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        if not QUERY_CACHE:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+        record_cache(self.name, entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, key, value):
+        if not QUERY_CACHE:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+query_embeddings = TTLCache("query_embedding")
+retrieval_results = TTLCache("retrieval")
+answers = TTLCache("answer")
+
+def generation():
+    return _generation
+
+def collection_changed():
+    """Invalidate cached retrieval results and answers after the collection's contents changed"""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    retrieval_results.clear()
+    answers.clear()
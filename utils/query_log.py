@@ -0,0 +1,89 @@
+# utils/query_log.py
+# Compact log of the questions users ask, used to pre-warm the query caches (see utils/prewarm.py)
+#
+# One row per distinct (whitespace-normalised) question with its count and
+# when it was last asked, rather than one row per request. Requests only
+# bump an in-memory counter; a background thread writes the counts out
+# every QUERY_LOG_FLUSH_SECONDS, so logging adds no disk I/O to a query.
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+QUERY_LOG = os.getenv("QUERY_LOG", "1") == "1"
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "query_log.sqlite3"))
+QUERY_LOG_FLUSH_SECONDS = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", "5"))
+QUERY_LOG_MAX_QUESTIONS = int(os.getenv("QUERY_LOG_MAX_QUESTIONS", "100000"))
+MAX_QUESTION_CHARS = 1000  # Longer questions are pasted documents, not worth replaying
+
+_log = None
+_log_lock = threading.Lock()
+
+def get_query_log():
+    """Shared query log, or None when QUERY_LOG is off"""
+    global _log
+    if not QUERY_LOG:
+        return None
+    with _log_lock:
+        if _log is None:
+            _log = QueryLog()
+        return _log
+
+class QueryLog:
+    def __init__(self, path=None):
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.pending = Counter()
+        self.last_seen = {}
+        self.conn = sqlite3.connect(path or QUERY_LOG_PATH, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS questions ("
+                              "question TEXT PRIMARY KEY, count INTEGER, first_seen REAL, last_seen REAL)")
+        self.flusher = threading.Thread(target=self._flush_periodically, name="query-log", daemon=True)
+        self.flusher.start()
+        atexit.register(self.flush)
+
+    def record(self, question):
+        if not question or len(question) > MAX_QUESTION_CHARS:
+            return
+        with self.lock:
+            self.pending[question] += 1
+            self.last_seen[question] = time.time()
+
+    def flush(self):
+        with self.lock:
+            pending, last_seen = self.pending, self.last_seen
+            self.pending, self.last_seen = Counter(), {}
+        if not pending:
+            return
+        with self.db_lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO questions VALUES (?, ?, ?, ?) ON CONFLICT(question) DO UPDATE SET "
+                "count = count + excluded.count, last_seen = MAX(last_seen, excluded.last_seen)",
+                [(question, count, last_seen[question], last_seen[question]) for question, count in pending.items()]
+            )
+            # Keep the log compact: forget the rarest, oldest questions
+            self.conn.execute(
+                "DELETE FROM questions WHERE question IN (SELECT question FROM questions "
+                "ORDER BY count DESC, last_seen DESC LIMIT -1 OFFSET ?)", (QUERY_LOG_MAX_QUESTIONS,)
+            )
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(QUERY_LOG_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Query log flush failed: {e}")
+
+    def top(self, n, since=None):
+        """The `n` most frequent questions (asked after `since`, a timestamp), as (question, count) pairs"""
+        self.flush()
+        with self.db_lock:
+            return self.conn.execute(
+                "SELECT question, count FROM questions WHERE last_seen >= ? ORDER BY count DESC, last_seen DESC LIMIT ?",
+                (since or 0, n)
+            ).fetchall()
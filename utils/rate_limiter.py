@@ -0,0 +1,203 @@
+# utils/rate_limiter.py
+# Shared per-provider request governor: token buckets, Retry-After handling and AIMD concurrency
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from utils import config  # noqa: F401 - loads .env before the limits below are read
+from utils.metrics import API_RETRIES, API_THROTTLED, API_IN_FLIGHT, API_CONCURRENCY_LIMIT
+
+RETRYABLE_STATUS = (429, 502, 503, 504)
+
+class RateLimitError(Exception):
+    """Raised when a call could not be made within its deadline or retry budget"""
+
+class DeadlineExceeded(RateLimitError):
+    """Raised when a call's deadline passes before it could complete"""
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` units per second"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount=1):
+        """Take `amount` units if available; otherwise return seconds to wait"""
+        with self.lock:
+            self._refill(time.monotonic())
+            # Requests bigger than the bucket can never fit, so let them through once full
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def debit(self, amount):
+        """Adjust the balance after the fact, e.g. once real token usage is known"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+def parse_retry_after(response):
+    """Return the server-requested wait in seconds, or None"""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class ProviderGovernor:
+    """Gates every call to one external provider.
+
+    Requests and tokens are metered by token buckets, the number of calls in
+    flight follows additive-increase / multiplicative-decrease on throttling,
+    and waiting callers give up once their deadline has passed.
+    """
+
+    def __init__(self, name, requests_per_minute=None, tokens_per_minute=None,
+                 max_concurrency=8, min_concurrency=1, max_retries=5, queue_timeout=120.0):
+        self.name = name
+        self.request_bucket = TokenBucket(requests_per_minute / 60.0, requests_per_minute / 6.0) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute / 6.0) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.cond = threading.Condition()
+        self.throttled = 0
+
+    def _acquire(self, tokens, deadline):
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    raise DeadlineExceeded(f"{self.name}: deadline exceeded while queued")
+                wait_for = self.blocked_until - now
+                if wait_for <= 0 and self.in_flight < int(self.limit):
+                    wait_for = self.request_bucket.reserve(1) if self.request_bucket else 0.0
+                    if wait_for <= 0 and self.token_bucket and tokens:
+                        wait_for = self.token_bucket.reserve(tokens)
+                        if wait_for > 0 and self.request_bucket:
+                            self.request_bucket.debit(-1)  # Give the request slot back
+                    if wait_for <= 0:
+                        self.in_flight += 1
+                        API_IN_FLIGHT.set(self.in_flight, provider=self.name)
+                        return
+                    self.cond.wait(min(wait_for, deadline - now))
+                elif wait_for > 0:
+                    self.cond.wait(min(wait_for, deadline - now))
+                else:
+                    self.cond.wait(deadline - now)
+
+    def _release(self, outcome, retry_after=None):
+        """Free the slot. `outcome` is "ok", "throttled" or "timeout" (both back off), or "error" (no change)."""
+        with self.cond:
+            self.in_flight -= 1
+            if outcome in ("throttled", "timeout"):
+                if outcome == "throttled":
+                    self.throttled += 1
+                    API_THROTTLED.inc(provider=self.name)
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            elif outcome == "ok":
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+            API_IN_FLIGHT.set(self.in_flight, provider=self.name)
+            API_CONCURRENCY_LIMIT.set(self.limit, provider=self.name)
+            self.cond.notify_all()
+
+    def call(self, send, tokens=0, deadline=None):
+        """Run `send()` (which returns a requests.Response) under the governor.
+
+        Throttled and transient responses are retried with Retry-After or
+        jittered exponential backoff until `max_retries` or the deadline.
+        `deadline` is a time.monotonic() timestamp or a utils.deadline.Deadline.
+        """
+        deadline = getattr(deadline, "expires", deadline)
+        deadline = deadline if deadline is not None else time.monotonic() + self.queue_timeout
+        backoff = 0.5
+
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens, deadline)
+            # The slot is given back whatever send() raises; only throttling and timeouts shrink the limit
+            outcome, retry_after, response = "error", None, None
+            try:
+                response = send()
+                if response.status_code == 429:
+                    outcome = "throttled"
+                    retry_after = parse_retry_after(response)
+                elif response.status_code in RETRYABLE_STATUS:
+                    retry_after = parse_retry_after(response)
+                else:
+                    outcome = "ok"
+            except requests.Timeout as e:
+                outcome = "timeout"
+                if attempt == self.max_retries:
+                    raise
+                print(f"{self.name}: timeout ({e}), retrying")
+            except requests.ConnectionError as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"{self.name}: transient error ({e}), retrying")
+            finally:
+                self._release(outcome, retry_after=retry_after)
+
+            if response is not None:
+                if outcome == "ok":
+                    return response
+                if attempt == self.max_retries:
+                    raise RateLimitError(f"{self.name}: HTTP {response.status_code} after {attempt + 1} attempts")
+                print(f"{self.name}: HTTP {response.status_code}, retrying")
+
+            API_RETRIES.inc(provider=self.name)
+            sleep_for = retry_after if retry_after is not None else backoff * (1 + random.random())
+            backoff = min(backoff * 2, 30.0)
+            if time.monotonic() + sleep_for >= deadline:
+                raise DeadlineExceeded(f"{self.name}: deadline exceeded while backing off")
+            time.sleep(sleep_for)
+
+        raise RateLimitError(f"{self.name}: retries exhausted")
+
+def _env_int(name, default=None):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+def get_governor(provider):
+    """Return the process-wide governor for a provider, configured from the environment.
+
+    Limits are read from <PROVIDER>_RPM, <PROVIDER>_TPM and
+    <PROVIDER>_MAX_CONCURRENCY, e.g. GROQ_RPM=30.
+    """
+    with _governors_lock:
+        if provider not in _governors:
+            prefix = provider.upper()
+            _governors[provider] = ProviderGovernor(
+                provider,
+                requests_per_minute=_env_int(f"{prefix}_RPM"),
+                tokens_per_minute=_env_int(f"{prefix}_TPM"),
+                max_concurrency=_env_int(f"{prefix}_MAX_CONCURRENCY", 8)
+            )
+        return _governors[provider]
@@ -0,0 +1,296 @@
+# utils/reindex.py
+# Re-embed a collection into a new one and switch COLLECTION_NAME over with an alias
+#
+# Queries keep reading the old collection until the very end: COLLECTION_NAME
+# is (or becomes) a Qdrant alias, and the last step repoints it, and the
+# document-centroid alias, at the new collections in one atomic update.
+# Scrolling, embedding and uploading overlap. REINDEX_SCROLLERS threads each
+# scroll their own slice of the point id space, a pool of workers embeds the
+# pages in batched API requests, and the finished pages go to a BulkWriter.
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.config import COLLECTION_NAME, EMBEDDING_MODEL, VECTOR_SIZE
+from utils.bulk_writer import BulkWriter, get_client
+from utils.doc_index import DOC_COLLECTION_NAME, HIERARCHICAL_INDEX, HIERARCHICAL_LEVEL, CentroidAccumulator
+from utils.embedder import get_embeddings
+from utils.embedding_cache import EmbeddingCache
+from utils.sharding import SHARD_COUNT
+from utils.qdrant_utils import (collection_exists, count_points, create_collection, create_keyword_index,
+                                delete_collection, get_aliases, get_collection_info, update_aliases)
+
+REINDEX_PAGE_SIZE = int(os.getenv("REINDEX_PAGE_SIZE", "256"))
+REINDEX_EMBED_BATCH = int(os.getenv("REINDEX_EMBED_BATCH", "32"))
+REINDEX_WORKERS = int(os.getenv("REINDEX_WORKERS", "4"))
+REINDEX_SCROLLERS = int(os.getenv("REINDEX_SCROLLERS", "4"))
+REPORT_SECONDS = 10
+
+def resolve_collection(name, aliases=None):
+    """The collection behind `name`: its alias target, or `name` itself"""
+    aliases = get_aliases() if aliases is None else aliases
+    return aliases.get(name, name)
+
+def new_collection_name(base, model):
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")
+    return f"{base}__{slug}__{time.strftime('%Y%m%d%H%M%S')}"
+
+class ReindexProgress:
+    """Throughput and ETA, printed every REPORT_SECONDS"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.cache_hits = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    def add(self, points, cache_hits, skipped):
+        self.done += points + skipped
+        self.cache_hits += cache_hits
+        self.skipped += skipped
+        if time.perf_counter() - self.last_report >= REPORT_SECONDS:
+            self.report()
+
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.start, 1e-9)
+
+    def report(self):
+        self.last_report = time.perf_counter()
+        rate = self.rate()
+        line = f"Re-indexed {self.done}/{self.total} points ({rate:.1f}/s"
+        if self.done:
+            line += f", {100 * self.cache_hits / self.done:.0f}% from cache"
+        line += ")"
+        if rate and self.total > self.done:
+            line += f", ETA {time.strftime('%H:%M:%S', time.gmtime((self.total - self.done) / rate))}"
+        print(line)
+
+    def summary(self):
+        return {
+            "points": self.done - self.skipped,
+            "skipped": self.skipped,
+            "cache_hits": self.cache_hits,
+            "seconds": round(time.perf_counter() - self.start, 2),
+            "points_per_second": round(self.rate(), 1),
+        }
+
+def _id_order(point_id):
+    """Qdrant's scroll order: integer ids first, then UUIDs as 128-bit numbers"""
+    if isinstance(point_id, int) or str(point_id).isdigit():
+        return (0, int(point_id))
+    return (1, uuid.UUID(str(point_id)).int)
+
+def id_ranges(parts):
+    """Split the point id space into `parts` [start, stop) ranges; None is open-ended.
+
+    Point ids are UUIDs derived from hashes, so equal slices of the UUID
+    space hold about the same number of points.
+    """
+    bounds = [str(uuid.UUID(int=(i << 128) // parts)) for i in range(1, parts)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+def _scroll_pages(client, collection_name, page_size, start=None, stop=None):
+    """Pages of (id, payload) with ids from `start` up to (not including) `stop`"""
+    offset = start
+    stop_order = _id_order(stop) if stop is not None else None
+    while True:
+        points, offset = client.scroll(collection_name=collection_name, limit=page_size, offset=offset,
+                                       with_payload=True, with_vectors=False)
+        if stop_order is not None:
+            inside = [point for point in points if _id_order(point.id) < stop_order]
+            if len(inside) < len(points):
+                points, offset = inside, None
+        if points:
+            yield [(str(point.id), point.payload or {}) for point in points]
+        if offset is None:
+            break
+
+def _scroll_parallel(client, collection_name, page_size, scrollers):
+    """Pages of the whole collection, scrolled by `scrollers` threads at once, in no particular order"""
+    if scrollers <= 1:
+        yield from _scroll_pages(client, collection_name, page_size)
+        return
+    pages = queue.Queue(maxsize=scrollers * 2)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(start, stop):
+        try:
+            for page in _scroll_pages(client, collection_name, page_size, start, stop):
+                if not put(("page", page)):
+                    return
+            put(("done", None))
+        except Exception as e:
+            put(("error", e))
+
+    for i, (start, stop) in enumerate(id_ranges(scrollers)):
+        threading.Thread(target=run, args=(start, stop), name=f"reindex-scroll-{i}", daemon=True).start()
+    try:
+        running = scrollers
+        while running:
+            kind, item = pages.get()
+            if kind == "error":
+                raise item
+            if kind == "done":
+                running -= 1
+            else:
+                yield item
+    finally:
+        # Lets the scroll threads exit if the caller stops early
+        stopped.set()
+
+def _embed_page(page, cache, embed_batch):
+    """Return (PointBatch, cache_hits, skipped) for one scrolled page; points without text are skipped"""
+    import numpy as np
+    from utils.point_batch import ChunkRecord, PointBatch
+
+    records = [ChunkRecord.from_payload(pid, payload) for pid, payload in page if payload.get("text")]
+    texts = [record.text for record in records]
+    vectors = cache.get_many(texts) if cache else [None] * len(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    for start in range(0, len(missing), embed_batch):
+        part = missing[start:start + embed_batch]
+        embedded = get_embeddings([texts[i] for i in part])
+        for i, vector in zip(part, embedded):
+            if len(vector) != VECTOR_SIZE:
+                raise ValueError(f"Invalid embedding length: {len(vector)}, expected {VECTOR_SIZE}")
+            vectors[i] = vector
+        if cache:
+            cache.put_many([texts[i] for i in part], embedded)
+    block = np.asarray(vectors, dtype=np.float32).reshape(len(records), VECTOR_SIZE)
+    return PointBatch(records, block), len(texts) - len(missing), len(page) - len(records)
+
+def _create_like(source, target, vector_size, extra_fields=()):
+    """Create `target` with the keyword indexes of `source` (plus `extra_fields`)"""
+    create_collection(target, vector_size)
+    schema = (get_collection_info(source) or {}).get("payload_schema") or {}
+    fields = {name for name, info in schema.items() if info.get("data_type") == "keyword"}
+    for field in sorted(fields | {"source", "sources", *extra_fields}):
+        create_keyword_index(target, field)
+
+def switch_aliases(targets, replace_collection=False):
+    """Point each alias in `targets` ({alias: collection}) at its collection in one atomic update.
+
+    Before the first re-index the name is a plain collection, not an alias,
+    and has to be deleted before the alias can take its place; that is only
+    done with `replace_collection`, and queries fail for that moment.
+    Returns False (and changes nothing) if a plain collection is in the way.
+    """
+    aliases = get_aliases()
+    plain = [alias for alias in targets if alias not in aliases and collection_exists(alias)]
+    if plain and not replace_collection:
+        print(f"{', '.join(plain)} {'is a plain collection' if len(plain) == 1 else 'are plain collections'}, "
+              "not aliases; re-run with --replace-collection to delete and replace them")
+        return False
+    for name in plain:
+        print(f"Deleting plain collection {name} so an alias can take its name")
+        delete_collection(name)
+    actions = []
+    for alias, collection in targets.items():
+        if alias in aliases:
+            actions.append({"delete_alias": {"alias_name": alias}})
+        actions.append({"create_alias": {"alias_name": alias, "collection_name": collection}})
+    update_aliases(actions)
+    return True
+
+def reindex(target=None, workers=None, page_size=None, embed_batch=None, use_cache=True,
+            switch=True, replace_collection=False, drop_old=False, scrollers=None):
+    """Re-embed every point of COLLECTION_NAME with EMBEDDING_MODEL into a new collection.
+
+    Point ids and payloads are kept, so the dedup index and ingestion journal
+    stay valid. With `switch`, COLLECTION_NAME (and DOC_COLLECTION_NAME when
+    there is a document index) are then repointed at the new collections; the
+    old ones are kept for rollback unless `drop_old`. Pause ingestion while
+    this runs: points written to the old collection meanwhile are not copied.
+    Returns a summary dict.
+    """
+    if SHARD_COUNT > 1:
+        raise RuntimeError("Re-indexing a sharded collection is not supported; run it once per shard with COLLECTION_NAME set to the shard and SHARD_COUNT=1")
+    workers = workers or REINDEX_WORKERS
+    page_size = page_size or REINDEX_PAGE_SIZE
+    embed_batch = embed_batch or REINDEX_EMBED_BATCH
+    scrollers = scrollers or REINDEX_SCROLLERS
+
+    aliases = get_aliases()
+    source = resolve_collection(COLLECTION_NAME, aliases)
+    info = get_collection_info(source)
+    if info is None:
+        raise RuntimeError(f"Collection {COLLECTION_NAME} does not exist")
+    dim = len(get_embeddings(["dimension probe"])[0])
+    if dim != VECTOR_SIZE:
+        raise ValueError(f"{EMBEDDING_MODEL} returns {dim}-d vectors; set VECTOR_SIZE={dim}")
+
+    build_docs = HIERARCHICAL_INDEX or collection_exists(DOC_COLLECTION_NAME)
+    names = [COLLECTION_NAME, DOC_COLLECTION_NAME] if build_docs else [COLLECTION_NAME]
+    plain = [name for name in names if name not in aliases and collection_exists(name)]
+    if switch and plain and not replace_collection:
+        raise RuntimeError(f"{', '.join(plain)} must become an alias to switch without downtime; "
+                           "re-run with --replace-collection (or --no-switch)")
+    target = target or new_collection_name(COLLECTION_NAME, EMBEDDING_MODEL)
+    print(f"Re-indexing {source} into {target} with {EMBEDDING_MODEL} ({info.get('points_count') or 0} points)")
+    _create_like(source, target, dim, extra_fields=[HIERARCHICAL_LEVEL] if build_docs else [])
+
+    cache = EmbeddingCache(EMBEDDING_MODEL) if use_cache else None
+    centroids = CentroidAccumulator() if build_docs else None
+    progress = ReindexProgress(info.get("points_count") or 0)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reindex") as executor, BulkWriter(target) as writer:
+        in_flight = deque()
+
+        def finish(future):
+            points, cache_hits, skipped = future.result()
+            writer.write(points)
+            if centroids is not None:
+                centroids.add(points)
+            progress.add(len(points), cache_hits, skipped)
+
+        # Pages are submitted as they are scrolled; at most 2 * workers wait to be written
+        for page in _scroll_parallel(get_client(), source, page_size, scrollers):
+            in_flight.append(executor.submit(_embed_page, page, cache, embed_batch))
+            while in_flight and (len(in_flight) >= workers * 2 or in_flight[0].done()):
+                finish(in_flight.popleft())
+        while in_flight:
+            finish(in_flight.popleft())
+        written = writer.close()
+    progress.report()
+
+    summary = {"source": source, "target": target, "model": EMBEDDING_MODEL, **progress.summary()}
+    targets = {COLLECTION_NAME: target}
+    if centroids is not None:
+        docs_target = f"{target}_docs"
+        create_collection(docs_target, dim)
+        with BulkWriter(docs_target) as doc_writer:
+            doc_writer.write(centroids.pop())
+            summary["documents"] = doc_writer.close()
+        targets[DOC_COLLECTION_NAME] = docs_target
+
+    stored = count_points(target)
+    if stored != written:
+        raise RuntimeError(f"{target} holds {stored} points but {written} were written; not switching")
+
+    summary["switched"] = switch and switch_aliases(targets, replace_collection)
+    if summary["switched"]:
+        print(f"{', '.join(targets)} now point at {', '.join(targets.values())}")
+        previous = [resolve_collection(alias, aliases) for alias in targets if alias in aliases]
+        if drop_old:
+            for name in previous:
+                delete_collection(name)
+                print(f"Dropped {name}")
+        elif previous:
+            print(f"Previous collections kept for rollback: {', '.join(previous)}")
+    return summary
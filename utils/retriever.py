@@ -1,41 +1,120 @@
 # utils/retriever.py
-import requests
-import json
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+from utils.config import QDRANT_URL, QDRANT_API_KEY, COLLECTION_NAME
+from utils.http_client import get_session
+from utils.metrics import timed, SHARD_SEARCH_SECONDS, SHARDS_SEARCHED
+from utils.deadline import request_timeout
+from utils.sharding import SHARD_COUNT, shards_for_filter
 
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME")  
+HIERARCHICAL_SEARCH = os.getenv("HIERARCHICAL_SEARCH", "0") == "1"
+HIERARCHICAL_TOP_DOCS = int(os.getenv("HIERARCHICAL_TOP_DOCS", "10"))
+# Serve COLLECTION_NAME searches from a local snapshot (see utils/snapshot.py) instead of Qdrant
+LOCAL_SNAPSHOT_PATH = os.getenv("LOCAL_SNAPSHOT_PATH")
 
-def search_qdrant(vector, top_k=5):
-    """Search for similar vectors in Qdrant collection"""
-    if not isinstance(vector, list) or not all(isinstance(x, (float, int)) for x in vector):
-        raise ValueError("Invalid vector! Must be a list of numbers.")
+_local_index = None
+_local_index_lock = threading.Lock()
+_shard_executor = ThreadPoolExecutor(max_workers=max(SHARD_COUNT, 1) * 4, thread_name_prefix="shard-search")
 
+def get_local_index():
+    global _local_index
+    with _local_index_lock:
+        if _local_index is None:
+            from utils.snapshot import SnapshotIndex
+            _local_index = SnapshotIndex(LOCAL_SNAPSHOT_PATH)
+        return _local_index
+
+def _search_collection(collection_name, payload, deadline=None):
+    """One search request; errors are logged and yield no results, except running out of time"""
     headers = {
         "Content-Type": "application/json",
         "api-key": QDRANT_API_KEY
     }
 
-    payload = {
-        "vector": vector,
-        "top": top_k,
-        "with_payload": True
-    }
-
     try:
-        response = requests.post(
-            f"{QDRANT_URL}/collections/{COLLECTION_NAME}/points/search",
+        response = get_session("qdrant").post(
+            f"{QDRANT_URL}/collections/{collection_name}/points/search",
             headers=headers,
             json=payload,
+            timeout=request_timeout(deadline),
         )
 
         response.raise_for_status()
         return response.json()["result"]
         
     except Exception as e:
-        print(f"Error searching Qdrant: {str(e)}")
-        return []
\ No newline at end of file
+        if deadline:
+            deadline.check("search_qdrant")
+        print(f"Error searching Qdrant ({collection_name}): {str(e)}")
+        return []
+
+def _search_shard(collection_name, payload, deadline=None):
+    start = time.perf_counter()
+    try:
+        return _search_collection(collection_name, payload, deadline)
+    finally:
+        SHARD_SEARCH_SECONDS.observe(time.perf_counter() - start, shard=collection_name)
+
+def search_shards(payload, deadline=None):
+    """Search the shards that can match `payload["filter"]` concurrently and merge the top hits by score"""
+    shards = shards_for_filter(payload.get("filter"))
+    SHARDS_SEARCHED.inc(len(shards), fanout="all" if len(shards) == SHARD_COUNT else "pruned")
+    if len(shards) == 1:
+        return _search_shard(shards[0], payload, deadline)
+    futures = [_shard_executor.submit(_search_shard, name, payload, deadline) for name in shards]
+    hits = [hit for future in futures for hit in future.result()]
+    return sorted(hits, key=lambda hit: hit["score"], reverse=True)[:payload["top"]]
+
+@timed("search_qdrant")
+def search_qdrant(vector, top_k=5, deadline=None, query_filter=None, collection_name=None):
+    """Search for similar vectors in Qdrant collection.
+
+    Without a `collection_name`, searches COLLECTION_NAME, or fans out over
+    its shards when SHARD_COUNT > 1. Errors are logged and yield no results
+    (a failed shard just contributes none), except running out of time,
+    which raises DeadlineExceeded.
+    """
+    if not isinstance(vector, list) or not all(isinstance(x, (float, int)) for x in vector):
+        raise ValueError("Invalid vector! Must be a list of numbers.")
+
+    payload = {
+        "vector": vector,
+        "top": top_k,
+        "with_payload": True
+    }
+    if query_filter:
+        payload["filter"] = query_filter
+
+    if deadline:
+        deadline.check("search_qdrant")
+
+    if LOCAL_SNAPSHOT_PATH and collection_name is None:
+        return get_local_index().search(vector, top_k=top_k, query_filter=query_filter)
+    if collection_name is None and SHARD_COUNT > 1:
+        return search_shards(payload, deadline)
+    return _search_collection(collection_name or COLLECTION_NAME, payload, deadline)
+
+@timed("search_hierarchical")
+def search_hierarchical(vector, top_k=5, top_docs=None, deadline=None):
+    """Two-stage search: closest documents in the centroid collection, then chunks within them.
+
+    Falls back to a flat search when the document collection is empty or missing.
+    """
+    from utils.doc_index import DOC_COLLECTION_NAME, HIERARCHICAL_LEVEL
+
+    docs = search_qdrant(vector, top_k=top_docs or HIERARCHICAL_TOP_DOCS, deadline=deadline,
+                         collection_name=DOC_COLLECTION_NAME)
+    keys = [hit["payload"][HIERARCHICAL_LEVEL] for hit in docs if HIERARCHICAL_LEVEL in (hit.get("payload") or {})]
+    if not keys:
+        return search_qdrant(vector, top_k=top_k, deadline=deadline)
+    query_filter = {"must": [{"key": HIERARCHICAL_LEVEL, "match": {"any": keys}}]}
+    return search_qdrant(vector, top_k=top_k, deadline=deadline, query_filter=query_filter)
+
+def retrieve(vector, top_k=5, deadline=None):
+    """Search using the configured strategy (HIERARCHICAL_SEARCH=1 for two-stage)"""
+    if HIERARCHICAL_SEARCH:
+        return search_hierarchical(vector, top_k=top_k, deadline=deadline)
+    return search_qdrant(vector, top_k=top_k, deadline=deadline)
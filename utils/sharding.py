@@ -0,0 +1,55 @@
+# utils/sharding.py
+# Spread chunk points over SHARD_COUNT collections, routed by a stable hash of their source
+#
+# With SHARD_COUNT=1 (the default) the only "shard" is COLLECTION_NAME itself,
+# so callers can always loop over `shard_names()`. Shards are ordinary
+# collections; on a distributed Qdrant deployment they are placed on
+# different nodes, which spreads both ingestion writes and search load.
+# Searches fan out to every shard, or only to the shards named by a `must`
+# condition on `source` (see retriever.search_qdrant).
+import hashlib
+import os
+
+from utils.config import COLLECTION_NAME
+from utils.metrics import SHARDS
+from utils.qdrant_utils import retrieve_points
+
+SHARD_COUNT = max(1, int(os.getenv("SHARD_COUNT", "1")))
+
+SHARDS.set(SHARD_COUNT)
+
+def shard_names():
+    if SHARD_COUNT == 1:
+        return [COLLECTION_NAME]
+    return [f"{COLLECTION_NAME}_shard{i:02d}" for i in range(SHARD_COUNT)]
+
+def shard_for(key):
+    """Collection holding the points routed by `key` (a source file name)"""
+    if SHARD_COUNT == 1:
+        return COLLECTION_NAME
+    digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest()
+    return shard_names()[int.from_bytes(digest, "big") % SHARD_COUNT]
+
+def shards_for_filter(query_filter):
+    """Shards that can hold points matching `query_filter`: all of them unless it pins `source` values"""
+    for condition in (query_filter or {}).get("must") or []:
+        if condition.get("key") != "source":
+            continue
+        match = condition.get("match") or {}
+        values = [match["value"]] if "value" in match else match.get("any")
+        if values:
+            return sorted({shard_for(value) for value in values})
+    return shard_names()
+
+def retrieve_from_shards(point_ids, with_payload=True):
+    """Fetch points by id from whichever shards hold them. Returns {collection: [points]}."""
+    found = {}
+    missing = set(point_ids)
+    for name in shard_names():
+        if not missing:
+            break
+        points = retrieve_points(name, sorted(missing), with_payload=with_payload)
+        if points:
+            found[name] = points
+            missing -= {str(point["id"]) for point in points}
+    return found
@@ -0,0 +1,236 @@
+# utils/snapshot.py
+# Compact on-disk snapshots of a collection: export, bulk import and local memory-mapped search
+#
+# A snapshot is a directory holding:
+#   manifest.json            collection settings, embedding model and the block list
+#   vectors_00000.npy        (n, dim) float32 or float16 vectors, unit length
+#   payloads_00000.json.gz   the block's ids and payloads as columns ({"id": [...], "text": [...], ...})
+# Blocks of SNAPSHOT_BLOCK_POINTS points keep every file a manageable size.
+# Vectors are plain .npy files, so a SnapshotIndex can memory-map them and
+# search without loading the corpus into RAM. The export copies each scrolled
+# vector straight into one reused float32 block array.
+import gzip
+import json
+import os
+import threading
+import time
+from itertools import islice
+
+from utils.config import COLLECTION_NAME, EMBEDDING_MODEL
+from utils.bulk_writer import BulkWriter, get_client
+from utils.qdrant_utils import create_collection, create_keyword_index, get_collection_info
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_BLOCK_POINTS = int(os.getenv("SNAPSHOT_BLOCK_POINTS", "100000"))
+SCROLL_PAGE_SIZE = 1000
+SEARCH_ROWS = 65536  # Rows scored at a time, bounding the float32 copy of float16 blocks
+PAYLOAD_CACHE_BLOCKS = 8
+
+def _block_files(number):
+    return f"vectors_{number:05d}.npy", f"payloads_{number:05d}.json.gz"
+
+def _write_block(path, number, ids, payloads, block, dtype):
+    """Write one block; `block` is a float32 array and is normalised in place"""
+    import numpy as np
+    vector_file, payload_file = _block_files(number)
+    block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+    np.save(os.path.join(path, vector_file), block.astype(dtype))
+
+    keys = sorted({key for payload in payloads for key in payload})
+    columns = {"id": ids, **{key: [payload.get(key) for payload in payloads] for key in keys}}
+    with gzip.open(os.path.join(path, payload_file), "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(columns, f, ensure_ascii=False)
+    return {"vectors": vector_file, "payloads": payload_file, "count": len(ids)}
+
+def export_snapshot(path, collection_name=None, dtype="float32", block_points=None):
+    """Stream every point of a collection into a snapshot directory. Returns the manifest."""
+    collection_name = collection_name or COLLECTION_NAME
+    block_points = block_points or SNAPSHOT_BLOCK_POINTS
+    if dtype not in ("float32", "float16"):
+        raise ValueError("dtype must be float32 or float16")
+    info = get_collection_info(collection_name)
+    if info is None:
+        raise RuntimeError(f"Collection {collection_name} does not exist")
+    os.makedirs(path, exist_ok=True)
+
+    vectors_config = info.get("config", {}).get("params", {}).get("vectors", {})
+    schema = info.get("payload_schema") or {}
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": collection_name,
+        "embedding_model": EMBEDDING_MODEL,
+        "dim": vectors_config.get("size"),
+        "distance": vectors_config.get("distance", "Cosine"),
+        "dtype": dtype,
+        "keyword_indexes": sorted(name for name, field in schema.items() if field.get("data_type") == "keyword"),
+        "count": 0,
+        "blocks": [],
+    }
+
+    import numpy as np
+    client = get_client()
+    start = time.perf_counter()
+    vectors = None  # (block_points, dim) float32, reused for every block
+    ids, payloads = [], []
+
+    def flush():
+        block = _write_block(path, len(manifest["blocks"]), ids, payloads, vectors[:len(ids)], dtype)
+        manifest["blocks"].append(block)
+        manifest["count"] += block["count"]
+        ids.clear()
+        payloads.clear()
+        print(f"Exported {manifest['count']} points")
+
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name=collection_name, limit=SCROLL_PAGE_SIZE, offset=offset,
+                                       with_payload=True, with_vectors=True)
+        if points and vectors is None:
+            manifest["dim"] = manifest["dim"] or len(points[0].vector)
+            # np.empty only commits memory for the rows that get filled
+            vectors = np.empty((block_points, manifest["dim"]), dtype=np.float32)
+        for point in points:
+            vectors[len(ids)] = point.vector
+            ids.append(str(point.id))
+            payloads.append(point.payload or {})
+            if len(ids) == block_points:
+                flush()
+        if offset is None:
+            break
+    if ids:
+        flush()
+    manifest["created"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    # The manifest goes last, so a directory without one is an unfinished export
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Snapshot of {collection_name}: {manifest['count']} points in {len(manifest['blocks'])} blocks "
+          f"({time.perf_counter() - start:.1f}s)")
+    return manifest
+
+def load_manifest(path):
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"{path} has no manifest.json (not a snapshot, or the export did not finish)")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+    return manifest
+
+def read_payloads(path, block):
+    """Columns of one block: {"id": [...], field: [...]}"""
+    with gzip.open(os.path.join(path, block["payloads"]), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def iter_points(path, manifest=None):
+    """Yield {"id", "vector", "payload"} dicts from a snapshot, one block in memory at a time"""
+    import numpy as np
+    manifest = manifest or load_manifest(path)
+    for block in manifest["blocks"]:
+        columns = read_payloads(path, block)
+        ids = columns.pop("id")
+        vectors = np.load(os.path.join(path, block["vectors"]), mmap_mode="r")
+        for row, point_id in enumerate(ids):
+            payload = {key: values[row] for key, values in columns.items() if values[row] is not None}
+            yield {"id": point_id, "vector": vectors[row].astype(np.float32).tolist(), "payload": payload}
+
+def import_snapshot(path, collection_name=None, parallel=None, batch_size=None):
+    """Create the collection (if missing) and load a snapshot into it with a BulkWriter. Returns points imported."""
+    manifest = load_manifest(path)
+    collection_name = collection_name or COLLECTION_NAME
+    if manifest.get("embedding_model") != EMBEDDING_MODEL:
+        print(f"Warning: snapshot was embedded with {manifest.get('embedding_model')}, "
+              f"but EMBEDDING_MODEL is {EMBEDDING_MODEL}; queries will not match until you re-index")
+
+    create_collection(collection_name, manifest["dim"])
+    for field in sorted(set(manifest.get("keyword_indexes") or []) | {"source", "sources"}):
+        create_keyword_index(collection_name, field)
+
+    start = time.perf_counter()
+    points = iter_points(path, manifest)
+    with BulkWriter(collection_name, batch_size=batch_size, parallel=parallel) as writer:
+        while True:
+            batch = list(islice(points, writer.batch_size))
+            if not batch:
+                break
+            writer.write(batch)
+        count = writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Imported {count} points into {collection_name} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} points/s)")
+    return count
+
+class SnapshotIndex:
+    """Exact cosine search over a snapshot's memory-mapped vector blocks.
+
+    Results have the same shape as Qdrant search hits. Filters support the
+    must/must_not/should match conditions the pipeline itself uses.
+    """
+
+    def __init__(self, path):
+        import numpy as np
+        self.path = path
+        self.manifest = load_manifest(path)
+        self.blocks = [np.load(os.path.join(path, block["vectors"]), mmap_mode="r") for block in self.manifest["blocks"]]
+        self._columns = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.manifest["count"]
+
+    def columns(self, number):
+        """Decompressed payload columns of a block; only the most recently used few are kept"""
+        with self.lock:
+            if number in self._columns:
+                self._columns[number] = self._columns.pop(number)
+                return self._columns[number]
+        columns = read_payloads(self.path, self.manifest["blocks"][number])
+        with self.lock:
+            if len(self._columns) >= PAYLOAD_CACHE_BLOCKS:
+                self._columns.pop(next(iter(self._columns)))
+            self._columns[number] = columns
+        return columns
+
+    def _mask(self, number, query_filter):
+        import numpy as np
+        columns = self.columns(number)
+        count = self.manifest["blocks"][number]["count"]
+
+        def condition(cond):
+            values = columns.get(cond.get("key")) or [None] * count
+            match = cond.get("match", {})
+            wanted = [match["value"]] if "value" in match else match.get("any", [])
+            return np.array([any(v in wanted for v in (value if isinstance(value, list) else [value]))
+                             for value in values], dtype=bool)
+
+        mask = np.ones(count, dtype=bool)
+        for cond in query_filter.get("must") or []:
+            mask &= condition(cond)
+        for cond in query_filter.get("must_not") or []:
+            mask &= ~condition(cond)
+        if query_filter.get("should"):
+            mask &= np.logical_or.reduce([condition(cond) for cond in query_filter["should"]])
+        return mask
+
+    def search(self, vector, top_k=5, query_filter=None):
+        import numpy as np
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        best = []  # (score, block, row)
+        for number, block in enumerate(self.blocks):
+            mask = self._mask(number, query_filter) if query_filter else None
+            for start in range(0, len(block), SEARCH_ROWS):
+                scores = np.asarray(block[start:start + SEARCH_ROWS], dtype=np.float32) @ query
+                if mask is not None:
+                    scores[~mask[start:start + SEARCH_ROWS]] = -np.inf
+                k = min(top_k, len(scores))
+                top = np.argpartition(-scores, k - 1)[:k] if k else []
+                best.extend((float(scores[i]), number, start + int(i)) for i in top if np.isfinite(scores[i]))
+            best = sorted(best, reverse=True)[:top_k]
+
+        hits = []
+        for score, number, row in best:
+            columns = self.columns(number)
+            payload = {key: values[row] for key, values in columns.items() if key != "id" and values[row] is not None}
+            hits.append({"id": columns["id"][row], "version": 0, "score": score, "payload": payload})
+        return hits
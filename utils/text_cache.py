@@ -0,0 +1,248 @@
+# utils/text_cache.py
+# Persistent cache of extracted text, keyed by file content hash and extractor version
+#
+# Re-ingesting an unchanged file (to try another chunk size, or into a new
+# collection) spends most of its time parsing it again. Each content item is
+# stored here zlib-compressed with its whitespace collapsed. The chunkers
+# split on whitespace, so this gives the same chunks. A hit skips the parser
+# entirely. Items are written as the pipeline consumes them, so a streamed PDF
+# or JSON export is never held in memory whole, and a file only becomes a hit
+# once every item is stored. Past TEXT_CACHE_MAX_MB the least recently used
+# files are evicted.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from utils.metrics import record_cache
+
+TEXT_CACHE = os.getenv("TEXT_CACHE", "1") == "1"
+TEXT_CACHE_PATH = os.getenv("TEXT_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "text_cache.sqlite3"))
+TEXT_CACHE_MAX_MB = float(os.getenv("TEXT_CACHE_MAX_MB", "512"))
+TEXT_CACHE_MAX_AGE_DAYS = float(os.getenv("TEXT_CACHE_MAX_AGE_DAYS", "30"))
+HASH_READ_SIZE = 1 << 20
+WRITE_BATCH_ITEMS = 256
+READ_BATCH_ITEMS = 256
+PAGE_SEPARATOR = "\f"  # Never left inside normalised text
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def content_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def normalize(text):
+    return " ".join(text.split())
+
+def get_text_cache():
+    """Shared cache, or None when TEXT_CACHE is off"""
+    global _cache
+    if not TEXT_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = TextCache()
+        return _cache
+
+class _ItemWriter:
+    """Buffers one file's items and publishes the file once all of them are stored"""
+
+    def __init__(self, cache, key, version, streamed):
+        self.cache = cache
+        self.key = key
+        self.version = version
+        self.streamed = streamed
+        self.pending = []
+        self.items = 0
+        self.bytes = 0
+
+    def put(self, item, kind, meta, text):
+        data = zlib.compress(text.encode("utf-8"), 6)
+        self.pending.append((self.key, item, kind, json.dumps(meta) if meta is not None else None, data))
+        self.items += 1
+        self.bytes += len(data)
+        if len(self.pending) >= WRITE_BATCH_ITEMS:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.cache._write_items(self.pending)
+            self.pending = []
+
+    def finish(self):
+        self.flush()
+        self.cache._publish(self.key, self.version, self.items, self.bytes, self.streamed)
+
+    def wrap(self, item, content, on_done):
+        """Pass `content` through, storing it; `on_done` runs once it is stored"""
+        if isinstance(content, str):
+            self.put(item, "text", None, normalize(content))
+        elif isinstance(content, dict):
+            self.put(item, "json", content["position"], normalize(content["text"]))
+        else:
+            return self._record_pages(item, content, on_done)
+        on_done()
+        return content
+
+    def _record_pages(self, item, pages, on_done):
+        texts = []
+        first_page = None
+        for page_number, text in pages:
+            if first_page is None:
+                first_page = page_number
+            texts.append(normalize(text))
+            yield page_number, text
+        self.put(item, "pages", {"first_page": first_page or 1}, PAGE_SEPARATOR.join(texts))
+        on_done()
+
+class TextCache:
+    """Extracted content items of files, looked up by (SHA-256 of the bytes, extractor version)"""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(TEXT_CACHE_MAX_MB * 2**20)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path or TEXT_CACHE_PATH, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files ("
+                              "key TEXT PRIMARY KEY, version TEXT, items INTEGER, bytes INTEGER, "
+                              "streamed INTEGER, created REAL, last_used REAL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS items ("
+                              "key TEXT, item INTEGER, kind TEXT, meta TEXT, data BLOB, "
+                              "PRIMARY KEY (key, item)) WITHOUT ROWID")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used)")
+
+    @staticmethod
+    def key(file_path, version):
+        return f"{content_hash(file_path)}:{version}"
+
+    def get(self, key):
+        """The file's content items (a list, or a generator for streamed formats), or None on a miss"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT items, streamed FROM files WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.conn.execute("UPDATE files SET last_used = ? WHERE key = ?", (time.time(), key))
+        record_cache("text", row is not None)
+        if row is None:
+            return None
+        items, streamed = row
+        contents = self._iter_items(key, items)
+        return contents if streamed else list(contents)
+
+    def _iter_items(self, key, count):
+        for start in range(0, count, READ_BATCH_ITEMS):
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT kind, meta, data FROM items WHERE key = ? AND item >= ? AND item < ? ORDER BY item",
+                    (key, start, start + READ_BATCH_ITEMS)
+                ).fetchall()
+            for kind, meta, data in rows:
+                text = zlib.decompress(data).decode("utf-8")
+                if kind == "text":
+                    yield text
+                elif kind == "json":
+                    yield {"text": text, "position": json.loads(meta)}
+                else:
+                    first_page = json.loads(meta)["first_page"]
+                    yield [(first_page + offset, page) for offset, page in enumerate(text.split(PAGE_SEPARATOR))]
+
+    def record(self, key, version, contents):
+        """Return `contents` unchanged for the caller to consume, storing each item as it is read.
+
+        Empty results (which include extraction failures) are not stored.
+        """
+        if isinstance(contents, list):
+            if not contents:
+                return contents
+            writer = _ItemWriter(self, key, version, streamed=False)
+            remaining = [len(contents)]
+
+            def item_done():
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    writer.finish()
+            return [writer.wrap(item, content, item_done) for item, content in enumerate(contents)]
+        return self._record_stream(_ItemWriter(self, key, version, streamed=True), contents)
+
+    def _record_stream(self, writer, contents):
+        for item, content in enumerate(contents):
+            yield writer.wrap(item, content, lambda: None)
+        if writer.items:
+            writer.finish()
+
+    def _write_items(self, rows):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _publish(self, key, version, items, size, streamed):
+        now = time.time()
+        with self.lock, self.conn:
+            # Another process's cleanup may have removed items in the meantime
+            stored = self.conn.execute("SELECT COUNT(*) FROM items WHERE key = ?", (key,)).fetchone()[0]
+            if stored != items:
+                return
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (key, version, items, size, int(streamed), now, now))
+        self.evict()
+
+    def _delete(self, keys):
+        for key in keys:
+            self.conn.execute("DELETE FROM items WHERE key = ?", (key,))
+            self.conn.execute("DELETE FROM files WHERE key = ?", (key,))
+
+    def size(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used files until the cache is back under 90% of its limit"""
+        with self.lock, self.conn:
+            total = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            victims = []
+            for key, size in self.conn.execute("SELECT key, bytes FROM files ORDER BY last_used"):
+                if total <= self.max_bytes * 0.9:
+                    break
+                victims.append(key)
+                total -= size
+            self._delete(victims)
+        return len(victims)
+
+    def cleanup(self, current_versions=None, max_age_days=None):
+        """Remove files extracted by other extractor versions or unused for `max_age_days`. Returns files removed.
+
+        `max_age_days` defaults to TEXT_CACHE_MAX_AGE_DAYS; 0 keeps files regardless of age.
+
+        Items of files that were never finished (an interrupted run) are removed too.
+        """
+        max_age_days = TEXT_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM items WHERE key NOT IN (SELECT key FROM files)")
+            keys = set()
+            if current_versions is not None:
+                keys |= {key for key, version in self.conn.execute("SELECT key, version FROM files")
+                         if version not in current_versions}
+            if max_age_days:
+                cutoff = time.time() - max_age_days * 86400
+                keys |= {key for (key,) in self.conn.execute("SELECT key FROM files WHERE last_used < ?", (cutoff,))}
+            self._delete(keys)
+        if keys:
+            with self.lock:
+                self.conn.execute("VACUUM")
+        return len(keys)
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM items")
+            self.conn.execute("DELETE FROM files")
+
+    def close(self):
+        self.conn.close()
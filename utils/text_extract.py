@@ -0,0 +1,89 @@
+# utils/text_extract.py
+# Text extraction from uploaded files, shared by every entry point
+#
+# Returns a list of content items for the chunker (see pipeline.iter_chunks):
+# plain strings, or a lazy page stream for PDFs. JSON crawl exports come back
+# as a generator of {"text", "position"} items instead.
+# Results are cached by file content (see utils/text_cache.py), so unchanged
+# files are never parsed twice. pdfplumber and python-docx are imported on
+# first use.
+import os
+
+from utils.pdf_extract import PDF_EXTRACT_MODE, iter_pdf_pages
+from utils.json_stream import iter_web_search_contents
+from utils.text_cache import get_text_cache
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".json")
+# Bump when extraction output changes, so cached text from the old code is not reused
+EXTRACTOR_VERSION = 1
+
+def is_supported(filename):
+    return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+def extractor_version(ext):
+    """Cache version of the extractor used for `ext` files"""
+    version = f"{EXTRACTOR_VERSION}{ext}"
+    return f"{version}/{PDF_EXTRACT_MODE}" if ext == ".pdf" else version
+
+def cleanup_text_cache(max_age_days=None):
+    """Drop cached text of old extractor versions and files unused for a while. Returns files removed."""
+    cache = get_text_cache()
+    if cache is None:
+        return 0
+    return cache.cleanup({extractor_version(ext) for ext in SUPPORTED_EXTENSIONS}, max_age_days)
+
+def load_text_from_file(file_path, resume_from=None, inclusive=False):
+    """Content items of a file, from the text cache when its bytes have been extracted before.
+
+    Resumed JSON reads (`resume_from`) seek into the file and bypass the cache.
+    """
+    cache = get_text_cache()
+    ext = os.path.splitext(file_path)[-1].lower()
+    if cache is None or resume_from is not None or ext not in SUPPORTED_EXTENSIONS:
+        return extract_text(file_path, resume_from, inclusive)
+    version = extractor_version(ext)
+    key = cache.key(file_path, version)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    return cache.record(key, version, extract_text(file_path))
+
+def extract_text(file_path, resume_from=None, inclusive=False):
+    ext = os.path.splitext(file_path)[-1].lower()
+    contents = []
+
+    if ext == ".json":
+        # Items are parsed one at a time and streamed into the chunker, so large crawl
+        # exports never have to fit in memory; `resume_from` skips already-ingested items
+        # (or re-reads from that item when `inclusive`)
+        return ({"text": text, "position": position}
+                for text, position in iter_web_search_contents(file_path, resume=resume_from, inclusive=inclusive))
+
+    elif ext == ".pdf":
+        # Pages are extracted lazily (in parallel for large files) and streamed into the chunker
+        contents.append(iter_pdf_pages(file_path))
+
+    elif ext == ".docx":
+        try:
+            from docx import Document
+            doc = Document(file_path)
+            text = "\n".join(para.text for para in doc.paragraphs)
+            if text.strip():
+                contents.append(text)
+        except Exception as e:
+            print(f"Failed to read DOCX file: {file_path}\nError: {str(e)}")
+            return []
+
+    elif ext == ".txt":
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                text = f.read()
+                if text.strip():
+                    contents.append(text)
+        except Exception as e:
+            print(f"Failed to read TXT file: {file_path}\nError: {str(e)}")
+            return []
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+    return contents
@@ -0,0 +1,55 @@
+# utils/warmup.py
+# Explicit warm-up hook: opens connection pools, wakes the embedding model and checks the collection
+import time
+
+from utils.config import GROQ_API_URL, GROQ_API_KEY, VECTOR_SIZE
+from utils.embedder import get_embedding
+from utils.http_client import get_session
+from utils.metrics import WARMUP_SECONDS
+from utils.qdrant_utils import get_collection_info
+from utils.sharding import shard_names
+
+def _check_collection():
+    for name in shard_names():
+        info = get_collection_info(name)
+        if info is None:
+            raise RuntimeError(f"Collection {name} does not exist yet")
+        vectors = info.get("config", {}).get("params", {}).get("vectors", {})
+        size = vectors.get("size") if isinstance(vectors, dict) else None
+        if size is not None and size != VECTOR_SIZE:
+            raise RuntimeError(f"Collection {name} stores {size}-d vectors, expected {VECTOR_SIZE}")
+
+def _wake_embedding_model():
+    # Hugging Face loads the model on the first inference call, which is the usual cold-start spike
+    get_embedding("warm-up")
+
+def _open_llm_connection():
+    # Listing models opens the TLS connection without spending completion tokens
+    models_url = GROQ_API_URL.rsplit("/chat/completions", 1)[0] + "/models"
+    get_session("groq").get(models_url, headers={"Authorization": f"Bearer {GROQ_API_KEY}"}, timeout=10)
+
+WARMUP_STEPS = [
+    ("qdrant", _check_collection),
+    ("embedding", _wake_embedding_model),
+    ("llm", _open_llm_connection),
+]
+
+def warm_up():
+    """Run every warm-up step and return {step: seconds or error message}.
+
+    The pipeline has no local models today, so waking the remote embedding
+    model is the model-loading part. A failing step is reported and skipped.
+    """
+    results = {}
+    for step, fn in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            fn()
+            elapsed = time.perf_counter() - start
+            WARMUP_SECONDS.set(elapsed, step=step)
+            results[step] = round(elapsed, 4)
+        except Exception as e:
+            print(f"Warm-up step '{step}' failed: {e}")
+            results[step] = f"error: {e}"
+    print("Warm-up finished:", results)
+    return results